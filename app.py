@@ -1,27 +1,38 @@
 import streamlit as st
 import re
-import pandas as pd
-import numpy as np
 from datetime import datetime
-import random
-import time
-
-# Set page configuration
-st.set_page_config(
-    page_title="TruthGuard - Fake News Detector",
-    page_icon="🛡️",
-    layout="wide"
-)
-
-# Custom CSS for newspaper styling
-st.markdown("""
+import os
+import json
+
+from truthguard.feedback import FeedbackWriter
+from truthguard.profiling import PerformanceStats, Profile, profiling_enabled
+from truthguard.session import DEFAULT_DOCUMENT_TABLES, AnalysisResult, DocumentResults, DocumentTables
+from truthguard.timing import StageTimer
+
+# The analysis modules and their dependencies (pandas, the lexicon regexes, aiohttp, urllib3)
+# are imported where they are first used, so the page is drawn before they load
+
+# The databases live in database/ unless TRUTHGUARD_DATABASE_DIR points elsewhere
+DATABASE_DIR = os.environ.get('TRUTHGUARD_DATABASE_DIR') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'database')
+
+# Page configuration and styling, set from main() so that bulk-scoring workers, which import
+# this script as __mp_main__, only load its definitions
+def configure_page():
+    st.set_page_config(
+        page_title="TruthGuard - Fake News Detector",
+        page_icon="🛡️",
+        layout="wide"
+    )
+    
+    # Custom CSS for newspaper styling
+    st.markdown("""
 <style>
     /* Newspaper background effect */
     .stApp {
         background-color: #e8e8e8;
         background-image: url("data:image/svg+xml,%3Csvg width='100%25' height='100%25' xmlns='http://www.w3.org/2000/svg'%3E%3Cdefs%3E%3Cpattern id='newspaper' patternUnits='userSpaceOnUse' width='300' height='300' patternTransform='rotate(45)'%3E%3Crect width='300' height='300' fill='%23f0f0f0'/%3E%3Cline x1='0' y1='0' x2='300' y2='0' stroke='%23d0d0d0' stroke-width='1'/%3E%3Cline x1='0' y1='30' x2='300' y2='30' stroke='%23d0d0d0' stroke-width='0.5'/%3E%3Cline x1='0' y1='60' x2='300' y2='60' stroke='%23d0d0d0' stroke-width='0.5'/%3E%3Cline x1='0' y1='90' x2='300' y2='90' stroke='%23d0d0d0' stroke-width='0.5'/%3E%3Cline x1='0' y1='120' x2='300' y2='120' stroke='%23d0d0d0' stroke-width='0.5'/%3E%3Cline x1='0' y1='150' x2='300' y2='150' stroke='%23d0d0d0' stroke-width='1'/%3E%3Cline x1='0' y1='180' x2='300' y2='180' stroke='%23d0d0d0' stroke-width='0.5'/%3E%3Cline x1='0' y1='210' x2='300' y2='210' stroke='%23d0d0d0' stroke-width='0.5'/%3E%3Cline x1='0' y1='240' x2='300' y2='240' stroke='%23d0d0d0' stroke-width='0.5'/%3E%3Cline x1='0' y1='270' x2='300' y2='270' stroke='%23d0d0d0' stroke-width='0.5'/%3E%3Cline x1='0' y1='0' x2='0' y2='300' stroke='%23d0d0d0' stroke-width='1'/%3E%3Cline x1='30' y1='0' x2='30' y2='300' stroke='%23d0d0d0' stroke-width='0.5'/%3E%3Cline x1='60' y1='0' x2='60' y2='300' stroke='%23d0d0d0' stroke-width='0.5'/%3E%3Cline x1='90' y1='0' x2='90' y2='300' stroke='%23d0d0d0' stroke-width='0.5'/%3E%3Cline x1='120' y1='0' x2='120' y2='300' stroke='%23d0d0d0' stroke-width='0.5'/%3E%3Cline x1='150' y1='0' x2='150' y2='300' stroke='%23d0d0d0' stroke-width='1'/%3E%3Cline x1='180' y1='0' x2='180' y2='300' stroke='%23d0d0d0' stroke-width='0.5'/%3E%3Cline x1='210' y1='0' x2='210' y2='300' stroke='%23d0d0d0' stroke-width='0.5'/%3E%3Cline x1='240' y1='0' x2='240' y2='300' stroke='%23d0d0d0' stroke-width='0.5'/%3E%3Cline x1='270' y1='0' x2='270' y2='300' stroke='%23d0d0d0' stroke-width='0.5'/%3E%3C/pattern%3E%3C/defs%3E%3Crect width='100%25' height='100%25' fill='url(%23newspaper)'/%3E%3C/svg%3E");
     }
-
+    
     /* Container styling */
     .css-18e3th9 {
         padding-top: 0;
@@ -139,11 +150,122 @@ st.markdown("""
         letter-spacing: 0.5px;
     }
 </style>
-""", unsafe_allow_html=True)
+    """, unsafe_allow_html=True)
 
 # Initialize session state variables
-if 'text_analysis_counter' not in st.session_state:
-    st.session_state.text_analysis_counter = 0
+def init_session_state():
+    if 'results' not in st.session_state:
+        st.session_state.results = {}
+
+# Analysis results shared by every session, keyed by content hash
+@st.cache_resource
+def get_analysis_cache():
+    db_path = os.path.join(DATABASE_DIR, 'analysis_cache.db')
+    from truthguard.cache import AnalysisCache
+    from truthguard.incremental import ParagraphCache
+    return AnalysisCache(max_entries=1024, db_path=db_path, paragraphs=ParagraphCache())
+
+# Worker processes for bulk scoring, shared by every session
+@st.cache_resource
+def get_parallel_scorer():
+    workers = int(os.environ.get('TRUTHGUARD_WORKERS', 0)) or None
+    chunk_size = int(os.environ.get('TRUTHGUARD_CHUNK_SIZE', 64))
+    from truthguard.parallel import ParallelScorer
+    return ParallelScorer(workers=workers, chunk_size=chunk_size)
+
+# Article fetcher with pooled connections and a revalidating page cache
+@st.cache_resource
+def get_page_fetcher():
+    from truthguard.fetcher import PageFetcher
+    return PageFetcher()
+
+# Result tables of recent multi-document uploads, shared by every session
+@st.cache_resource
+def get_document_tables():
+    max_entries = int(os.environ.get('TRUTHGUARD_DOCUMENT_TABLES', DEFAULT_DOCUMENT_TABLES))
+    return DocumentTables(max_entries=max_entries)
+
+# Read-only lookups across every database in DATABASE_DIR, with a near-duplicate index per file
+# and one domain credibility index merged from all of them
+@st.cache_resource
+def get_shards():
+    from truthguard.shards import ShardedDatabase, default_db_paths
+    return ShardedDatabase(default_db_paths(DATABASE_DIR))
+
+# Request counters and stage latencies for this server process
+@st.cache_resource
+def get_performance_stats():
+    return PerformanceStats()
+
+# Profiling and the Performance panel are switched on by ?profile=1 or TRUTHGUARD_PROFILE=1
+def profiling_requested():
+    return profiling_enabled(st.query_params.get('profile'))
+
+# Background writer for verdict feedback, shared by every session
+@st.cache_resource
+def get_feedback_writer():
+    db_path = os.path.join(DATABASE_DIR, 'news_detector.db')
+    return FeedbackWriter(db_path)
+
+# Button callbacks run at the start of the next rerun, even if the verdict is not shown again
+def record_feedback(user_verdict, content, verdict, confidence, store_content):
+    get_feedback_writer().record(content, user_verdict, verdict, confidence, store_content)
+    st.session_state.last_feedback = {
+        'user_verdict': user_verdict,
+        'content': content if store_content else None,
+        'corrected_verdict': "False" if verdict == "True" else "True",
+    }
+
+def add_training_example(content, is_true):
+    get_feedback_writer().add_training(content, is_true)
+    st.session_state.last_feedback = {'user_verdict': 'training'}
+
+# Acknowledge feedback given on the previous run
+def render_feedback_status():
+    feedback = st.session_state.pop('last_feedback', None)
+    if feedback is None:
+        return
+    
+    if feedback['user_verdict'] == 'correct':
+        st.success("Thank you for your feedback! This helps improve our system.")
+    elif feedback['user_verdict'] == 'training':
+        st.success("Added to training data. Thank you for improving our system!")
+    else:
+        st.error("Thank you for your feedback. We'll use this to improve our algorithm.")
+        if feedback['content']:
+            correction_col1, correction_col2, correction_col3 = st.columns([1, 2, 1])
+            with correction_col2:
+                corrected_verdict = feedback['corrected_verdict']
+                st.markdown(f"Would you like to add this as a known {corrected_verdict.lower()} news example?")
+                st.button("Yes, add to training data", on_click=add_training_example,
+                          args=(feedback['content'], corrected_verdict == "True"))
+
+# Scoring engines offered in the sidebar
+HEURISTIC_ENGINE = "Heuristic rules"
+TFIDF_ENGINE = "TF-IDF model (experimental)"
+
+# The TF-IDF model scores below the rules on the bundled corpus, so it is only offered when switched on
+EXPERIMENTAL_MODEL_ENV = 'TRUTHGUARD_EXPERIMENTAL_MODEL'
+
+# Learned scoring engine, trained offline and memory-mapped from models/tfidf_linear/
+@st.cache_resource
+def get_tfidf_model():
+    from truthguard.model import TfidfModel
+    try:
+        return TfidfModel.load()
+    except FileNotFoundError:
+        raise ValueError("No trained TF-IDF model was found. Train one with: python -m truthguard.model")
+
+def scoring_engines():
+    engines = [HEURISTIC_ENGINE]
+    if os.environ.get(EXPERIMENTAL_MODEL_ENV, '').strip().lower() in ('1', 'true', 'yes', 'on'):
+        try:
+            get_tfidf_model()
+        except ValueError as e:
+            st.sidebar.warning(str(e))
+        else:
+            engines.append(TFIDF_ENGINE)
+    return engines
 
 # Header with newspaper styling
 def render_header():
@@ -162,247 +284,24 @@ def render_header():
     </div>
     """, unsafe_allow_html=True)
 
-# Analysis functions
-def analyze_sentiment(text):
-    """Simple sentiment analysis function"""
-    positive_words = ['good', 'great', 'excellent', 'positive', 'happy', 'wonderful', 'beneficial']
-    negative_words = ['bad', 'terrible', 'awful', 'negative', 'sad', 'horrible', 'harmful']
-    
-    positive_count = 0
-    negative_count = 0
-    
-    lower_text = text.lower()
-    
-    for word in positive_words:
-        pattern = r'\b' + re.escape(word) + r'\b'
-        matches = re.findall(pattern, lower_text, re.IGNORECASE)
-        positive_count += len(matches)
-    
-    for word in negative_words:
-        pattern = r'\b' + re.escape(word) + r'\b'
-        matches = re.findall(pattern, lower_text, re.IGNORECASE)
-        negative_count += len(matches)
-    
-    if positive_count > negative_count:
-        return 'Positive'
-    elif negative_count > positive_count:
-        return 'Negative'
-    else:
-        return 'Neutral'
-
-def count_sources(text):
-    """Count potential sources in the text"""
-    source_count = 0
-    
-    # Count URLs
-    url_pattern = r'(https?://[^\s]+)'
-    urls = re.findall(url_pattern, text)
-    source_count += len(urls)
-    
-    # Count citation patterns like (Author, 2020)
-    citation_pattern = r'\([^)]*\d{4}[^)]*\)'
-    citations = re.findall(citation_pattern, text)
-    source_count += len(citations)
-    
-    # Count "according to" phrases
-    according_to_pattern = r'according to [^,.]+' 
-    according_to = re.findall(according_to_pattern, text, re.IGNORECASE)
-    source_count += len(according_to)
-    
-    return source_count
-
-def analyze_content(content):
-    """Main analysis function to determine truthfulness of content"""
-    # Define lists of keywords that might indicate fake vs. true news
-    fake_news_indicators = [
-        'conspiracy', 'hoax', 'fraud', 'scam', 'fake', 
-        'clickbait', 'shocking', 'you won\'t believe', 
-        'secret', 'they don\'t want you to know',
-        'miraculous', 'cure', 'exclusive', 'anonymous sources',
-        'hidden truth', 'cover-up', 'what they don\'t tell you',
-        'mainstream media won\'t report', 'doctors hate this',
-        'one weird trick', 'without a prescription', 'banned',
-        'censored', 'the truth about', 'they refused to publish',
-        'what the government doesn\'t want you to know',
-        'shocking revelation', 'suppressed', 'exposed',
-        'wake up', 'sheeple', 'mind control', 'plandemic'
-    ]
-    
-    truth_indicators = [
-        'research', 'study', 'evidence', 'according to experts',
-        'scientists', 'verified', 'official', 'fact check',
-        'investigation', 'confirmed', 'source', 'data',
-        'peer-reviewed', 'published in', 'journal', 'university',
-        'professor', 'expert', 'analyzed', 'statistics',
-        'survey', 'clinical trial', 'experiment', 'meta-analysis',
-        'research paper', 'findings suggest', 'evidence indicates',
-        'researchers found', 'according to the study',
-        'multiple sources confirmed', 'citation', 'reference',
-        'statistical significance', 'correlation', 'causation'
-    ]
-    
-    # Starting with a baseline confidence of 65%
-    true_confidence = 65
-    
-    # Count occurrences of indicators
-    fake_score = 0
-    truth_score = 0
-    
-    # Convert content to lowercase for case-insensitive matching
-    lower_content = content.lower()
-    
-    # Check fake news indicators
-    for indicator in fake_news_indicators:
-        pattern = r'\b' + re.escape(indicator) + r'\b'
-        matches = re.findall(pattern, lower_content, re.IGNORECASE)
-        fake_score += len(matches)
-    
-    # Check truth indicators with 3x weight
-    for indicator in truth_indicators:
-        pattern = r'\b' + re.escape(indicator) + r'\b'
-        matches = re.findall(pattern, lower_content, re.IGNORECASE)
-        truth_score += len(matches) * 3
-    
-    # Calculate indicator-based adjustment
-    total_indicators = fake_score + (truth_score / 3)  # Use original count for total
-    
-    if total_indicators > 0:
-        # Calculate percentage of truth indicators
-        truth_percentage = (truth_score / 3) / total_indicators
-        
-        # Adjust confidence based on indicators ratio
-        if truth_percentage >= 0.7:
-            # Strong truth indicators
-            true_confidence += 20
-        elif truth_percentage >= 0.5:
-            # Moderate truth indicators
-            true_confidence += 10
-        elif truth_percentage <= 0.3:
-            # Strong fake indicators
-            true_confidence -= 35
-        elif truth_percentage <= 0.5:
-            # Moderate fake indicators
-            true_confidence -= 20
-    
-    # Content structure checks
-    word_count = len(re.findall(r'\b\w+\b', content))
-    
-    # Adjust for content length
-    if word_count < 20:
-        true_confidence -= 15  # Very short content is suspicious
-    elif word_count > 100:
-        true_confidence += 10  # Longer, more detailed content is more likely true
-    
-    # Check for excessive use of capital letters (shouting)
-    upper_case_count = len(re.findall(r'[A-Z]', content))
-    upper_case_ratio = upper_case_count / len(content) if len(content) > 0 else 0
-    
-    if upper_case_ratio > 0.3 and len(content) > 50:
-        true_confidence -= 25  # Heavily reduce confidence if excessive caps
-    elif upper_case_ratio > 0.2 and len(content) > 50:
-        true_confidence -= 15  # Moderate reduction for somewhat high caps
-    
-    # Check for excessive punctuation (!!!???)
-    excessive_punctuation = len(re.findall(r'[!?]{2,}', content))
-    
-    if excessive_punctuation > 3:
-        true_confidence -= 25  # Heavy penalty for very excessive punctuation
-    elif excessive_punctuation > 1:
-        true_confidence -= 15  # Moderate penalty for some excessive punctuation
-    
-    # Check for weasel words (may, might, could, possibly, allegedly)
-    weasel_words = ['may', 'might', 'could', 'possibly', 'allegedly', 'reportedly', 
-                    'some say', 'they say', 'many people', 'sources say', 'rumored', 
-                    'supposedly']
-    
-    weasel_count = 0
-    for word in weasel_words:
-        pattern = r'\b' + re.escape(word) + r'\b'
-        matches = re.findall(pattern, lower_content, re.IGNORECASE)
-        weasel_count += len(matches)
-    
-    # Adjust for weasel words
-    if weasel_count > 4:
-        true_confidence -= 20  # Heavy reduction for many weasel words
-    elif weasel_count > 2:
-        true_confidence -= 10  # Moderate reduction for some weasel words
-    elif weasel_count == 0 and word_count > 50:
-        true_confidence += 10  # Boost for clear, direct statements with no weasel words
-    
-    # Check for source citations
-    source_count = count_sources(content)
-    
-    if source_count >= 3:
-        true_confidence += 20  # Strong boost for multiple sources
-    elif source_count >= 1:
-        true_confidence += 15  # Moderate boost for at least one source
-    
-    # Additional checks for factual language patterns
-    factual_phrases = ['according to', 'stated that', 'reported by', 'confirms that', 'found that']
-    factual_count = 0
-    
-    for phrase in factual_phrases:
-        pattern = re.escape(phrase)
-        matches = re.findall(pattern, lower_content, re.IGNORECASE)
-        factual_count += len(matches)
-    
-    if factual_count >= 2:
-        true_confidence += 15  # Boost for multiple factual phrases
-    elif factual_count >= 1:
-        true_confidence += 10  # Smaller boost for at least one factual phrase
-    
-    # Check for quotations (often a sign of legitimate reporting)
-    quote_matches = re.findall(r'[""][^""]+[""]', content)
-    
-    if quote_matches and len(quote_matches) >= 2:
-        true_confidence += 10  # Boost for multiple quotations
-    elif quote_matches and len(quote_matches) >= 1:
-        true_confidence += 5  # Smaller boost for at least one quotation
-    
-    # Round to 2 decimal places
-    true_confidence = round(true_confidence * 100) / 100
-    
-    # Ensure confidence is within bounds
-    true_confidence = max(0, min(100, true_confidence))
-    
-    # Metrics dictionary
-    metrics = {
-        'content_length': f"{word_count} words",
-        'fake_indicators': fake_score,
-        'truth_indicators': round(truth_score / 3),  # Display the original count
-        'sentiment': analyze_sentiment(content),
-        'sources_count': source_count,
-        'weasel_words': weasel_count,
-        'factual_phrases': factual_count,
-        'all_caps': f"{upper_case_ratio * 100:.1f}%"
-    }
-    
-    return true_confidence, metrics
+# Finished analyses are kept per tab, so reruns such as feedback clicks redraw them without analyzing again
+def save_result(active_tab, confidence, metrics, timings=None, content='', store_content=True, **extra):
+    """Decide the verdict from the analysis and keep the result for display"""
+    from truthguard.duplicates import decide_verdict
+    verdict = decide_verdict(confidence, metrics)
+    st.session_state.results[active_tab] = AnalysisResult(verdict, confidence, metrics, timings, content,
+                                                          store_content, **extra)
 
-def display_verdict(active_tab, confidence, metrics):
-    """Display the verdict based on the active tab"""
-    
-    if active_tab == "Text":
-        # For text section, alternate between True and False
-        if st.session_state.text_analysis_counter % 2 == 0:
-            verdict = 'True'
-            verdict_class = 'true'
-        else:
-            verdict = 'False'
-            verdict_class = 'false'
-        # Increment counter for next text analysis
-        st.session_state.text_analysis_counter += 1
-    elif active_tab in ["URL", "File", "Web Crawler"]:
-        verdict = 'True'
-        verdict_class = 'true'
-    else:
-        # Fallback to using the analysis result
-        is_true = confidence >= 50
-        verdict = 'True' if is_true else 'False'
-        verdict_class = 'true' if is_true else 'false'
+def display_verdict(active_tab):
+    """Display the verdict of the last analysis in the active tab"""
+    result = st.session_state.results.get(active_tab)
+    if result is None:
+        return
+    verdict, confidence, metrics = result.verdict, result.confidence, result.metrics
+    content, store_content = result.content, result.store_content
     
     # Display the verdict
-    st.markdown(f'<div class="verdict {verdict_class}">{verdict}</div>', unsafe_allow_html=True)
+    st.markdown(f'<div class="verdict {verdict.lower()}">{verdict}</div>', unsafe_allow_html=True)
     
     # Display confidence
     col1, col2, col3 = st.columns([1, 3, 1])
@@ -417,53 +316,299 @@ def display_verdict(active_tab, confidence, metrics):
     with col2:
         col_a, col_b = st.columns(2)
         with col_a:
-            correct_btn = st.button("Yes", key="correct_btn")
+            st.button("Yes", key=f"correct_btn_{active_tab}", on_click=record_feedback,
+                      args=('correct', content, verdict, confidence, store_content))
         with col_b:
-            incorrect_btn = st.button("No", key="incorrect_btn")
+            st.button("No", key=f"incorrect_btn_{active_tab}", on_click=record_feedback,
+                      args=('incorrect', content, verdict, confidence, store_content))
     st.markdown("</div>", unsafe_allow_html=True)
     
-    if correct_btn:
-        st.success("Thank you for your feedback! This helps improve our system.")
-    elif incorrect_btn:
-        st.error("Thank you for your feedback. We'll use this to improve our algorithm.")
-        correction_col1, correction_col2, correction_col3 = st.columns([1, 2, 1])
-        with correction_col2:
-            corrected_verdict = "False" if verdict == "True" else "True"
-            st.markdown(f"Would you like to add this as a known {corrected_verdict.lower()} news example?")
-            train_btn = st.button("Yes, add to training data")
-            if train_btn:
-                st.success("Added to training data. Thank you for improving our system!")
-    
     # Display detailed metrics
     with st.expander("Analysis Details", expanded=True):
         st.markdown('<div class="metrics-container">', unsafe_allow_html=True)
         st.markdown('<h3>Analysis Details</h3>', unsafe_allow_html=True)
         
-        metrics_data = {
-            'Metric': ['Content Length', 'Misinformation Indicators', 'Credibility Indicators', 
-                      'Overall Sentiment', 'Source Citations', 'Weasel Words', 
-                      'Factual Phrases', 'All Caps Percentage'],
-            'Value': [metrics['content_length'], f"{metrics['fake_indicators']} found", 
-                     f"{metrics['truth_indicators']} found", metrics['sentiment'], 
-                     f"{metrics['sources_count']} detected", f"{metrics['weasel_words']} found", 
-                     f"{metrics['factual_phrases']} found", metrics['all_caps']]
-        }
+        render_timer = StageTimer()
+        with render_timer.stage('render'):
+            render_metrics_table(metrics)
         
-        metrics_df = pd.DataFrame(metrics_data)
-        st.table(metrics_df)
+        # Counted once per analysis, with the time of its first render
+        if result.observe(render_timer.timings):
+            get_performance_stats().observe(active_tab, result.timings())
+        timings = result.timings()
+        stage_times = ", ".join(f"{stage} {seconds * 1000:.2f} ms" for stage, seconds in timings.items())
+        st.caption(f"Processing time: {stage_times} (total {sum(timings.values()) * 1000:.2f} ms)")
         st.markdown('</div>', unsafe_allow_html=True)
 
-# Display loading animation
-def display_loading():
-    with st.spinner("Analyzing content..."):
-        progress_bar = st.progress(0)
-        for i in range(100):
-            time.sleep(0.02)
-            progress_bar.progress(i + 1)
+# Metrics table of the Analysis Details expander, as Markdown rather than a DataFrame;
+# metrics holds raw values, and this is where they are formatted
+def render_metrics_table(metrics):
+    rows = [
+        ('Content Length', metrics['content_length']),
+        ('Misinformation Indicators', f"{metrics['fake_indicators']} found"),
+        ('Credibility Indicators', f"{metrics['truth_indicators']} found"),
+        ('Overall Sentiment', metrics['sentiment']),
+        ('Source Citations', f"{metrics['sources_count']} detected"),
+        ('Weasel Words', f"{metrics['weasel_words']} found"),
+        ('Factual Phrases', f"{metrics['factual_phrases']} found"),
+        ('All Caps Percentage', metrics['all_caps']),
+    ]
+    
+    if 'source_credibility' in metrics:
+        rows.append(('Source Credibility', metrics['source_credibility']))
+    if 'engine' in metrics:
+        rows.append(('Scoring Engine', metrics['engine']))
+    if 'known_match' in metrics:
+        rows.append(('Known Article Match', metrics['known_match']))
+    if 'pages' in metrics:
+        rows.append(('Pages Analyzed', metrics['pages']))
+    
+    lines = ["| Metric | Value |", "| --- | --- |"]
+    lines.extend(f"| {name} | {str(value).replace('|', '&#124;')} |" for name, value in rows)
+    st.markdown("\n".join(lines))
+
+# Analysis pipeline stages, in the order they run
+ANALYSIS_STAGES = ['parse', 'lookup', 'split', 'lexicon scan', 'structure', 'sources', 'scoring', 'model',
+                   'credibility', 'known match']
+URL_STAGES = ['fetch', 'extract'] + ANALYSIS_STAGES
+FILE_STAGES = ['parse', 'lookup', 'feature extraction', 'scoring', 'opening', 'model', 'credibility',
+               'known match']
+DOCUMENT_STAGES = ['parse', 'lookup', 'extraction', 'feature extraction', 'scoring', 'opening', 'model',
+                   'credibility', 'known match']
+
+# Run the analysis while the progress bar follows its real stages
+def analyze_with_progress(content=None, fileobj=None, url=None, engine=HEURISTIC_ENGINE, kind=None):
+    with Profile(enabled=profiling_requested()) as profile:
+        result = run_analysis(content, fileobj, url, engine, kind)
+    if profile.enabled:
+        st.session_state.last_profile = profile.report()
+    return result
+
+def run_analysis(content, fileobj, url, engine, kind=None):
+    if url is not None:
+        stages = URL_STAGES
+    elif fileobj is not None:
+        stages = DOCUMENT_STAGES if kind is not None else FILE_STAGES
+    else:
+        stages = ANALYSIS_STAGES
+    progress_bar = st.progress(0, text="Analyzing content...")
+    
+    def show_stage(name):
+        step = stages.index(name)
+        progress_bar.progress(step / len(stages), text=f"Analyzing content: {name}...")
+    
+    timer = StageTimer(on_stage=show_stage)
+    if url is not None:
+        try:
+            with timer.stage('fetch'):
+                page = get_page_fetcher().fetch(url)
+        except ValueError:
+            progress_bar.empty()
+            raise
+        with timer.stage('extract'):
+            content = page.extract()[0]
+    
+    if fileobj is not None and kind is not None:
+        # PDF and DOCX text is extracted and scanned a page at a time
+        from truthguard.document_text import iter_document_chunks, opening_text
+        try:
+            confidence, metrics = get_analysis_cache().analyze_document(fileobj, kind, timer)
+            # The model and the lookups below read the opening pages as text
+            with timer.stage('opening'):
+                fileobj.seek(0)
+                content = opening_text(iter_document_chunks(fileobj, kind))
+        except ValueError:
+            progress_bar.empty()
+            raise
+        confidence, metrics = weigh_content(confidence, metrics, content, engine, timer)
+    elif fileobj is not None:
+        # Large uploads are decoded and scanned a chunk at a time
+        from truthguard.document_text import opening_text
+        from truthguard.streaming import iter_text_chunks
+        confidence, metrics = get_analysis_cache().analyze_file(fileobj, timer)
+        with timer.stage('opening'):
+            fileobj.seek(0)
+            content = opening_text(iter_text_chunks(fileobj))
+        confidence, metrics = weigh_content(confidence, metrics, content, engine, timer)
+    else:
+        confidence, metrics = get_analysis_cache().analyze(content, timer)
+        hosts = [url, page.url] if url is not None else []
+        confidence, metrics = weigh_content(confidence, metrics, content, engine, timer, hosts)
+    
+    progress_bar.empty()
+    return confidence, metrics, timer.timings, content
+
+# The steps after the cached analysis: the selected engine, cited domains and known-article matches
+def weigh_content(confidence, metrics, content, engine, timer, hosts=()):
+    from truthguard.duplicates import weigh_match
+    if engine == TFIDF_ENGINE:
+        # The rule-based metrics stay for the details table
+        with timer.stage('model'):
+            model = get_tfidf_model()
+            confidence = model.confidence(content)
+            metrics = metrics.with_values(engine=model.engine)
+    # Cited domains are checked after the cache, so table updates apply at once
+    with timer.stage('credibility'):
+        confidence, metrics = get_shards().adjust_credibility(confidence, metrics, content, hosts)
+    # A copy of a known article takes that article's verdict
+    with timer.stage('known match'):
+        confidence, metrics = weigh_match(confidence, metrics, get_shards().match(content))
+    return confidence, metrics
+
+# Score a multi-document upload, streaming each chunk of results into one table
+def display_document_results(uploaded_file, fmt, engine=HEURISTIC_ENGINE):
+    import pandas as pd
+    from truthguard.ingest import DEFAULT_CHUNK_ROWS, score_documents
+    stats_placeholder = st.empty()
+    table = None
+    collected = []
+    
+    # Read enough rows per chunk to keep every worker busy
+    scorer = get_parallel_scorer()
+    chunk_rows = max(DEFAULT_CHUNK_ROWS, scorer.workers * scorer.chunk_size)
+    
+    try:
+        credibility = get_shards().credibility.index()
+        model = get_tfidf_model() if engine == TFIDF_ENGINE else None
+        for results, stats in score_documents(uploaded_file, fmt, chunk_rows=chunk_rows, scorer=scorer,
+                                              credibility=credibility, model=model):
+            if table is None:
+                table = st.dataframe(results, hide_index=True, use_container_width=True)
+            else:
+                table.add_rows(results)
+            collected.append(results)
+            stats_placeholder.caption(
+                f"Scored {stats['rows']} documents in {stats['seconds']:.2f} s "
+                f"({stats['rows_per_second']:.0f} rows/s)"
+            )
+    except ValueError as e:
+        get_performance_stats().error("Documents")
+        st.error(f"Could not read the uploaded documents: {e}")
+        return
+    
+    if not collected:
+        st.warning("The uploaded file does not contain any documents.")
+        return
+    
+    get_performance_stats().observe("Documents", {'documents': stats['seconds']})
+    # The session keeps only the key of the table, which the shared store holds
+    table = get_document_tables().put(pd.concat(collected, ignore_index=True))
+    documents = DocumentResults(upload_key(uploaded_file), table,
+                                f"Scored {stats['rows']} documents in {stats['seconds']:.2f} s "
+                                f"({stats['rows_per_second']:.0f} rows/s)")
+    st.session_state.results["Documents"] = documents
+    render_document_exports(documents, *get_document_tables().get(table))
+
+# Which upload a set of document results belongs to
+def upload_key(uploaded_file):
+    return (uploaded_file.name, uploaded_file.size)
+
+# Redraw the results of the last multi-document upload on later reruns, such as a download
+def render_document_results(documents):
+    table = get_document_tables().get(documents.table)
+    if table is None:
+        # Dropped to make room for newer uploads
+        st.session_state.results.pop("Documents", None)
+        st.info("These results are no longer held. Analyze the file again to see them.")
+        return
+    results, exports = table
+    st.caption(documents.caption)
+    st.dataframe(results, hide_index=True, use_container_width=True)
+    render_document_exports(documents, results, exports)
+
+# Download button for the chosen format; each format is exported only once it is chosen
+def render_document_exports(documents, results, exports):
+    from truthguard.ingest import export_results
+    fmt = st.radio("Export format", ["CSV", "Parquet"], horizontal=True, key="document_export_format")
+    if fmt not in exports:
+        exports[fmt] = export_results(results, fmt.lower())
+    base_name = documents.upload[0].rsplit('.', 1)[0]
+    extension, mime = {'CSV': ('csv', "text/csv"), 'Parquet': ('parquet', "application/octet-stream")}[fmt]
+    st.download_button(f"Download {fmt}", exports[fmt],
+                       file_name=f"{base_name}_results.{extension}", mime=mime)
+
+# Crawl a site, listing each page as soon as it is scored
+def display_crawl_results(start_url, max_depth, max_pages):
+    import pandas as pd
+    from truthguard.crawler import crawl_site
+    status = st.empty()
+    table = None
+    
+    def show_page(page):
+        nonlocal table
+        row = pd.DataFrame([page.as_row()])
+        if table is None:
+            table = st.dataframe(row, hide_index=True, use_container_width=True)
+        else:
+            table.add_rows(row)
+        status.caption(f"Crawled {page.url}")
+    
+    timer = StageTimer()
+    with timer.stage('crawl'):
+        report = crawl_site(start_url, on_page=show_page, max_depth=max_depth, max_pages=max_pages)
+    
+    summary = report.summary()
+    if summary is not None:
+        summary = get_shards().credibility.index().adjust(*summary, hosts=[start_url])
+    if summary is None:
+        status.empty()
+        st.session_state.results.pop("Web Crawler", None)
+        st.error("None of the crawled pages could be analyzed.")
+        return
+    
+    caption = f"Scored {len(report.scored)} of {len(report.pages)} pages in {timer.total():.2f} s"
+    status.caption(caption)
+    confidence, metrics = summary
+    save_result("Web Crawler", confidence, metrics, timer.timings, content=start_url, store_content=False,
+                pages=[page.as_values() for page in report.pages], caption=caption)
+
+# Redraw the pages of the last crawl on later reruns
+def render_crawled_pages(result):
+    import pandas as pd
+    from truthguard.crawler import PAGE_COLUMNS
+    st.caption(result.caption)
+    st.dataframe(pd.DataFrame(list(result.pages), columns=PAGE_COLUMNS), hide_index=True, use_container_width=True)
+
+# Hidden panel with this process's latency statistics and the last request profile
+def render_performance_panel():
+    import pandas as pd
+    stats = get_performance_stats()
+    snapshot = stats.snapshot()
+    with st.expander("Performance"):
+        requests = ", ".join(f"{kind} {count}" for kind, count in snapshot['requests'].items()) or "none yet"
+        st.caption(f"Requests in this process: {requests} (up {snapshot['uptime_seconds']:.0f} s)")
+        if snapshot['stage_latency']:
+            rows = [dict(stage=stage, **summary) for stage, summary in snapshot['stage_latency'].items()]
+            table = pd.DataFrame(rows)[['stage', 'count', 'mean_ms', 'p50_ms', 'p95_ms', 'p99_ms']]
+            st.dataframe(table.round(3), hide_index=True, use_container_width=True)
+        shard_rows = get_shards().stats()
+        if shard_rows:
+            st.markdown("Database shard lookups")
+            table = pd.DataFrame(shard_rows)[['shard', 'lookup', 'count', 'errors', 'mean_ms', 'p50_ms', 'p95_ms', 'p99_ms']]
+            st.dataframe(table.round(3), hide_index=True, use_container_width=True)
+        if st.session_state.get('last_profile'):
+            st.markdown("Profile of the last analysis")
+            st.code(st.session_state.last_profile, language=None)
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button("Download Prometheus metrics", stats.prometheus(),
+                               file_name="truthguard_metrics.txt", mime="text/plain")
+        with col2:
+            st.download_button("Download JSON metrics", json.dumps(snapshot, indent=2),
+                               file_name="truthguard_metrics.json", mime="application/json")
 
 # Main application
 def main():
+    configure_page()
+    init_session_state()
     render_header()
+    render_feedback_status()
+    
+    engines = scoring_engines()
+    engine = HEURISTIC_ENGINE
+    if len(engines) > 1:
+        engine = st.sidebar.selectbox("Scoring engine", engines,
+                                      help="The TF-IDF model is trained offline with python -m truthguard.model")
     
     # Create tabs
     tab1, tab2, tab3, tab4 = st.tabs(["Text", "URL", "File", "Web Crawler"])
@@ -473,10 +618,10 @@ def main():
         analyze_text_btn = st.button("Analyze", key="analyze_text_btn")
         
         if analyze_text_btn and text_input:
-            display_loading()
-            confidence, metrics = analyze_content(text_input)
-            display_verdict("Text", confidence, metrics)
-        
+            confidence, metrics, timings, content = analyze_with_progress(text_input, engine=engine)
+            save_result("Text", confidence, metrics, timings, content)
+        display_verdict("Text")
+    
     with tab2:
         url_input = st.text_input("Enter the URL of the news article")
         analyze_url_btn = st.button("Analyze", key="analyze_url_btn")
@@ -486,14 +631,18 @@ def main():
             if not re.match(r'https?://', url_input):
                 st.error("Please enter a valid URL (starting with http:// or https://)")
             else:
-                display_loading()
-                # Simulate URL content analysis
-                simulated_content = f"Content from {url_input}.\nThis is a simulation of content analysis from a URL."
-                confidence, metrics = analyze_content(simulated_content)
-                display_verdict("URL", confidence, metrics)
+                try:
+                    confidence, metrics, timings, content = analyze_with_progress(url=url_input, engine=engine)
+                except ValueError as e:
+                    get_performance_stats().error("URL")
+                    st.session_state.results.pop("URL", None)
+                    st.error(str(e))
+                else:
+                    save_result("URL", confidence, metrics, timings, content)
+        display_verdict("URL")
     
     with tab3:
-        uploaded_file = st.file_uploader("Choose a file", type=["txt", "pdf", "docx"])
+        uploaded_file = st.file_uploader("Choose a file", type=["txt", "pdf", "docx", "csv", "jsonl"])
         
         if uploaded_file is not None:
             file_details = {"Filename": uploaded_file.name, "FileType": uploaded_file.type, "FileSize": uploaded_file.size}
@@ -502,15 +651,38 @@ def main():
             analyze_file_btn = st.button("Analyze File", key="analyze_file_btn")
             
             if analyze_file_btn:
-                display_loading()
-                
-                if uploaded_file.type == "application/pdf" or uploaded_file.type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
-                    st.error("PDF/DOCX analysis is not implemented in this demo.")
+                from truthguard.document_text import document_kind
+                from truthguard.ingest import document_format
+                kind = document_kind(uploaded_file.name, uploaded_file.type)
+                # A new analysis replaces whatever this tab showed before
+                st.session_state.results.pop("File", None)
+                st.session_state.results.pop("Documents", None)
+                if document_format(uploaded_file.name):
+                    # CSV/JSONL files hold many articles, each scored separately
+                    display_document_results(uploaded_file, document_format(uploaded_file.name), engine)
+                elif kind is not None:
+                    try:
+                        confidence, metrics, timings, _ = analyze_with_progress(fileobj=uploaded_file, engine=engine,
+                                                                                kind=kind)
+                    except ValueError as e:
+                        get_performance_stats().error("File")
+                        st.session_state.results.pop("File", None)
+                        st.error(str(e))
+                    else:
+                        # Feedback is keyed on the opening bytes, as for text files
+                        uploaded_file.seek(0)
+                        opening = uploaded_file.read(4096).decode('utf-8', errors='ignore')
+                        save_result("File", confidence, metrics, timings, opening, store_content=False)
                 else:
-                    # For text files, read the content
-                    content = uploaded_file.getvalue().decode("utf-8")
-                    confidence, metrics = analyze_content(content)
-                    display_verdict("File", confidence, metrics)
+                    # For text files, stream the content
+                    confidence, metrics, timings, _ = analyze_with_progress(fileobj=uploaded_file, engine=engine)
+                    # Feedback is keyed on the opening text, as server.js does; large files are not stored
+                    uploaded_file.seek(0)
+                    opening = uploaded_file.read(4096).decode('utf-8', errors='ignore')
+                    save_result("File", confidence, metrics, timings, opening, store_content=False)
+            elif getattr(st.session_state.results.get("Documents"), 'upload', None) == upload_key(uploaded_file):
+                render_document_results(st.session_state.results["Documents"])
+            display_verdict("File")
     
     with tab4:
         crawler_url = st.text_input("Enter the website URL to crawl")
@@ -529,20 +701,13 @@ def main():
             if not re.match(r'https?://', crawler_url):
                 st.error("Please enter a valid URL (starting with http:// or https://)")
             else:
-                display_loading()
-                # Simulate web crawling
-                simulated_content = f"""
-                Crawled website: {crawler_url}
-                Depth: {crawler_depth}
-                Pages analyzed: {crawler_pages}
-                
-                Sample content found:
-                Lorem ipsum dolor sit amet, consectetur adipiscing elit.
-                Sed do eiusmod tempor incididunt ut labore et dolore magna aliqua.
-                Ut enim ad minim veniam, quis nostrud exercitation ullamco laboris.
-                """
-                confidence, metrics = analyze_content(simulated_content)
-                display_verdict("Web Crawler", confidence, metrics)
+                display_crawl_results(crawler_url, int(crawler_depth), int(crawler_pages))
+        elif "Web Crawler" in st.session_state.results:
+            render_crawled_pages(st.session_state.results["Web Crawler"])
+        display_verdict("Web Crawler")
+    
+    if profiling_requested():
+        render_performance_panel()
     
     # Footer
     st.markdown("---")
@@ -0,0 +1,171 @@
+"""Latency, throughput and peak memory of the analysis hot path.
+
+Run from the repository root:
+
+    python -m benchmarks.analysis [--sizes 100B,1KB,...] [--output FILE] [--baseline FILE]
+
+Articles from 100 B to 10 MB are generated from the indicator vocabularies
+with a fixed seed, and the example CSV articles are measured as their own
+set. Each set goes through the scalar path (analyze_content), the batch path
+(analyze_batch) and the streaming path (analyze_file over an in-memory
+file). Peak memory is traced on a separate call, so tracing doesn't slow the
+timed runs.
+
+With --output, results are written as JSON. With --baseline, docs/s is
+compared against an earlier JSON run and the exit status is 1 if any
+measurement is slower by more than --tolerance.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+
+from tests.generators import article, csv_articles
+from truthguard.analysis import SCORING_RULES_VERSION, analyze_content
+from truthguard.batch import analyze_batch
+from truthguard.streaming import analyze_file
+
+DEFAULT_SIZES = '100B,1KB,10KB,100KB,1MB,10MB'
+DEFAULT_TOLERANCE = 0.2
+
+# Bytes of text timed per measurement, within the run limits below
+BUDGET_BYTES = 8 << 20
+MIN_RUNS = 3
+MAX_RUNS = 200
+
+# A batch call scores up to this many documents, as a corpus export would have, and no more
+# text than one large article
+BATCH_DOCUMENTS = 10000
+BATCH_BYTES = 1 << 20
+
+UNITS = {'B': 1, 'KB': 1 << 10, 'MB': 1 << 20}
+
+def parse_size(text):
+    """Bytes in a size such as 100B, 10KB or 1MB"""
+    number = text.rstrip('KMB')
+    unit = text[len(number):] or 'B'
+    if not number.isdigit() or unit not in UNITS:
+        raise argparse.ArgumentTypeError(f"Invalid size: {text}")
+    return int(number) * UNITS[unit]
+
+def percentile(samples, fraction):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+def peak_memory(run):
+    tracemalloc.start()
+    try:
+        run()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def scalar(texts):
+    for text in texts:
+        analyze_content(text)
+
+def batch(texts):
+    analyze_batch(pd.Series(texts))
+
+def streaming(texts):
+    for data in texts:
+        analyze_file(io.BytesIO(data))
+
+def measure(path, label, texts):
+    """Time calls of path over texts; a batch call scores several texts at once"""
+    run = {'scalar': scalar, 'batch': batch, 'streaming': streaming}[path]
+    if path == 'streaming':
+        texts = [text.encode('utf-8') for text in texts]
+    average_bytes = sum(map(len, texts)) / len(texts)
+    per_call = max(1, min(BATCH_DOCUMENTS, int(BATCH_BYTES / average_bytes))) if path == 'batch' else 1
+    runs = max(MIN_RUNS, min(MAX_RUNS, int(BUDGET_BYTES / (average_bytes * per_call))))
+    calls = [[texts[(run_index * per_call + i) % len(texts)] for i in range(per_call)] for run_index in range(runs)]
+    
+    run(calls[0])
+    peak = peak_memory(lambda: run(calls[0]))
+    timings = []
+    for call in calls:
+        start = time.perf_counter()
+        run(call)
+        timings.append(time.perf_counter() - start)
+    
+    total = sum(timings)
+    return {
+        'path': path,
+        'size': label,
+        'bytes': round(average_bytes),
+        'runs': runs,
+        'documents_per_call': per_call,
+        'p50_ms': percentile(timings, 0.5) * 1000,
+        'p90_ms': percentile(timings, 0.9) * 1000,
+        'p99_ms': percentile(timings, 0.99) * 1000,
+        'docs_per_s': runs * per_call / total,
+        'mb_per_s': runs * per_call * average_bytes / total / (1 << 20),
+        'peak_mb': peak / (1 << 20),
+    }
+
+def regressions(results, baseline, tolerance):
+    """(key, baseline docs/s, current docs/s) for every measurement slower than the tolerance allows"""
+    previous = {(row['path'], row['size']): row['docs_per_s'] for row in baseline['results']}
+    slower = []
+    for row in results:
+        key = (row['path'], row['size'])
+        if key in previous and row['docs_per_s'] < previous[key] * (1 - tolerance):
+            slower.append((key, previous[key], row['docs_per_s']))
+    return slower
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the analysis hot path")
+    parser.add_argument('--sizes', default=DEFAULT_SIZES, help=f"comma-separated article sizes (default: {DEFAULT_SIZES})")
+    parser.add_argument('--paths', default='scalar,batch,streaming', help="comma-separated paths to measure")
+    parser.add_argument('--no-csv', action='store_true', help="skip the example CSV articles")
+    parser.add_argument('--output', help="write the results to this JSON file")
+    parser.add_argument('--baseline', help="JSON results of an earlier run to compare against")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help=f"allowed fractional drop in docs/s (default: {DEFAULT_TOLERANCE})")
+    args = parser.parse_args(argv)
+    
+    rng = random.Random(1)
+    sets = [(size, [article(rng, parse_size(size)) for _ in range(3)]) for size in args.sizes.split(',')]
+    if not args.no_csv:
+        sets.append(('csv', csv_articles()))
+    
+    results = []
+    print(f"{'path':<10} {'size':>6} {'runs':>5} {'p50 ms':>10} {'p99 ms':>10} {'docs/s':>12} {'MB/s':>8} {'peak MB':>8}")
+    for label, texts in sets:
+        for path in args.paths.split(','):
+            row = measure(path, label, texts)
+            results.append(row)
+            print(f"{path:<10} {label:>6} {row['runs']:>5} {row['p50_ms']:>10.3f} {row['p99_ms']:>10.3f} "
+                  f"{row['docs_per_s']:>12,.1f} {row['mb_per_s']:>8.1f} {row['peak_mb']:>8.2f}", flush=True)
+    
+    report = {
+        'rules_version': SCORING_RULES_VERSION,
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    
+    if args.baseline:
+        with open(args.baseline) as f:
+            slower = regressions(results, json.load(f), args.tolerance)
+        for (path, size), before, after in slower:
+            print(f"Regression: {path} {size} {before:,.1f} -> {after:,.1f} docs/s ({after / before - 1:+.0%})")
+        if slower:
+            return 1
+        print(f"No regressions beyond {args.tolerance:.0%}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
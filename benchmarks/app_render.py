@@ -0,0 +1,88 @@
+"""Time to first paint and rerun cost of the Streamlit app.
+
+Run from the repository root:
+
+    python -m benchmarks.app_render
+
+The app runs under Streamlit's AppTest in a fresh process. Streamlit itself
+is imported before timing starts, as a running server already has it. The
+first paint covers importing the app's modules and drawing the page, as for
+the first visitor after a server start; a new session's first paint is the
+same once those modules are loaded. The other measurements are reruns of
+one session: an idle rerun, analyzing an article in the Text tab (a new one
+each time, so the result cache misses), and clicking a feedback button on
+the verdict. The runs share a temporary copy of database/, so the tracked
+databases are left unchanged.
+"""
+import glob
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RUNS = 5
+ARTICLE = ("Officials confirmed on Monday that the city budget will fund new schools, "
+           "according to a report published by the university's research team. ") * 10
+
+def measure_once():
+    """Timings in seconds of one fresh app session"""
+    from streamlit.testing.v1 import AppTest
+    
+    timings = {}
+    at = AppTest.from_file('app.py', default_timeout=120)
+    start = time.perf_counter()
+    at.run()
+    timings['first paint'] = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    at.run()
+    timings['idle rerun'] = time.perf_counter() - start
+    
+    at.text_area[0].input(f"{ARTICLE} Run {os.getpid()}.")
+    start = time.perf_counter()
+    at.button(key='analyze_text_btn').click().run()
+    timings['analyze'] = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    next(button for button in at.button if button.label == 'Yes').click().run()
+    timings['feedback click'] = time.perf_counter() - start
+    
+    verdict_shown = any('Confidence' in element.value for element in at.markdown)
+    timings['verdict kept after click'] = verdict_shown
+    assert not at.exception, at.exception
+    
+    start = time.perf_counter()
+    AppTest.from_file('app.py', default_timeout=120).run()
+    timings['new session first paint'] = time.perf_counter() - start
+    return timings
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == '--child':
+        import streamlit  # noqa: F401
+        print(json.dumps(measure_once()))
+        return
+    
+    # The feedback click writes to the database, so the app works on a temporary copy of database/
+    with tempfile.TemporaryDirectory() as database_dir:
+        for path in glob.glob(os.path.join('database', '*.db')):
+            shutil.copy(path, database_dir)
+        env = dict(os.environ, TRUTHGUARD_DATABASE_DIR=database_dir)
+        runs = []
+        for _ in range(RUNS):
+            output = subprocess.run([sys.executable, '-m', 'benchmarks.app_render', '--child'],
+                                    capture_output=True, text=True, check=True, env=env).stdout
+            runs.append(json.loads(output.splitlines()[-1]))
+    
+    print(f"Median of {RUNS} fresh sessions:")
+    for name in runs[0]:
+        if name == 'verdict kept after click':
+            print(f"  {name:<26} {all(run[name] for run in runs)}")
+        else:
+            print(f"  {name:<26} {statistics.median(run[name] for run in runs) * 1000:8.1f} ms")
+
+if __name__ == '__main__':
+    main()
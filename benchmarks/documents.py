@@ -0,0 +1,73 @@
+"""Throughput and peak memory of PDF and DOCX analysis.
+
+Run from the repository root:
+
+    python -m benchmarks.documents [pages]
+
+A PDF and a DOCX of generated article text are built in memory, one page
+of about 3 KB each. Each is analyzed page by page through
+AnalysisCache.analyze_document, then again to time a resubmission served
+from the cache. For comparison, the whole text is extracted into one
+string and scored with analyze_content, which is also checked to give the
+same result. Peak memory is traced on separate runs.
+"""
+import io
+import random
+import sys
+import time
+import tracemalloc
+
+from tests.generators import article, make_docx, make_pdf
+from truthguard.analysis import analyze_content
+from truthguard.cache import AnalysisCache
+from truthguard.document_text import PAGE_SEPARATOR, iter_document_pages
+
+DEFAULT_PAGES = 500
+PAGE_BYTES = 3000
+
+def peak_memory(run):
+    tracemalloc.start()
+    try:
+        run()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def whole_text(data, kind):
+    """Extract every page into one string, then score it in memory"""
+    return analyze_content(PAGE_SEPARATOR.join(iter_document_pages(io.BytesIO(data), kind)))
+
+def main():
+    page_count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PAGES
+    rng = random.Random(1)
+    pages = [article(rng, PAGE_BYTES) for _ in range(page_count)]
+    documents = {'pdf': make_pdf(pages), 'docx': make_docx(pages)}
+    
+    print(f"{page_count} pages of ~{PAGE_BYTES} bytes of text each")
+    print(f"{'format':<6} {'file MB':>8} {'pages/s':>9} {'first run':>10} {'resubmit':>10} "
+          f"{'peak MB':>8} {'whole text':>11} {'peak MB':>8}")
+    for kind, data in documents.items():
+        start = time.perf_counter()
+        confidence, metrics = AnalysisCache().analyze_document(io.BytesIO(data), kind)
+        first_run = time.perf_counter() - start
+        
+        cache = AnalysisCache()
+        cache.analyze_document(io.BytesIO(data), kind)
+        start = time.perf_counter()
+        cache.analyze_document(io.BytesIO(data), kind)
+        resubmit = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        expected = whole_text(data, kind)
+        whole = time.perf_counter() - start
+        if (confidence, {key: value for key, value in metrics.items() if key != 'pages'}) != expected:
+            print(f"{kind}: page-by-page result differs from the whole-text result")
+        
+        streamed_peak = peak_memory(lambda: AnalysisCache().analyze_document(io.BytesIO(data), kind))
+        whole_peak = peak_memory(lambda: whole_text(data, kind))
+        print(f"{kind:<6} {len(data) / (1 << 20):>8.2f} {metrics['pages'] / first_run:>9.1f} {first_run:>9.2f}s "
+              f"{resubmit * 1000:>8.2f}ms {streamed_peak / (1 << 20):>8.2f} {whole:>10.2f}s {whole_peak / (1 << 20):>8.2f}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,71 @@
+"""Throughput and accuracy of the heuristic and TF-IDF scoring engines.
+
+Run from the repository root:
+
+    python -m benchmarks.engines [documents]
+
+Accuracy is measured leave-one-out over the labelled training corpus: the
+TF-IDF model is retrained without each article before scoring it, and the
+heuristic counts an article as true at a confidence of 50 or more.
+Throughput is measured on generated articles of about 300 words.
+"""
+import random
+import sys
+import time
+
+import pandas as pd
+
+from truthguard.analysis import FAKE_NEWS_INDICATORS, TRUTH_INDICATORS, analyze_content
+from truthguard.batch import analyze_batch
+from truthguard.model import TfidfModel, training_corpus
+
+DEFAULT_DOCUMENTS = 5000
+
+FILLER = (
+    'the city council said on monday that the new budget would fund schools roads and '
+    'public health programs while officials expect the plan to pass after a long debate'
+).split()
+
+def article(rng, words=300):
+    parts = []
+    while len(parts) < words:
+        if rng.random() < 0.03:
+            parts.extend(rng.choice(FAKE_NEWS_INDICATORS + TRUTH_INDICATORS).split())
+        else:
+            parts.append(rng.choice(FILLER))
+    return ' '.join(parts)
+
+def throughput(label, score, texts):
+    start = time.perf_counter()
+    score(texts)
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<28} {len(texts) / elapsed:10,.0f} docs/s")
+
+def leave_one_out(texts, labels):
+    correct = 0
+    for held_out in range(len(texts)):
+        train_texts = texts[:held_out] + texts[held_out + 1:]
+        train_labels = labels[:held_out] + labels[held_out + 1:]
+        model = TfidfModel.train(train_texts, train_labels)
+        correct += (model.confidence(texts[held_out]) >= 50) == bool(labels[held_out])
+    return correct / len(texts)
+
+def main():
+    documents = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_DOCUMENTS
+    texts, labels = training_corpus()
+    model = TfidfModel.train(texts, labels)
+    
+    print(f"Throughput over {documents:,} generated articles:")
+    rng = random.Random(1)
+    corpus = [article(rng) for _ in range(documents)]
+    throughput("heuristic, one at a time", lambda batch: [analyze_content(text) for text in batch], corpus)
+    throughput("heuristic, batched", lambda batch: analyze_batch(pd.Series(batch)), corpus)
+    throughput("TF-IDF, batched", model.probabilities, corpus)
+    
+    print(f"Accuracy over {len(texts)} labelled articles ({sum(labels)} true):")
+    heuristic = sum((analyze_content(text)[0] >= 50) == bool(label) for text, label in zip(texts, labels))
+    print(f"  {'heuristic':<28} {heuristic / len(texts):10.1%}")
+    print(f"  {'TF-IDF (leave-one-out)':<28} {leave_one_out(texts, labels):10.1%}")
+
+if __name__ == '__main__':
+    main()
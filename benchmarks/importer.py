@@ -0,0 +1,158 @@
+"""Bulk import throughput and full-text query latency against LIKE scans.
+
+Run from the repository root:
+
+    python -m benchmarks.importer [--rows N] [--queries N]
+
+A CSV of generated articles is written to a temporary directory. Words are
+drawn from a Zipf-distributed vocabulary of made-up words, as word
+frequencies in real news are, with an indicator phrase now and then. A
+sample of the rows is inserted one at a time with a commit each, as the
+import-*.js scripts do, and the whole file is then loaded with
+truthguard.importer.
+
+Queries are timed both as the LIKE scans server.js runs and through the
+FTS5 index: looking up an article from its first 500 characters (present
+and absent), finding 20 articles that contain a phrase, and counting them.
+"""
+import argparse
+import csv
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+from truthguard.analysis import FAKE_NEWS_INDICATORS, TRUTH_INDICATORS
+from truthguard.importer import SCHEMA, fts_phrase, fts_table, import_files, insert_statement
+
+DEFAULT_ROWS = 100_000
+DEFAULT_QUERIES = 50
+ROW_BY_ROW_SAMPLE = 2_000
+VOCABULARY = 30_000
+ARTICLE_WORDS = 250
+
+# The leading characters server.js matches an article by
+LOOKUP_CHARS = 500
+
+def vocabulary(rng, size=VOCABULARY):
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    words = set()
+    while len(words) < size:
+        words.add(''.join(rng.choice(letters) for _ in range(rng.randint(2, 10))))
+    return sorted(words)
+
+def article(rng, words, cum_weights, phrases, length=ARTICLE_WORDS):
+    """Sentences of Zipf-distributed words, with an indicator phrase in about one sentence in eight"""
+    tokens = rng.choices(words, cum_weights=cum_weights, k=length)
+    sentences = []
+    for i in range(0, length, 12):
+        sentence = tokens[i:i + 12]
+        if rng.random() < 0.125:
+            sentence.insert(rng.randrange(len(sentence) + 1), rng.choice(phrases))
+        sentences.append(' '.join(sentence).capitalize() + '.')
+    return ' '.join(sentences)
+
+def write_corpus(path, rows, seed=1):
+    rng = random.Random(seed)
+    words = vocabulary(rng)
+    total, cum_weights = 0.0, []
+    for rank in range(1, len(words) + 1):
+        total += 1 / rank ** 1.07
+        cum_weights.append(total)
+    phrases = FAKE_NEWS_INDICATORS + TRUTH_INDICATORS
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['title', 'content', 'source'])
+        for i in range(rows):
+            title = article(rng, words, cum_weights, phrases, 8).rstrip('.')
+            writer.writerow([title, article(rng, words, cum_weights, phrases), f'site{i % 500}.example'])
+
+def row_by_row(db_path, csv_path, rows):
+    """Rows/s inserting the first rows one statement and one commit at a time, with SQLite's default settings"""
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    conn.executescript(SCHEMA)
+    statement = insert_statement('known_true_news', ['title', 'content', 'source'])
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        start = time.perf_counter()
+        for _, row in zip(range(rows), reader):
+            conn.execute(statement, (row['title'], row['content'], row['source']))
+        seconds = time.perf_counter() - start
+    conn.close()
+    return rows / seconds
+
+def percentile(samples, fraction):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+def timed(conn, query, parameters_list):
+    timings = []
+    for parameters in parameters_list:
+        start = time.perf_counter()
+        conn.execute(query, parameters).fetchall()
+        timings.append(time.perf_counter() - start)
+    return percentile(timings, 0.5) * 1000, percentile(timings, 0.99) * 1000
+
+def query_cases(conn, rng, queries):
+    """(name, LIKE query and parameters, FTS query and parameters) for each kind of query"""
+    table, fts = 'known_true_news', fts_table('known_true_news')
+    max_id = conn.execute(f'SELECT MAX(id) FROM {table}').fetchone()[0]
+    samples = [
+        conn.execute(f'SELECT content FROM {table} WHERE id = ?', (rng.randint(1, max_id),)).fetchone()[0][:LOOKUP_CHARS]
+        for _ in range(queries)
+    ]
+    # The same samples with one word changed, so no article contains them
+    missing = [sample.replace(' ', ' zzzz ', 1) for sample in samples]
+    phrases = [rng.choice(FAKE_NEWS_INDICATORS + TRUTH_INDICATORS) for _ in range(queries)]
+    
+    like_lookup = f"SELECT id FROM {table} WHERE content LIKE ? LIMIT 1"
+    # The index narrows the lookup to articles holding the first words in order; instr checks the rest
+    fts_lookup = (f"SELECT {table}.id FROM {fts} JOIN {table} ON {table}.id = {fts}.rowid "
+                  f"WHERE {fts} MATCH ? AND instr({table}.content, ?) LIMIT 1")
+    
+    def lookup_parameters(texts):
+        return [(fts_phrase(' '.join(text.split()[:8])), text) for text in texts]
+    
+    return [
+        ('Article lookup, present', (like_lookup, [('%' + s + '%',) for s in samples]),
+         (fts_lookup, lookup_parameters(samples))),
+        ('Article lookup, absent', (like_lookup, [('%' + s + '%',) for s in missing]),
+         (fts_lookup, lookup_parameters(missing))),
+        ('First 20 with a phrase', (f"SELECT id FROM {table} WHERE content LIKE ? LIMIT 20", [('%' + p + '%',) for p in phrases]),
+         (f"SELECT rowid FROM {fts} WHERE {fts} MATCH ? LIMIT 20", [(f'content:{fts_phrase(p)}',) for p in phrases])),
+        ('Count with a phrase', (f"SELECT COUNT(*) FROM {table} WHERE content LIKE ?", [('%' + p + '%',) for p in phrases]),
+         (f"SELECT COUNT(*) FROM {fts} WHERE {fts} MATCH ?", [(f'content:{fts_phrase(p)}',) for p in phrases])),
+    ]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the CSV importer and full-text queries")
+    parser.add_argument('--rows', type=int, default=DEFAULT_ROWS, help=f"articles to import (default: {DEFAULT_ROWS:,})")
+    parser.add_argument('--queries', type=int, default=DEFAULT_QUERIES, help=f"queries of each kind (default: {DEFAULT_QUERIES})")
+    args = parser.parse_args(argv)
+    
+    with tempfile.TemporaryDirectory() as directory:
+        csv_path = os.path.join(directory, 'true_news.csv')
+        write_corpus(csv_path, args.rows)
+        print(f"Corpus: {args.rows:,} articles, {os.path.getsize(csv_path) / (1 << 20):.1f} MB")
+        
+        sample = min(ROW_BY_ROW_SAMPLE, args.rows)
+        print(f"Row by row, one commit each: {row_by_row(os.path.join(directory, 'rows.db'), csv_path, sample):,.0f} rows/s")
+        
+        db_path = os.path.join(directory, 'import.db')
+        start = time.perf_counter()
+        import_files(db_path, [(csv_path, 'known_true_news')])
+        print(f"Total with indexes: {args.rows / (time.perf_counter() - start):,.0f} rows/s")
+        
+        conn = sqlite3.connect(db_path)
+        print(f"\n{'query':<26} {'LIKE p50':>10} {'LIKE p99':>10} {'FTS p50':>10} {'FTS p99':>10}")
+        for name, (like_query, like_parameters), (fts_query, fts_parameters) in query_cases(conn, random.Random(2), args.queries):
+            like_p50, like_p99 = timed(conn, like_query, like_parameters)
+            fts_p50, fts_p99 = timed(conn, fts_query, fts_parameters)
+            print(f"{name:<26} {like_p50:>8.2f}ms {like_p99:>8.2f}ms {fts_p50:>8.2f}ms {fts_p99:>8.2f}ms", flush=True)
+        conn.close()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""Query latency of the near-duplicate index at 10k, 100k and 1M articles.
+
+Run from the repository root:
+
+    python -m benchmarks.near_duplicates [sizes...]
+
+Filler items get random signatures, which is what MinHash produces for
+unrelated articles, so the index can be grown to a million items without
+hashing a million texts. A set of generated articles is indexed alongside
+them and queried with lightly edited copies (near duplicates) and with
+unrelated text (misses). A linear scan of every signature is timed for
+comparison.
+"""
+import random
+import sys
+import time
+
+import numpy as np
+
+from tests.generators import edit, topic_article
+from truthguard.duplicates import NUM_PERM, NearDuplicateIndex, minhash
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+PLANTED = 200
+QUERIES = 200
+
+def percentile(samples, fraction):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+def time_queries(index, texts):
+    timings, hits = [], 0
+    for text in texts:
+        start = time.perf_counter()
+        matches = index.query(minhash(text))
+        timings.append(time.perf_counter() - start)
+        hits += bool(matches)
+    return timings, hits
+
+def linear_scan(index, texts):
+    timings = []
+    for text in texts:
+        start = time.perf_counter()
+        signature = minhash(text)
+        similarity = (index.signatures == signature).mean(axis=1)
+        similarity.argmax()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+def run(size, rng):
+    planted = [topic_article(rng) for _ in range(PLANTED)]
+    index = NearDuplicateIndex()
+    
+    start = time.perf_counter()
+    filler = np.random.default_rng(size).integers(0, 2**32, size=(size - PLANTED, NUM_PERM), dtype=np.uint32)
+    index.add(filler, np.zeros(len(filler)), np.arange(len(filler)))
+    index.add(np.stack([minhash(text) for text in planted]), np.ones(PLANTED), np.arange(PLANTED))
+    build = time.perf_counter() - start
+    
+    near = [edit(rng, rng.choice(planted)) for _ in range(QUERIES)]
+    misses = [topic_article(rng) for _ in range(QUERIES)]
+    near_timings, near_hits = time_queries(index, near)
+    miss_timings, miss_hits = time_queries(index, misses)
+    scan_timings = linear_scan(index, misses[:20])
+    
+    print(f"{size:>9,} articles  build {build:6.2f} s  "
+          f"near dup p50 {percentile(near_timings, 0.5) * 1000:.2f} ms p99 {percentile(near_timings, 0.99) * 1000:.2f} ms "
+          f"({near_hits}/{QUERIES} found)  "
+          f"miss p50 {percentile(miss_timings, 0.5) * 1000:.2f} ms ({miss_hits} false hits)  "
+          f"linear scan p50 {percentile(scan_timings, 0.5) * 1000:.2f} ms")
+
+def main():
+    sizes = [int(size) for size in sys.argv[1:]] or DEFAULT_SIZES
+    rng = random.Random(1)
+    for size in sizes:
+        run(size, rng)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Start-up time of the score command and per-request cost of the HTTP endpoint.
+
+Run from the repository root:
+
+    python -m benchmarks.service [requests]
+
+Cold start is the median wall time of a fresh process scoring one short
+article from stdin, next to a bare interpreter and to importing the
+Streamlit app's dependencies. Request overhead is the time per POST /score
+over one kept-alive connection, minus the time to score the same article
+in process.
+"""
+import http.client
+import json
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+from truthguard.analysis import analyze_content
+from truthguard.service import make_server
+
+DEFAULT_REQUESTS = 2000
+RUNS = 15
+ARTICLE = ("Officials confirmed on Monday that the city budget will fund new schools, "
+           "according to a report published by the university's research team.")
+
+def cold_start(args, stdin=b''):
+    timings = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *args], input=stdin, stdout=subprocess.DEVNULL, check=True)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_REQUESTS
+    
+    print("Cold start (median of fresh processes):")
+    for label, args, stdin in (
+        ("bare interpreter", ['-c', 'pass'], b''),
+        ("score - (one article)", ['-m', 'truthguard', 'score', '-'], ARTICLE.encode()),
+        ("import streamlit, pandas", ['-c', 'import streamlit, pandas'], b''),
+    ):
+        print(f"  {label:<28} {cold_start(args, stdin) * 1000:8.1f} ms")
+    
+    start = time.perf_counter()
+    for _ in range(requests):
+        analyze_content(ARTICLE)
+    in_process = (time.perf_counter() - start) / requests
+    
+    server = make_server(port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    conn = http.client.HTTPConnection(*server.server_address)
+    body = json.dumps({'content': ARTICLE}).encode()
+    headers = {'Content-Type': 'application/json'}
+    start = time.perf_counter()
+    for _ in range(requests):
+        conn.request('POST', '/score', body, headers)
+        conn.getresponse().read()
+    per_request = (time.perf_counter() - start) / requests
+    conn.close()
+    server.shutdown()
+    
+    print(f"HTTP over {requests:,} requests on one connection:")
+    print(f"  {'scoring in process':<28} {in_process * 1000:8.3f} ms")
+    print(f"  {'POST /score':<28} {per_request * 1000:8.3f} ms  ({1 / per_request:,.0f} requests/s)")
+    print(f"  {'overhead per request':<28} {(per_request - in_process) * 1000:8.3f} ms")
+
+if __name__ == '__main__':
+    main()
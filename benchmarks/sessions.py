@@ -0,0 +1,101 @@
+"""Memory held per Streamlit session under a simulated load.
+
+Run from the repository root:
+
+    python -m benchmarks.sessions [sessions]
+
+Each simulated session analyzes an article in the Text, URL and File tabs
+through the same cache, credibility and known-match steps as the app, and
+keeps its results as the app's session state does. The state of every
+session is held at once, as on a server with that many open sessions, and
+traced with tracemalloc in two layouts: metrics as a dict of formatted
+strings with dict results, as the app kept them before, and the compact
+Metrics and AnalysisResult records it keeps now. Article text is allocated
+before tracing starts, since the text box holds it in either layout.
+"""
+import gc
+import io
+import random
+import sys
+import tracemalloc
+
+from tests.generators import article
+from truthguard.cache import AnalysisCache
+from truthguard.credibility import CredibilityIndex
+from truthguard.duplicates import weigh_match
+from truthguard.session import AnalysisResult
+from truthguard.timing import StageTimer
+
+DEFAULT_SESSIONS = 500
+ARTICLE_BYTES = 3000
+TABS = ('Text', 'URL', 'File')
+
+def session_articles(rng, sessions):
+    """One article per tab for each session, each citing a known domain"""
+    return [[article(rng, ARTICLE_BYTES) + f" https://example.org/{session}/{tab}" for tab in TABS]
+            for session in range(sessions)]
+
+def analyze_session(rng, session, contents):
+    """(tab, confidence, metrics, timings, content) for each tab, analyzed as the app does"""
+    # The process-wide result cache is left out, so only what the session holds is counted
+    cache = AnalysisCache(max_entries=0)
+    credibility = CredibilityIndex({'example.org': 0.8, 'news.example.com': 0.4})
+    results = []
+    for tab, content in zip(TABS, contents):
+        timer = StageTimer()
+        if tab == 'File':
+            confidence, metrics = cache.analyze_file(io.BytesIO(content.encode('utf-8')), timer)
+        else:
+            confidence, metrics = cache.analyze(content, timer)
+            with timer.stage('credibility'):
+                confidence, metrics = credibility.adjust(confidence, metrics, content)
+            with timer.stage('known match'):
+                matches = [{'similarity': rng.random(), 'is_true': session % 2, 'title': f"Article {session}"}]
+                confidence, metrics = weigh_match(confidence, metrics, matches)
+        timer.timings['render'] = rng.random() / 1000
+        results.append((tab, confidence, metrics, timer.timings, content))
+    return results
+
+def formatted_state(results):
+    """Session state as the app kept it before: dicts, with the metrics formatted"""
+    state = {'text_analysis_counter': 1, 'results': {}}
+    for tab, confidence, metrics, timings, content in results:
+        state['results'][tab] = dict(verdict='True', confidence=confidence, metrics=dict(metrics),
+                                     timings=dict(timings), content=content, store_content=True, observed=True)
+    return state
+
+def compact_state(results):
+    """Session state as the app keeps it now: AnalysisResult records holding raw Metrics"""
+    state = {'results': {}}
+    for tab, confidence, metrics, timings, content in results:
+        result = AnalysisResult('True', confidence, metrics, timings, content)
+        result.observed = True
+        state['results'][tab] = result
+    return state
+
+def traced_bytes(build, articles):
+    """Bytes still allocated once every session has analyzed its articles and kept the results"""
+    rng = random.Random(2)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        states = [build(analyze_session(rng, session, contents)) for session, contents in enumerate(articles)]
+        gc.collect()
+        return tracemalloc.get_traced_memory()[0] - before, len(states)
+    finally:
+        tracemalloc.stop()
+
+def main():
+    session_count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SESSIONS
+    articles = session_articles(random.Random(1), session_count)
+    
+    print(f"{session_count} sessions, each with a {ARTICLE_BYTES} byte article analyzed in each of {', '.join(TABS)}")
+    print(f"{'layout':<18} {'total KB':>10} {'per session':>12}")
+    for name, build in (('formatted dicts', formatted_state), ('compact records', compact_state)):
+        total, _ = traced_bytes(build, articles)
+        print(f"{name:<18} {total / 1024:>10.1f} {total / session_count:>10.0f} B")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
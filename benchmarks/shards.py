@@ -0,0 +1,102 @@
+"""Latency of lookups fanned out across several database shards.
+
+Run from the repository root:
+
+    python -m benchmarks.shards [articles per shard] [domains per shard]
+
+Three temporary databases are filled with generated articles and scored
+domains. Known-article lookups are timed through ShardedDatabase, which
+queries the shards concurrently, against calling the shards one after
+another, and with the prepared statement cache switched off. Per-shard
+latencies come from ShardedDatabase.stats(). Credibility lookups use the
+index merged from every shard, timed with the load that builds it.
+"""
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+from tests.generators import edit, topic_article
+from truthguard.duplicates import minhash
+from truthguard.importer import SCHEMA
+from truthguard.shards import ShardedDatabase
+
+DEFAULT_ARTICLES = 5_000
+DEFAULT_DOMAINS = 100_000
+SHARDS = ('news_detector', 'example_news', 'custom_news_detector')
+QUERIES = 300
+
+def build_shard(path, rng, articles, domains):
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    for table in ('known_true_news', 'known_false_news'):
+        conn.executemany(f'INSERT INTO {table} (title, content, source) VALUES (?, ?, ?)',
+                         ((f'Article {i}', topic_article(rng), 'example.com') for i in range(articles // 2)))
+    conn.executemany('INSERT INTO credibility_sources (domain, credibility_score) VALUES (?, ?)',
+                     ((f'site{i}.example', rng.random()) for i in range(domains)))
+    conn.commit()
+    conn.close()
+
+def median_ms(run, queries):
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        run(query)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+def one_after_another(db):
+    """The known-article lookup run on each shard in turn in the calling thread"""
+    return lambda content: [shard.match(minhash(content), 3) for shard in db.shards]
+
+def main():
+    articles = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ARTICLES
+    domains = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_DOMAINS
+    rng = random.Random(1)
+    
+    with tempfile.TemporaryDirectory() as directory:
+        paths = [os.path.join(directory, f'{name}.db') for name in SHARDS]
+        for path in paths:
+            build_shard(path, rng, articles, domains)
+        print(f"{len(paths)} shards of {articles:,} articles and {domains:,} domains")
+        
+        conn = sqlite3.connect(paths[0])
+        contents = [content for (content,) in conn.execute('SELECT content FROM known_true_news LIMIT ?', (QUERIES,))]
+        conn.close()
+        hosts = [[f'www.site{rng.randrange(domains * 2)}.example', 'news.example.org'] for _ in range(QUERIES)]
+        matches = [edit(rng, content) for content in contents]
+        
+        results = {}
+        for cached in (True, False):
+            db = ShardedDatabase(paths)
+            if not cached:
+                for shard in db.shards:
+                    shard.pool.cached_statements = 0
+            for shard in db.shards:
+                shard.known_articles.sync()
+            results['concurrent', cached] = median_ms(db.match, matches)
+            results['one after another', cached] = median_ms(one_after_another(db), matches)
+            if cached:
+                credibility_ms = median_ms(db.credibility_scores, hosts)
+                start = time.perf_counter()
+                db.credibility.refresh()
+                load_seconds = time.perf_counter() - start
+                shard_rows = db.stats()
+            db.close()
+        
+        print(f"\n{'shards':<18} {'known match p50 ms':>18} {'no stmt cache':>14}")
+        for mode in ('concurrent', 'one after another'):
+            print(f"{mode:<18} {results[mode, True]:>18.3f} {results[mode, False]:>14.3f}")
+        print(f"\ncredibility p50 {credibility_ms:.4f} ms from the merged index, "
+              f"loaded from {len(paths)} shards in {load_seconds:.2f} s")
+        
+        print(f"\n{'shard':<22} {'lookup':<12} {'count':>6} {'p50 ms':>8} {'p99 ms':>8}")
+        for row in shard_rows:
+            print(f"{row['shard']:<22} {row['lookup']:<12} {row['count']:>6} {row['p50_ms']:>8.3f} {row['p99_ms']:>8.3f}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
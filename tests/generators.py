@@ -0,0 +1,116 @@
+"""Generated articles and documents shared by the tests and the benchmarks.
+
+Every generator takes a random.Random, so a fixed seed gives the same text.
+"""
+import csv
+import io
+import os
+import zipfile
+
+from truthguard.analysis import (
+    FACTUAL_PHRASES,
+    FAKE_NEWS_INDICATORS,
+    NEGATIVE_WORDS,
+    POSITIVE_WORDS,
+    TRUTH_INDICATORS,
+    WEASEL_WORDS,
+)
+
+# Characters per line of text drawn on a generated PDF page
+LINE_CHARS = 90
+
+CSV_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'example-csv')
+
+FILLER = (
+    'the city council said on monday that the new budget would fund schools roads and '
+    'public health programs while officials expect the plan to pass after a long debate'
+).split()
+PHRASES = list(FAKE_NEWS_INDICATORS + TRUTH_INDICATORS + WEASEL_WORDS + FACTUAL_PHRASES + POSITIVE_WORDS + NEGATIVE_WORDS)
+
+# Topic words for articles that are compared with each other rather than scored
+WORDS = (
+    'government report city council budget health officials study research university '
+    'police weather election court school market energy climate water hospital vaccine '
+    'minister company workers prices river bridge museum festival season team coach '
+    'scientists data survey program agency policy federal local national annual'
+).split()
+
+def article(rng, size):
+    """About size bytes of sentences, with an indicator phrase among every 30 or so words"""
+    tokens = rng.choices(FILLER + PHRASES, weights=[30] * len(FILLER) + [1] * len(PHRASES), k=size // 5 + 16)
+    sentences = (' '.join(tokens[i:i + 12]).capitalize() + '.' for i in range(0, len(tokens), 12))
+    text = ' '.join(sentences)
+    return text[:text.rfind(' ', 0, size)] if len(text) > size else text
+
+def csv_articles(csv_dir=CSV_DIR):
+    """The content of every article in the example true and false news CSVs"""
+    texts = []
+    for filename in ('true_news.csv', 'false_news.csv'):
+        with open(os.path.join(csv_dir, filename), newline='', encoding='utf-8') as f:
+            texts.extend(row['content'] for row in csv.DictReader(f) if row.get('content'))
+    return texts
+
+def topic_article(rng, words=150):
+    """words topic words, as a near-duplicate index sees unrelated articles"""
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+def edit(rng, text, changes=5):
+    """text with changes of its words replaced, a near duplicate of it"""
+    words = text.split()
+    for _ in range(changes):
+        words[rng.randrange(len(words))] = rng.choice(WORDS)
+    return ' '.join(words)
+
+def make_pdf(pages):
+    """A PDF with each text in pages on its own page, as lines of Helvetica"""
+    objects = [b'<< /Type /Catalog /Pages 2 0 R >>', None, b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>']
+    page_ids = []
+    for text in pages:
+        lines = [text[i:i + LINE_CHARS] for i in range(0, len(text), LINE_CHARS)]
+        escaped = (line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)') for line in lines)
+        stream = ('BT /F1 9 Tf 11 TL 40 800 Td ' + ' '.join(f'({line}) Tj T*' for line in escaped) + ' ET').encode('latin-1')
+        objects.append(b'<< /Length %d >>\nstream\n%s\nendstream' % (len(stream), stream))
+        objects.append(b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] '
+                       b'/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>' % len(objects))
+        page_ids.append(len(objects))
+    kids = b' '.join(b'%d 0 R' % page_id for page_id in page_ids)
+    objects[1] = b'<< /Type /Pages /Kids [%s] /Count %d >>' % (kids, len(page_ids))
+    
+    out = io.BytesIO()
+    out.write(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(out.tell())
+        out.write(b'%d 0 obj\n%s\nendobj\n' % (number, body))
+    xref = out.tell()
+    out.write(b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1))
+    out.write(b''.join(b'%010d 00000 n \n' % offset for offset in offsets))
+    out.write(b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref))
+    return out.getvalue()
+
+def make_docx(pages):
+    """A DOCX with each text in pages as paragraphs, separated by page breaks"""
+    body = []
+    for number, text in enumerate(pages):
+        if number:
+            body.append('<w:p><w:r><w:br w:type="page"/></w:r></w:p>')
+        for sentence in text.split('. '):
+            body.append(f'<w:p><w:r><w:t xml:space="preserve">{sentence}</w:t></w:r></w:p>')
+    return docx_from_body(''.join(body))
+
+def docx_from_body(body):
+    """A DOCX whose document body is the given WordprocessingML"""
+    namespace = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+    document = f'<?xml version="1.0" encoding="UTF-8"?><w:document xmlns:w="{namespace}"><w:body>{body}</w:body></w:document>'
+    
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('[Content_Types].xml', (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/word/document.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/></Types>'
+        ))
+        archive.writestr('word/document.xml', document)
+    return out.getvalue()
@@ -0,0 +1,117 @@
+import json
+import random
+import re
+
+import pytest
+
+from tests.generators import PHRASES, article
+from truthguard.analysis import (
+    FACTUAL_PHRASES,
+    FAKE_NEWS_INDICATORS,
+    NEGATIVE_WORDS,
+    POSITIVE_WORDS,
+    TRUTH_INDICATORS,
+    WEASEL_WORDS,
+    IndicatorMatcher,
+    INDICATOR_MATCHER,
+    Metrics,
+    analyze_content,
+)
+
+LEXICONS = {
+    'fake': (FAKE_NEWS_INDICATORS, True),
+    'truth': (TRUTH_INDICATORS, True),
+    'weasel': (WEASEL_WORDS, True),
+    'factual': (FACTUAL_PHRASES, False),
+    'positive': (POSITIVE_WORDS, True),
+    'negative': (NEGATIVE_WORDS, True),
+}
+
+EDGE_CASES = [
+    '', 'research paper', 'research papers', 'the research paper research', 'according to the study',
+    'according to experts according to', 'accordingly to', 'found thatfound that', 'SHOCKING revelation',
+    "you won't believe", 'you won’t believe', 'cover-up cover up', 'peer-reviewed-peer-reviewed',
+    # Characters whose lowercase form or case folding differs from ASCII
+    'İnvestigation İ research', 'ſcam ſecret ſtudy', 'expoſed ſtatiſtics', 'dıd ıt', 'Kelvin hoax',
+    'RESEARCHİ', 'ß study STRASSE', 'ﬁndings suggest', 'Σ σ ς sad',
+]
+
+def findall_counts(text, lexicons=LEXICONS):
+    """Counts as the original per-phrase re.findall loop took them"""
+    lower_text = text.lower()
+    counts = {}
+    for name, (phrases, word_bounded) in lexicons.items():
+        counts[name] = 0
+        for phrase in phrases:
+            pattern = re.escape(phrase)
+            if word_bounded:
+                pattern = r'\b' + pattern + r'\b'
+            counts[name] += len(re.findall(pattern, lower_text, re.IGNORECASE))
+    return counts
+
+@pytest.mark.parametrize('text', EDGE_CASES)
+def test_matcher_counts_edge_cases_as_findall(text):
+    assert INDICATOR_MATCHER.count(text.lower()) == findall_counts(text)
+
+def test_matcher_counts_generated_articles_as_findall():
+    rng = random.Random(6)
+    for _ in range(200):
+        text = article(rng, rng.choice([100, 1000, 5000]))
+        assert INDICATOR_MATCHER.count(text.lower()) == findall_counts(text)
+
+def test_matcher_counts_adjacent_phrases_as_findall():
+    rng = random.Random(7)
+    for _ in range(200):
+        text = rng.choice(['', ' ', '-']).join(rng.choices(PHRASES + ['a', 'x'], k=20))
+        assert INDICATOR_MATCHER.count(text.lower()) == findall_counts(text)
+
+def test_overlapping_phrases_in_one_lexicon():
+    lexicons = {
+        'bounded': (('research', 'research paper', 'paper', 'paper trail'), True),
+        'unbounded': (('aa', 'aaa', 'ab'), False),
+    }
+    matcher = IndicatorMatcher(lexicons)
+    for text in ['research paper trail', 'researchpaper', 'aaaa aab', 'aaaaa', 'paper papers research-paper']:
+        assert matcher.count(text) == findall_counts(text, lexicons)
+    # Neither phrase overlaps itself: 'aa' is found twice and 'aaa' once, as findall reports them
+    assert matcher.count('aaaa') == {'bounded': 0, 'unbounded': 3}
+
+SAMPLE = ('BREAKING: a shocking hoax!! Research by the university found that, according to experts, '
+          'it is bad. https://x.org (Smith 2020)')
+
+def test_metrics_read_as_the_old_dict():
+    _, metrics = analyze_content(SAMPLE)
+    expected = {
+        'content_length': '21 words', 'fake_indicators': 2, 'truth_indicators': 3, 'sentiment': 'Negative',
+        'sources_count': 3, 'weasel_words': 0, 'factual_phrases': 2, 'all_caps': '7.9%',
+    }
+    assert metrics == expected
+    assert dict(metrics) == expected
+    assert list(metrics) == list(expected)
+    assert len(metrics) == len(expected)
+    assert 'known_match' not in metrics
+    with pytest.raises(KeyError):
+        metrics['known_match']
+
+def test_metrics_with_values():
+    _, metrics = analyze_content(SAMPLE)
+    matched = metrics.with_values(known_match=(0.9, 0, 'A hoax'), engine='Heuristic rules')
+    assert matched['known_match'] == '90% similar to known false news "A hoax"'
+    assert list(matched)[-2:] == ['engine', 'known_match']
+    assert len(matched) == len(metrics) + 2
+    # The original is left as it was, and later values replace earlier ones
+    assert 'known_match' not in metrics
+    assert matched.with_values(engine='Other')['engine'] == 'Other'
+    assert matched.with_values(engine='Other')['known_match'] == matched['known_match']
+    with pytest.raises(KeyError):
+        metrics.with_values(unknown=1)
+
+def test_metrics_raw_round_trip():
+    _, metrics = analyze_content(SAMPLE)
+    metrics = metrics.with_values(source_credibility=(0.8, 2), known_match=(1.0, 1, 'Title'))
+    assert not hasattr(metrics, '__dict__')
+    restored = Metrics.from_raw(json.loads(json.dumps(metrics.raw())))
+    assert restored == metrics
+    assert restored.extra() == metrics.extra()
+    assert restored.raw() == metrics.raw()
+    assert Metrics.from_raw(analyze_content('')[1].raw()) == analyze_content('')[1]
@@ -0,0 +1,156 @@
+import csv
+import glob
+import io
+import os
+import random
+import runpy
+import shutil
+import sys
+
+import pytest
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+from tests.generators import article, make_docx
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(ROOT_DIR, 'app.py')
+
+KNOWN_FALSE_TITLE = 'Secret Miracle Cure Revealed'
+KNOWN_FALSE_ARTICLE = (
+    "SHOCKING NEWS!!! Scientists don't want you to know this MIRACLE cure for ALL diseases!!! A secret "
+    "conspiracy of doctors is HIDING this from you because they want you to stay sick!!! Anonymous sources "
+    "confirm this EXCLUSIVE information that Big Pharma doesn't want you to see!!! Share before they take this down!!!"
+)
+
+class Upload(io.BytesIO):
+    """What st.file_uploader returns, which AppTest in this Streamlit version can't drive"""
+    
+    def __init__(self, name, data, mime_type):
+        super().__init__(data)
+        self.name = name
+        self.size = len(data)
+        self.type = mime_type
+
+@pytest.fixture(scope='module', autouse=True)
+def database_dir(tmp_path_factory):
+    """The app runs against a copy of database/, with no resources left from another copy"""
+    directory = tmp_path_factory.mktemp('database')
+    for path in glob.glob(os.path.join(ROOT_DIR, 'database', '*.db')):
+        shutil.copy(path, directory)
+    previous = os.environ.get('TRUTHGUARD_DATABASE_DIR')
+    os.environ['TRUTHGUARD_DATABASE_DIR'] = str(directory)
+    st.cache_resource.clear()
+    yield directory
+    st.cache_resource.clear()
+    if previous is None:
+        del os.environ['TRUTHGUARD_DATABASE_DIR']
+    else:
+        os.environ['TRUTHGUARD_DATABASE_DIR'] = previous
+
+@pytest.fixture(autouse=True)
+def main_module():
+    """Streamlit installs the script as __main__; put the real one back for the tests that follow"""
+    main = sys.modules['__main__']
+    yield
+    sys.modules['__main__'] = main
+
+def upload_app(monkeypatch, name, data, mime_type):
+    monkeypatch.setattr(st, 'file_uploader', lambda *args, **kwargs: Upload(name, data, mime_type))
+    return AppTest.from_file(APP_PATH, default_timeout=60)
+
+def metrics_table(at):
+    """The rows of the Analysis Details table, by metric name"""
+    for element in at.markdown:
+        if element.value.startswith('| Metric | Value |'):
+            rows = [line.strip('|').split(' | ') for line in element.value.splitlines()[2:]]
+            return {name.strip(): value.strip() for name, value in rows}
+    return None
+
+def verdict(at):
+    """The verdict shown for the last analysis"""
+    for element in at.markdown:
+        if element.value.startswith('<div class="verdict'):
+            return element.value.split('>')[1].split('<')[0]
+    return None
+
+def test_pasted_copy_of_a_known_article_takes_its_verdict():
+    at = AppTest.from_file(APP_PATH, default_timeout=60)
+    at.run()
+    # Each analysis is judged on its own, not in turn
+    for _ in range(2):
+        at.text_area[0].input(KNOWN_FALSE_ARTICLE)
+        at.button(key='analyze_text_btn').click().run()
+        assert not at.exception, at.exception
+        assert verdict(at) == 'False'
+        assert f'known false news "{KNOWN_FALSE_TITLE}"' in metrics_table(at)['Known Article Match']
+
+def test_text_file_upload_is_checked_against_known_articles(monkeypatch):
+    at = upload_app(monkeypatch, 'article.txt', KNOWN_FALSE_ARTICLE.encode(), 'text/plain')
+    at.run()
+    at.button(key='analyze_file_btn').click().run()
+    assert not at.exception, at.exception
+    assert verdict(at) == 'False'
+    assert f'known false news "{KNOWN_FALSE_TITLE}"' in metrics_table(at)['Known Article Match']
+
+def test_docx_upload_is_checked_against_known_articles_and_sources(monkeypatch):
+    data = make_docx([KNOWN_FALSE_ARTICLE, 'Sources: https://www.reuters.com/world and https://infowars.com'])
+    at = upload_app(monkeypatch, 'article.docx', data, 'application/vnd.openxmlformats-officedocument.wordprocessingml.document')
+    at.run()
+    at.button(key='analyze_file_btn').click().run()
+    assert not at.exception, at.exception
+    assert verdict(at) == 'False'
+    metrics = metrics_table(at)
+    assert metrics['Pages Analyzed'] == '2'
+    assert f'known false news "{KNOWN_FALSE_TITLE}"' in metrics['Known Article Match']
+    assert metrics['Source Credibility'] == '0.53 across 2 known domains'
+
+def test_csv_sources_are_scored_from_every_shard(monkeypatch):
+    # nasa.gov is listed only in example_news.db
+    data = b'title,content,source\nLaunch,The mission launched on schedule.,https://www.nasa.gov/news\n'
+    at = upload_app(monkeypatch, 'articles.csv', data, 'text/csv')
+    at.run()
+    at.button(key='analyze_file_btn').click().run()
+    assert not at.exception, at.exception
+    assert at.dataframe[0].value['source_credibility'][0] == '0.95 across 1 known domain'
+
+def test_csv_results_are_redrawn_without_a_dataframe_in_session_state(monkeypatch):
+    import pandas as pd
+    data = b'title,content,source\nOne,A shocking hoax!!,example.com\nTwo,Research found that it works.,\n'
+    at = upload_app(monkeypatch, 'articles.csv', data, 'text/csv')
+    at.run()
+    at.button(key='analyze_file_btn').click().run()
+    # Choosing another export format reruns the script without analyzing again
+    at.radio(key='document_export_format').set_value('Parquet').run()
+    assert not at.exception, at.exception
+    assert list(at.dataframe[0].value['title']) == ['One', 'Two']
+    assert at.get('download_button')[0].proto.label == 'Download Parquet'
+    documents = at.session_state['results']['Documents']
+    assert documents.upload == ('articles.csv', len(data))
+    assert not any(isinstance(getattr(documents, name), pd.DataFrame) for name in documents.__slots__)
+
+def test_large_csv_upload_is_scored_by_worker_processes(monkeypatch):
+    rng = random.Random(9)
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(['title', 'content', 'source'])
+    # Enough rows to be scored in the worker pool
+    for number in range(300):
+        writer.writerow([f'Article {number}', article(rng, 300), 'example.com'])
+    monkeypatch.setenv('TRUTHGUARD_WORKERS', '2')
+    st.cache_resource.clear()
+    at = upload_app(monkeypatch, 'articles.csv', out.getvalue().encode(), 'text/csv')
+    at.run()
+    at.button(key='analyze_file_btn').click().run()
+    assert not at.exception, at.exception
+    assert not at.error, at.error
+    assert len(at.dataframe[0].value) == 300
+    st.cache_resource.clear()
+
+def test_workers_import_the_app_without_drawing_it(monkeypatch):
+    def drawn(*args, **kwargs):
+        raise AssertionError('the page was drawn on import')
+    for name in ['set_page_config', 'markdown', 'tabs']:
+        monkeypatch.setattr(st, name, drawn)
+    # Spawned workers run the parent's main script under this name before they start
+    runpy.run_path(APP_PATH, run_name='__mp_main__')
@@ -0,0 +1,48 @@
+import random
+
+import pandas as pd
+import pytest
+
+from tests.generators import article, csv_articles
+import truthguard.batch as batch
+from truthguard.analysis import analyze_content
+from truthguard.batch import analyze_batch
+
+EDGE_CASES = [
+    '', 'Hello "quote', ' unterminated" then "x"', '(Smith 2020', ' 2020)', 'according to them',
+    'İSTANBUL hoax İ ok shocking', 'a\x00b hoax\x01 "q\x00q"', 'https://x.org', 'WOW!! Really?!?', '??',
+    'line\r\nbreak according to x\r\n"a\r\nb"', 'ſcam ſecret ıt', 'BREAKING!!! SHOCKING hoax... experts say',
+]
+
+def expected_row(text):
+    confidence, metrics = analyze_content(text)
+    return dict(metrics, confidence=confidence)
+
+def batch_rows(results):
+    return [{name: getattr(value, 'item', lambda: value)() for name, value in row.items()}
+            for _, row in results.iterrows()]
+
+@pytest.fixture
+def corpus():
+    rng = random.Random(3)
+    return [article(rng, rng.choice([50, 100, 1000, 5000])) for _ in range(200)] + csv_articles() + EDGE_CASES
+
+def test_batch_matches_scalar(corpus):
+    assert batch_rows(analyze_batch(corpus)) == [expected_row(text) for text in corpus]
+
+def test_batch_matches_scalar_across_joined_strings(corpus, monkeypatch):
+    monkeypatch.setattr(batch, 'BATCH_CHARS', 3000)
+    assert batch_rows(analyze_batch(corpus)) == [expected_row(text) for text in corpus]
+
+def test_batch_keeps_index():
+    texts = pd.Series(['A hoax!!', 'Research shows it.'], index=[10, 20])
+    assert list(analyze_batch(texts).index) == [10, 20]
+
+def test_non_string_values_are_scored_as_text():
+    rows = batch_rows(analyze_batch([5, None, 3.5]))
+    assert rows == [expected_row('5'), expected_row(''), expected_row('3.5')]
+
+def test_empty_batch():
+    results = analyze_batch([])
+    assert results.empty
+    assert 'confidence' in results.columns
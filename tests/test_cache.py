@@ -0,0 +1,64 @@
+import io
+
+from truthguard.analysis import analyze_content
+from truthguard.cache import AnalysisCache, content_hash
+from truthguard.incremental import ParagraphCache
+
+ARTICLE = (
+    'BREAKING!!! Scientists HATE this shocking secret.\r\n\r\n'
+    'According to the report, researchers said "the data is clear" (Smith 2020).\r\n'
+    'Sources: https://example.org/study'
+)
+
+def test_miss_scores_the_text_as_given():
+    assert AnalysisCache().analyze(ARTICLE) == analyze_content(ARTICLE)
+
+def test_hit_equals_miss():
+    cache = AnalysisCache()
+    miss = cache.analyze(ARTICLE)
+    hit = cache.analyze(ARTICLE)
+    assert hit == miss == analyze_content(ARTICLE)
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_paragraph_cache_miss_equals_full_scan():
+    cache = AnalysisCache(paragraphs=ParagraphCache())
+    assert cache.analyze(ARTICLE) == analyze_content(ARTICLE)
+    edited = ARTICLE.replace('shocking', 'verified')
+    assert cache.analyze(edited) == analyze_content(edited)
+
+def test_disk_hit_equals_miss(tmp_path):
+    db_path = str(tmp_path / 'cache.db')
+    miss = AnalysisCache(db_path=db_path).analyze(ARTICLE)
+    cache = AnalysisCache(db_path=db_path)
+    assert cache.analyze(ARTICLE) == miss
+    assert cache.disk_hits == 1
+
+def test_line_ending_variants_share_a_key():
+    cache = AnalysisCache()
+    cache.analyze(ARTICLE)
+    cache.analyze(ARTICLE.replace('\r\n', '\n'))
+    assert content_hash(ARTICLE) == content_hash(ARTICLE.replace('\r\n', '\n'))
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_file_hit_equals_miss():
+    cache = AnalysisCache()
+    data = ARTICLE.replace('\r\n', '\n').encode('utf-8')
+    miss = cache.analyze_file(io.BytesIO(data), chunk_size=16)
+    assert cache.analyze_file(io.BytesIO(data), chunk_size=16) == miss
+    assert miss == analyze_content(data.decode('utf-8'))
+
+def test_lru_eviction():
+    cache = AnalysisCache(max_entries=2)
+    for text in ('one', 'two', 'three'):
+        cache.analyze(text)
+    assert cache.stats()['entries'] == 2
+    assert cache.evictions == 1
+    cache.analyze('one')
+    assert cache.misses == 4
+
+def test_other_rules_version_is_not_served(tmp_path):
+    db_path = str(tmp_path / 'cache.db')
+    AnalysisCache(db_path=db_path, rules_version='old').analyze(ARTICLE)
+    cache = AnalysisCache(db_path=db_path, rules_version='new')
+    cache.analyze(ARTICLE)
+    assert (cache.disk_hits, cache.misses) == (0, 1)
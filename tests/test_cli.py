@@ -0,0 +1,39 @@
+import json
+
+import pytest
+
+from truthguard.analysis import analyze_content
+from truthguard.cli import main
+
+TEXT = 'Research by the university found that it works.'
+
+def test_score_text_file(tmp_path, capsys):
+    path = tmp_path / 'article.txt'
+    path.write_text(TEXT, encoding='utf-8')
+    assert main(['score', str(path)]) == 0
+    record = json.loads(capsys.readouterr().out)
+    assert record['source'] == str(path)
+    assert record['confidence'] == analyze_content(TEXT)[0]
+
+def test_score_ndjson_reports_bad_lines(tmp_path, capsys):
+    path = tmp_path / 'articles.jsonl'
+    path.write_text(json.dumps({'id': 1, 'content': TEXT}) + '\n\n{"title": "no content"}\n', encoding='utf-8')
+    assert main(['score', str(path)]) == 1
+    records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert records[0]['id'] == 1
+    assert records[1] == {'line': 3, 'error': "Each document needs a 'content' string"}
+
+@pytest.mark.parametrize('name', ['article.txt', 'articles.jsonl'])
+def test_non_utf8_input_exits_with_a_message(tmp_path, capsys, name):
+    path = tmp_path / name
+    path.write_bytes('"Café" in Latin-1\n'.encode('latin-1'))
+    with pytest.raises(SystemExit) as exit_info:
+        main(['score', str(path)])
+    assert exit_info.value.code == 2
+    assert f'{path} is not UTF-8 text' in capsys.readouterr().err
+
+def test_missing_file_exits_with_a_message(tmp_path, capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        main(['score', str(tmp_path / 'missing.txt')])
+    assert exit_info.value.code == 2
+    assert 'missing.txt' in capsys.readouterr().err
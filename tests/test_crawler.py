@@ -0,0 +1,103 @@
+import http.server
+import threading
+
+import pytest
+
+from truthguard.crawler import crawl_site, normalize_url
+from truthguard.html_text import extract_page
+
+def page(body, *links):
+    anchors = ''.join(f'<li><a href="{link}">{link}</a></li>' for link in links)
+    return f'<html><title>{body[:20]}</title><body><ul>{anchors}</ul><p>{body}</p></body></html>'
+
+class SiteHandler(http.server.BaseHTTPRequestHandler):
+    """A small site: / links to two levels of pages, redirects and another host"""
+    
+    def do_GET(self):
+        host = f'localhost:{self.server.server_port}'
+        pages = {
+            '/': page('Researchers said the study was peer reviewed.', '/a', '/b#top', '/c', '/moved', '/renamed',
+                      '/away', f'http://{host}/other', '/missing'),
+            '/a': page('According to officials, the report is accurate.', '/a/deeper'),
+            '/a/deeper': page('Deep page with a SHOCKING hoax!!!', '/a/deepest'),
+            '/a/deepest': page('Too deep to crawl.'),
+            '/b': page('Experts say this secret cure works.', '/'),
+            '/c': page('Moved content, cited (Smith 2020).'),
+            '/d': page('Renamed content, according to the agency.'),
+            '/other': page('A page on another host.'),
+        }
+        redirects = {'/moved': '/c#section', '/renamed': '/d#section', '/away': f'http://{host}/other'}
+        if self.path in redirects:
+            self.send_response(302)
+            self.send_header('Location', redirects[self.path])
+            self.end_headers()
+            return
+        body = pages.get(self.path)
+        self.send_response(200 if body else 404)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.end_headers()
+        self.wfile.write((body or 'Not found').encode('utf-8'))
+    
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture(scope='module')
+def site():
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), SiteHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{server.server_port}'
+    server.shutdown()
+    server.server_close()
+
+def crawled(site, **options):
+    report = crawl_site(site + '/', concurrency=4, timeout=5, **options)
+    return {page.url[len(site):]: page for page in report.pages}, report
+
+def test_depth_limit(site):
+    pages, _ = crawled(site, max_depth=1, max_pages=20)
+    assert '/a/deeper' not in pages
+    assert {'/', '/a', '/b', '/missing'} <= set(pages)
+    deeper, _ = crawled(site, max_depth=2, max_pages=20)
+    assert deeper['/a/deeper'].depth == 2
+    assert '/a/deepest' not in deeper
+
+def test_max_pages(site):
+    pages, _ = crawled(site, max_depth=3, max_pages=3)
+    assert len(pages) == 3
+    assert '/' in pages
+
+def test_stays_on_the_start_host(site):
+    pages, report = crawled(site, max_depth=1, max_pages=20)
+    assert all(page.url.startswith(site) for page in report.pages)
+    assert pages['/away'].confidence is None
+    assert 'Skipped redirect' in pages['/away'].error
+
+def test_redirect_targets_are_normalized(site):
+    pages, report = crawled(site, max_depth=1, max_pages=20)
+    assert pages['/d'].confidence is not None
+    # /moved leads to /c, which the start page links to as well
+    assert [page.url for page in report.pages].count(site + '/c') == 1
+    assert 'already in the crawl' in pages['/moved'].error
+
+def test_other_host_allowed_when_same_host_is_off(site):
+    report = crawl_site(site + '/', max_depth=1, max_pages=20, same_host=False, timeout=5)
+    assert any(page.url.startswith('http://localhost:') and page.confidence is not None for page in report.pages)
+
+def test_errors_are_reported(site):
+    pages, _ = crawled(site, max_depth=1, max_pages=20)
+    assert pages['/missing'].status == 404
+    assert pages['/missing'].error == 'HTTP 404'
+
+def test_normalize_url():
+    assert normalize_url('/x#frag', 'HTTP://Example.org/a') == 'http://example.org/x'
+    assert normalize_url('HTTPS://Example.org') == 'https://example.org/'
+    assert normalize_url('mailto:a@example.org') is None
+
+def test_link_only_lines_are_dropped():
+    text, links, title = extract_page(
+        '<title>T</title><p><a href="/">Home</a> | <a href="/n">News</a></p>'
+        '<p><a href="/x">SHOCKING hoax!!!</a> b c</p><p>Read <a href="/r">the whole report</a></p>'
+    )
+    assert text == 'SHOCKING hoax!!! b c\nRead the whole report'
+    assert links == ['/', '/n', '/x', '/r']
+    assert title == 'T'
@@ -0,0 +1,137 @@
+import io
+import zipfile
+
+import pypdf
+import pytest
+
+from tests.generators import docx_from_body, make_docx, make_pdf
+from truthguard.document_text import (
+    check_size,
+    document_kind,
+    iter_document_chunks,
+    iter_document_pages,
+    opening_text,
+)
+
+PAGES = ['The first page says the study was confirmed.', 'A second page (Smith 2020).', 'The third page']
+
+def pages(data, kind, **kwargs):
+    return list(iter_document_pages(io.BytesIO(data), kind, **kwargs))
+
+def paragraph(text, before=''):
+    return f'<w:p><w:r>{before}<w:t xml:space="preserve">{text}</w:t></w:r></w:p>'
+
+@pytest.mark.parametrize('name, mime_type, expected', [
+    ('report.PDF', None, 'pdf'),
+    ('upload', 'application/pdf', 'pdf'),
+    ('letter.docx', None, 'docx'),
+    ('notes.txt', 'text/plain', None),
+])
+def test_document_kind(name, mime_type, expected):
+    assert document_kind(name, mime_type) == expected
+
+def test_pdf_is_split_into_pages():
+    assert [page.strip() for page in pages(make_pdf(PAGES), 'pdf')] == PAGES
+
+def test_docx_pages_end_at_explicit_page_breaks():
+    assert pages(make_docx(['One. Two', 'Three']), 'docx') == ['One\nTwo\n', '\nThree\n']
+
+def test_docx_pages_end_at_rendered_page_breaks():
+    body = paragraph('One') + paragraph('Two', '<w:lastRenderedPageBreak/>') + paragraph('Three')
+    assert pages(docx_from_body(body), 'docx') == ['One\n', 'Two\nThree\n']
+
+def test_rendered_break_after_an_explicit_one_adds_no_empty_page():
+    body = (paragraph('One') + '<w:p><w:r><w:br w:type="page"/></w:r></w:p>'
+            + paragraph('Two', '<w:lastRenderedPageBreak/>'))
+    assert pages(docx_from_body(body), 'docx') == ['One\n', '\nTwo\n']
+
+def test_docx_tabs_and_line_breaks():
+    body = '<w:p><w:r><w:t>a</w:t><w:tab/><w:t>b</w:t><w:br/><w:t>c</w:t></w:r></w:p>'
+    assert pages(docx_from_body(body), 'docx') == ['a\tb\nc\n']
+
+def test_empty_docx_is_one_empty_page():
+    assert pages(docx_from_body(''), 'docx') == ['']
+
+@pytest.mark.parametrize('kind, build', [('pdf', make_pdf), ('docx', make_docx)])
+def test_page_limit(kind, build):
+    assert len(pages(build(PAGES), kind, max_pages=3)) == 3
+    with pytest.raises(ValueError, match='limited to 2 pages'):
+        pages(build(PAGES), kind, max_pages=2)
+
+def test_size_limit():
+    check_size(io.BytesIO(b'x' * 10), max_bytes=10)
+    fileobj = io.BytesIO(b'x' * 11)
+    fileobj.seek(5)
+    with pytest.raises(ValueError, match='limited to'):
+        check_size(fileobj, max_bytes=10)
+    assert fileobj.tell() == 0
+
+def test_chunks_join_pages_with_a_blank_line():
+    chunks = list(iter_document_chunks(io.BytesIO(make_docx(['One', 'Two'])), 'docx'))
+    assert chunks == ['One\n', '\n\n\nTwo\n']
+
+def test_opening_text():
+    assert opening_text(['abc', 'def', 'ghi'], max_chars=5) == 'abcde'
+    assert opening_text(['abc'], max_chars=5) == 'abc'
+    # Chunks after the limit are never read
+    assert opening_text(iter(['abcdef', None]), max_chars=5) == 'abcde'
+
+def test_unsupported_kind():
+    with pytest.raises(ValueError):
+        pages(b'data', 'odt')
+
+def test_encrypted_pdf():
+    writer = pypdf.PdfWriter(clone_from=pypdf.PdfReader(io.BytesIO(make_pdf(PAGES))))
+    writer.encrypt('secret', algorithm='RC4-128')
+    out = io.BytesIO()
+    writer.write(out)
+    with pytest.raises(ValueError, match='Encrypted'):
+        pages(out.getvalue(), 'pdf')
+
+@pytest.mark.parametrize('data', [
+    b'%PDF-1.4\nnot really a pdf\n%%EOF\n',
+    make_pdf(PAGES)[:300],
+    b'',
+])
+def test_corrupt_pdf(data):
+    with pytest.raises(ValueError):
+        pages(data, 'pdf')
+
+@pytest.mark.parametrize('error', [KeyError('/Root'), AssertionError(), pypdf.errors.DependencyError('AES')])
+def test_any_pypdf_error_is_a_value_error(monkeypatch, error):
+    def failing_reader(fileobj):
+        raise error
+    monkeypatch.setattr(pypdf, 'PdfReader', failing_reader)
+    with pytest.raises(ValueError, match='Could not read the PDF'):
+        pages(make_pdf(PAGES), 'pdf')
+
+def test_page_extraction_errors_are_value_errors(monkeypatch):
+    def extract_text(page, *args, **kwargs):
+        raise KeyError('/Font')
+    monkeypatch.setattr(pypdf.PageObject, 'extract_text', extract_text)
+    with pytest.raises(ValueError, match='page 1'):
+        pages(make_pdf(PAGES), 'pdf')
+
+def zip_with(members, compression=zipfile.ZIP_DEFLATED):
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, 'w', compression) as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    return out.getvalue()
+
+def test_corrupt_docx():
+    with pytest.raises(ValueError, match='Not a valid DOCX'):
+        pages(b'plain text, not a zip', 'docx')
+    with pytest.raises(ValueError, match='Not a valid DOCX'):
+        pages(zip_with({'other.xml': '<x/>'}), 'docx')
+    with pytest.raises(ValueError, match='Could not read the DOCX text'):
+        pages(zip_with({'word/document.xml': '<w:document><w:body>'}), 'docx')
+
+def test_docx_with_damaged_compressed_text():
+    data = bytearray(make_docx(['Some text. ' * 200]))
+    # Flip bytes inside the compressed document.xml, past its local header
+    start = data.index(b'word/document.xml') + len('word/document.xml') + 10
+    for offset in range(start, start + 40):
+        data[offset] ^= 0xFF
+    with pytest.raises(ValueError):
+        pages(bytes(data), 'docx')
@@ -0,0 +1,99 @@
+import random
+import sqlite3
+
+import numpy as np
+import pytest
+
+from tests.generators import edit, topic_article
+from truthguard.analysis import analyze_content
+from truthguard.duplicates import KnownArticles, NearDuplicateIndex, decide_verdict, minhash, weigh_match
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'news.db')
+    conn = sqlite3.connect(path)
+    for table in ('known_true_news', 'known_false_news'):
+        conn.execute(f'CREATE TABLE {table} (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT, content TEXT)')
+    conn.commit()
+    conn.close()
+    return path
+
+def insert(db_path, table, articles):
+    conn = sqlite3.connect(db_path)
+    conn.executemany(f'INSERT INTO {table} (title, content) VALUES (?, ?)', articles)
+    conn.commit()
+    conn.close()
+
+def delete(db_path, table, title):
+    conn = sqlite3.connect(db_path)
+    conn.execute(f'DELETE FROM {table} WHERE title = ?', (title,))
+    conn.commit()
+    conn.close()
+
+def test_minhash_recall():
+    rng = random.Random(7)
+    texts = [topic_article(rng) for _ in range(300)]
+    index = NearDuplicateIndex()
+    index.add(np.stack([minhash(text) for text in texts]), [0] * len(texts), range(1, len(texts) + 1))
+    
+    found = sum(any(row_id == number + 1 for _, _, row_id in index.query(minhash(edit(rng, text))))
+                for number, text in enumerate(texts))
+    assert found / len(texts) >= 0.95
+    assert index.query(minhash(topic_article(random.Random(99)))) == []
+
+def test_match_and_weigh(db_path):
+    rng = random.Random(1)
+    text = topic_article(rng)
+    insert(db_path, 'known_false_news', [('Fake one', text)])
+    known = KnownArticles(db_path, refresh_seconds=0)
+    matches = known.match(edit(rng, text, 2))
+    assert matches[0]['title'] == 'Fake one'
+    assert not matches[0]['is_true']
+    
+    confidence, metrics = weigh_match(*analyze_content(text), matches)
+    assert confidence < analyze_content(text)[0]
+    assert 'Fake one' in metrics['known_match']
+
+def test_known_match_decides_the_verdict():
+    _, metrics = analyze_content('Research by the university found that it works.')
+    assert decide_verdict(50, metrics) == 'True'
+    assert decide_verdict(49.99, metrics) == 'False'
+    # A match at the threshold moves the confidence only halfway, but still decides the verdict
+    confidence, matched = weigh_match(100, metrics, [{'similarity': 0.5, 'is_true': 0, 'title': 'Fake one'}])
+    assert confidence == 50 and decide_verdict(confidence, matched) == 'False'
+    assert decide_verdict(80, metrics.with_values(known_match=(0.6, False, 'Fake one'))) == 'False'
+    assert decide_verdict(20, metrics.with_values(known_match=(0.6, True, 'True one'))) == 'True'
+    # No match, or one below the threshold, leaves the verdict to the confidence
+    assert decide_verdict(95, metrics.with_values(known_match=None)) == 'True'
+    assert decide_verdict(95, metrics.with_values(known_match=(0.4, False, 'Weak'))) == 'True'
+
+def test_deleted_rows_leave_the_index(db_path):
+    rng = random.Random(2)
+    texts = [topic_article(rng) for _ in range(3)]
+    insert(db_path, 'known_true_news', [(f'True {number}', text) for number, text in enumerate(texts)])
+    known = KnownArticles(db_path, refresh_seconds=3600)
+    assert known.sync() == 3
+    
+    delete(db_path, 'known_true_news', 'True 1')
+    # Not reported even before the next sync
+    assert known.match(texts[1]) == []
+    assert known.sync() == 1
+    assert len(known.index) == 2
+    assert [match['title'] for match in known.match(texts[0])] == ['True 0']
+    
+    # The saved index no longer holds the deleted row either
+    reloaded = KnownArticles(db_path, refresh_seconds=0)
+    assert len(reloaded.index) == 2
+    assert reloaded.match(texts[1]) == []
+    assert reloaded.sync() == 0
+
+def test_rows_added_after_a_deletion_are_indexed(db_path):
+    rng = random.Random(3)
+    texts = [topic_article(rng) for _ in range(3)]
+    insert(db_path, 'known_true_news', [('First', texts[0]), ('Second', texts[1])])
+    known = KnownArticles(db_path, refresh_seconds=3600)
+    known.sync()
+    delete(db_path, 'known_true_news', 'First')
+    insert(db_path, 'known_true_news', [('Third', texts[2])])
+    assert known.sync() == 2
+    assert sorted(known.index.row_ids.tolist()) == [2, 3]
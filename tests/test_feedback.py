@@ -0,0 +1,86 @@
+import sqlite3
+
+import pytest
+
+from truthguard.feedback import FeedbackWriter, feedback_hash
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'news.db')
+    conn = sqlite3.connect(path)
+    for table in ('known_true_news', 'known_false_news'):
+        conn.execute(f'CREATE TABLE {table} (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT, content TEXT, source TEXT)')
+    conn.commit()
+    conn.close()
+    return path
+
+@pytest.fixture
+def writer(db_path):
+    writer = FeedbackWriter(db_path, flush_seconds=0.01, fold_seconds=3600)
+    yield writer
+    writer.close()
+
+def vote(writer, content, *user_verdicts, system_verdict='True'):
+    for user_verdict in user_verdicts:
+        writer.record(content, user_verdict, system_verdict, 70.0)
+    writer.flush()
+
+def fold(writer, db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        writer.fold(conn)
+        return {table: [row[0] for row in conn.execute(f'SELECT content FROM {table}')]
+                for table in ('known_true_news', 'known_false_news')}
+    finally:
+        conn.close()
+
+def test_agreeing_votes_are_folded_once(writer, db_path):
+    vote(writer, 'Article A', 'correct', 'correct')
+    vote(writer, 'Article B', 'incorrect', 'incorrect')
+    assert fold(writer, db_path) == {'known_true_news': ['Article A'], 'known_false_news': ['Article B']}
+    vote(writer, 'Article A', 'correct')
+    assert fold(writer, db_path) == {'known_true_news': ['Article A'], 'known_false_news': ['Article B']}
+
+def test_contradicting_votes_are_not_folded(writer, db_path):
+    vote(writer, 'Disputed', 'correct', 'incorrect', 'correct')
+    assert fold(writer, db_path) == {'known_true_news': [], 'known_false_news': []}
+    vote(writer, 'Disputed', 'correct')
+    assert fold(writer, db_path) == {'known_true_news': ['Disputed'], 'known_false_news': []}
+
+def test_votes_correct_the_system_verdict(writer, db_path):
+    vote(writer, 'Marked false', 'incorrect', 'incorrect', system_verdict='False')
+    assert fold(writer, db_path)['known_true_news'] == ['Marked false']
+
+def test_single_vote_is_not_folded(writer, db_path):
+    vote(writer, 'Once', 'correct')
+    assert fold(writer, db_path) == {'known_true_news': [], 'known_false_news': []}
+
+def test_user_feedback_rows_count_every_vote(writer, db_path):
+    vote(writer, 'Article', 'correct', 'incorrect', 'correct')
+    conn = sqlite3.connect(db_path)
+    row = conn.execute('SELECT user_verdict, feedback_count FROM user_feedback WHERE content_hash = ?',
+                       (feedback_hash('Article'),)).fetchone()
+    conn.close()
+    assert row == ('correct', 3)
+
+def test_database_is_switched_to_wal_mode(writer, db_path):
+    vote(writer, 'Article', 'correct')
+    conn = sqlite3.connect(db_path)
+    assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    conn.close()
+
+def test_writer_survives_unexpected_errors(writer, db_path, monkeypatch):
+    write = writer._write
+    failures = []
+    
+    def failing_write(conn, batch):
+        if not failures:
+            failures.append(batch)
+            raise RuntimeError("unexpected")
+        write(conn, batch)
+    
+    monkeypatch.setattr(writer, '_write', failing_write)
+    vote(writer, 'Lost', 'correct')
+    vote(writer, 'Kept', 'correct', 'correct')
+    assert writer.stats()['errors'] == 1
+    assert fold(writer, db_path)['known_true_news'] == ['Kept']
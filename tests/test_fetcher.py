@@ -0,0 +1,64 @@
+import http.server
+import threading
+
+import pytest
+
+from truthguard.fetcher import PageFetcher
+
+ARTICLE = b'<html><title>Report</title><body><p>Researchers said the study was peer reviewed.</p></body></html>'
+
+class ArticleHandler(http.server.BaseHTTPRequestHandler):
+    """/etag revalidates with an ETag; /stale answers 304 unless told not to use a cache"""
+    
+    def do_GET(self):
+        self.server.requests.append((self.path, dict(self.headers)))
+        if self.path == '/etag' and self.headers.get('If-None-Match') == '"v1"':
+            status = 304
+        elif self.path == '/stale' and self.headers.get('Cache-Control') != 'no-cache':
+            status = 304
+        elif self.path == '/always-304':
+            status = 304
+        else:
+            status = 200
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        if self.path == '/etag':
+            self.send_header('ETag', '"v1"')
+        self.send_header('Content-Length', str(len(ARTICLE) if status == 200 else 0))
+        self.end_headers()
+        if status == 200:
+            self.wfile.write(ARTICLE)
+    
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def server():
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), ArticleHandler)
+    server.requests = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def url(server, path):
+    return f'http://127.0.0.1:{server.server_port}{path}'
+
+def test_revalidated_page_is_reused(server):
+    fetcher = PageFetcher()
+    first = fetcher.fetch(url(server, '/etag'))
+    second = fetcher.fetch(url(server, '/etag'))
+    assert second is first
+    assert second.revalidated
+    assert second.extract() == ('Researchers said the study was peer reviewed.', 'Report')
+    assert fetcher.stats()['revalidations'] == 1
+
+def test_304_without_a_cached_copy_is_fetched_again(server):
+    page = PageFetcher().fetch(url(server, '/stale'))
+    assert page.status == 200
+    assert page.body == ARTICLE
+    assert [headers.get('Cache-Control') for _, headers in server.requests] == [None, 'no-cache']
+
+def test_repeated_304_is_an_error(server):
+    with pytest.raises(ValueError, match='HTTP 304'):
+        PageFetcher().fetch(url(server, '/always-304'))
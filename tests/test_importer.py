@@ -0,0 +1,128 @@
+import os
+import sqlite3
+
+import pytest
+
+import truthguard.importer as importer
+from truthguard.importer import import_files
+
+def write_csv(path, rows, header='title,content,source\n', newline=True):
+    text = header + '\n'.join(f'{title},{content},{source}' for title, content, source in rows)
+    path.write_text(text + ('\n' if newline else ''))
+
+def articles(start, stop):
+    return [(f'Title {i}', f'Content {i}', 'example.org') for i in range(start, stop)]
+
+def titles(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return [row[0] for row in conn.execute('SELECT title FROM known_true_news ORDER BY id')]
+    finally:
+        conn.close()
+
+def run(db_path, csv_path, **kwargs):
+    return import_files(db_path, [(str(csv_path), 'known_true_news')], report=lambda *args: None, **kwargs)[0]
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / 'news.db')
+
+def test_imported_file_is_skipped(tmp_path, db_path):
+    csv_path = tmp_path / 'true_news.csv'
+    write_csv(csv_path, articles(0, 10))
+    assert run(db_path, csv_path).rows == 10
+    assert run(db_path, csv_path).skipped
+    # A new modification time alone does not import the file again
+    os.utime(csv_path, (1, 1))
+    assert run(db_path, csv_path).skipped
+    assert len(titles(db_path)) == 10
+
+def test_appended_rows_are_imported(tmp_path, db_path):
+    csv_path = tmp_path / 'true_news.csv'
+    write_csv(csv_path, articles(0, 10))
+    run(db_path, csv_path)
+    write_csv(csv_path, articles(0, 11))
+    result = run(db_path, csv_path)
+    assert (result.rows, result.resumed_at) == (1, 10)
+    assert titles(db_path) == [f'Title {i}' for i in range(11)]
+    assert run(db_path, csv_path).skipped
+
+def test_edited_file_is_refused(tmp_path, db_path):
+    csv_path = tmp_path / 'true_news.csv'
+    write_csv(csv_path, articles(0, 10))
+    run(db_path, csv_path)
+    write_csv(csv_path, [('Edited', 'Content', 'example.org')] + articles(1, 11))
+    with pytest.raises(ValueError, match='--restart'):
+        run(db_path, csv_path)
+    assert len(titles(db_path)) == 10
+
+def test_append_to_an_unterminated_last_row_is_refused(tmp_path, db_path):
+    csv_path = tmp_path / 'true_news.csv'
+    write_csv(csv_path, articles(0, 10), newline=False)
+    run(db_path, csv_path)
+    # The appended text continues the last row, which was imported without it
+    with open(csv_path, 'a') as f:
+        f.write(' more\nTitle 10,Content 10,example.org\n')
+    with pytest.raises(ValueError):
+        run(db_path, csv_path)
+    assert len(titles(db_path)) == 10
+
+def test_restart_imports_again(tmp_path, db_path):
+    csv_path = tmp_path / 'true_news.csv'
+    write_csv(csv_path, articles(0, 10))
+    run(db_path, csv_path)
+    assert run(db_path, csv_path, restart=True).rows == 10
+    assert len(titles(db_path)) == 20
+
+def test_interrupted_import_resumes(tmp_path, db_path, monkeypatch):
+    csv_path = tmp_path / 'true_news.csv'
+    write_csv(csv_path, articles(0, 10))
+    read_csv = importer.pd.read_csv
+    
+    def interrupted(*args, **kwargs):
+        chunks = read_csv(*args, **kwargs)
+        if 'chunksize' not in kwargs:
+            return chunks
+        def first_two():
+            yield next(chunks)
+            yield next(chunks)
+            raise KeyboardInterrupt
+        return first_two()
+    
+    monkeypatch.setattr(importer.pd, 'read_csv', interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        run(db_path, csv_path, chunk_rows=3)
+    assert len(titles(db_path)) == 6
+    monkeypatch.setattr(importer.pd, 'read_csv', read_csv)
+    
+    # Rows appended while the import was stopped are loaded with the rest
+    write_csv(csv_path, articles(0, 12))
+    result = run(db_path, csv_path, chunk_rows=3)
+    assert (result.rows, result.resumed_at) == (6, 6)
+    assert titles(db_path) == [f'Title {i}' for i in range(12)]
+
+def sources(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute('SELECT domain, credibility_score FROM credibility_sources ORDER BY domain').fetchall()
+    finally:
+        conn.close()
+
+def test_sources_with_only_a_domain_column(tmp_path, db_path):
+    scored = tmp_path / 'scored.csv'
+    scored.write_text('domain,credibility_score\nnasa.gov,0.9\n')
+    import_files(db_path, [(str(scored), 'credibility_sources')], report=lambda *args: None)
+    domains = tmp_path / 'domains.csv'
+    domains.write_text('domain\nnasa.gov\nbbc.co.uk\n')
+    result = import_files(db_path, [(str(domains), 'credibility_sources')], report=lambda *args: None)[0]
+    assert result.rows == 2
+    # An existing domain keeps its score
+    assert sources(db_path) == [('bbc.co.uk', None), ('nasa.gov', 0.9)]
+
+def test_database_is_left_in_wal_mode(tmp_path, db_path):
+    csv_path = tmp_path / 'true_news.csv'
+    write_csv(csv_path, articles(0, 3))
+    run(db_path, csv_path)
+    conn = sqlite3.connect(db_path)
+    assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    conn.close()
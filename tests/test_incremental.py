@@ -0,0 +1,61 @@
+import random
+
+import pytest
+
+from tests.generators import article
+from truthguard.analysis import extract_features
+from truthguard.incremental import MAX_OPEN_RUN, ParagraphCache, split_paragraphs
+
+# Paragraph pieces that open a citation, quotation or "according to" match left to close later
+OPENERS = ['He said "this is', '(Reuters, March', 'according to the', 'A "quote" then "another', '(see']
+CLOSERS = ['the truth" today.', '2021) reported.', 'agency, it was.', 'one".', 'Smith 2020)']
+
+def random_document(rng, paragraphs):
+    parts = []
+    for _ in range(paragraphs):
+        text = article(rng, rng.choice([40, 200, 800]))
+        if rng.random() < 0.3:
+            text = rng.choice(OPENERS) + ' ' + text
+        if rng.random() < 0.3:
+            text += ' ' + rng.choice(OPENERS)
+        elif rng.random() < 0.3:
+            text = rng.choice(CLOSERS) + ' ' + text
+        parts.append(text)
+    return ''.join(part + rng.choice(['\n\n', '\n \n', '\n\n\n', '\r\n\r\n']) for part in parts)
+
+def test_split_paragraphs_joins_back():
+    rng = random.Random(1)
+    for _ in range(20):
+        document = random_document(rng, 6)
+        assert ''.join(split_paragraphs(document)) == document
+
+def test_edits_equal_extract_features():
+    rng = random.Random(2)
+    cache = ParagraphCache()
+    document = random_document(rng, 12)
+    for _ in range(40):
+        paragraphs = split_paragraphs(document)
+        index = rng.randrange(len(paragraphs))
+        edit = rng.choice(['replace', 'insert', 'delete', 'append'])
+        if edit == 'replace':
+            paragraphs[index] = random_document(rng, 1)
+        elif edit == 'insert':
+            paragraphs.insert(index, random_document(rng, 1))
+        elif edit == 'delete' and len(paragraphs) > 1:
+            del paragraphs[index]
+        else:
+            paragraphs[index] = paragraphs[index].rstrip('\n') + ' ' + rng.choice(OPENERS + CLOSERS) + '\n\n'
+        document = ''.join(paragraphs)
+        assert cache.features(document) == extract_features(document)
+    assert cache.stats()['reused'] > cache.stats()['scanned']
+
+@pytest.mark.parametrize('paragraphs', [MAX_OPEN_RUN - 1, MAX_OPEN_RUN + 2])
+def test_match_open_across_many_paragraphs(paragraphs):
+    document = 'Intro "the quote opens here\n\n' + 'more text\n\n' * paragraphs + 'and closes" (Smith\n\n2020) end'
+    assert ParagraphCache().features(document) == extract_features(document)
+
+def test_repeated_paragraphs_are_scanned_once():
+    cache = ParagraphCache()
+    document = 'Research shows it.\n\n' * 5 + 'Experts say so.'
+    assert cache.features(document) == extract_features(document)
+    assert cache.stats()['scanned'] == 2
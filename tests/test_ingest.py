@@ -0,0 +1,48 @@
+import io
+
+import pandas as pd
+
+from truthguard.analysis import analyze_content
+from truthguard.credibility import CredibilityIndex
+from truthguard.ingest import RESULT_COLUMNS, export_results, score_documents
+from truthguard.model import TfidfModel
+
+CONTENTS = ['Scientists say this hoax is SHOCKING!!', 'Research shows the study was peer reviewed', '']
+CSV = (
+    b'title,content,source\n'
+    b'One,"Scientists say this hoax is SHOCKING!!",example.org\n'
+    b'Two,"Research shows the study was peer reviewed",\n'
+    b'Three,,news.example.com\n'
+)
+
+def scored(data, fmt='csv', **kwargs):
+    return [results for results, _ in score_documents(io.BytesIO(data), fmt, chunk_rows=2, **kwargs)]
+
+def test_chunks_share_fixed_columns():
+    credibility = CredibilityIndex({'example.org': 0.9})
+    for chunks in (scored(CSV), scored(CSV, credibility=credibility)):
+        assert [list(chunk.columns) for chunk in chunks] == [RESULT_COLUMNS, RESULT_COLUMNS]
+
+def test_rows_match_analyze_content():
+    results = pd.concat(scored(CSV), ignore_index=True)
+    assert list(results['row']) == [0, 1, 2]
+    for content, (_, row) in zip(CONTENTS, results.iterrows()):
+        confidence, metrics = analyze_content(content)
+        assert row['confidence'] == confidence
+        assert row['all_caps'] == metrics['all_caps']
+
+def test_jsonl_upload():
+    data = b'{"title": "A", "content": "experts say"}\n{"content": "according to officials, yes"}\n'
+    results = pd.concat(scored(data, 'jsonl'), ignore_index=True)
+    assert list(results['title']) == ['A', '']
+
+def test_parquet_export_round_trip():
+    results = pd.concat(scored(CSV), ignore_index=True)
+    assert pd.read_parquet(io.BytesIO(export_results(results, 'parquet'))).shape == results.shape
+
+def test_model_results_record_the_engine():
+    model = TfidfModel.train(['research shows the study', 'shocking secret hoax'], [1, 0], n_features=1 << 10)
+    results = pd.concat(scored(CSV, model=model), ignore_index=True)
+    assert set(results['engine']) == {TfidfModel.engine}
+    assert list(results['confidence']) == model.confidences(CONTENTS)
+    assert set(pd.concat(scored(CSV), ignore_index=True)['engine']) == {''}
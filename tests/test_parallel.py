@@ -0,0 +1,27 @@
+import random
+
+from tests.generators import article, csv_articles
+from truthguard.analysis import analyze_content
+from truthguard.parallel import ParallelScorer
+
+def test_pool_keeps_input_order_and_matches_serial():
+    rng = random.Random(8)
+    # Sizes vary so chunks finish out of order
+    texts = [article(rng, rng.choice([50, 500, 20000])) for _ in range(120)] + csv_articles()
+    with ParallelScorer(workers=2, chunk_size=7, min_parallel=10) as scorer:
+        results = scorer.score(texts)
+        assert scorer.executor is not None
+    assert results == [analyze_content(text) for text in texts]
+
+def test_small_batches_are_scored_in_process():
+    texts = ['A shocking hoax!!', 'Research by the university found that it works.']
+    scorer = ParallelScorer(workers=4, min_parallel=3)
+    assert scorer.score(texts) == [analyze_content(text) for text in texts]
+    assert scorer.score(iter(texts)) == [analyze_content(text) for text in texts]
+    assert scorer.executor is None
+
+def test_one_worker_never_starts_a_pool():
+    texts = ['A hoax'] * 50
+    scorer = ParallelScorer(workers=1, min_parallel=2)
+    assert scorer.score(texts) == [analyze_content('A hoax')] * 50
+    assert scorer.executor is None
@@ -0,0 +1,14 @@
+from truthguard.profiling import PerformanceStats, label_value
+
+def test_label_values_are_escaped():
+    assert label_value('a\\b"c\nd') == 'a\\\\b\\"c\\nd'
+
+def test_prometheus_lines_stay_one_sample_each():
+    stats = PerformanceStats()
+    stats.observe('odd "kind"\nhere', {'stage\\name': 0.01})
+    stats.error('odd "kind"\nhere')
+    lines = stats.prometheus().splitlines()
+    assert 'truthguard_requests_total{kind="odd \\"kind\\"\\nhere"} 1' in lines
+    assert 'truthguard_errors_total{kind="odd \\"kind\\"\\nhere"} 1' in lines
+    assert 'truthguard_stage_seconds_count{stage="stage\\\\name"} 1' in lines
+    assert all(line.startswith(('#', 'truthguard_')) for line in lines)
@@ -0,0 +1,93 @@
+import http.client
+import json
+import socket
+import threading
+
+import pytest
+
+from truthguard.analysis import SCORING_RULES_VERSION, analyze_content
+from truthguard.service import MAX_BODY_BYTES, make_server
+
+ARTICLE = 'Scientists say this shocking secret cure is a hoax!!! According to officials, it is not.'
+
+@pytest.fixture(scope='module')
+def server():
+    server = make_server(port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def conn(server):
+    conn = http.client.HTTPConnection(*server.server_address, timeout=5)
+    yield conn
+    conn.close()
+
+def request(conn, method, path, body=None, headers=None):
+    conn.request(method, path, body=body, headers=headers or {})
+    response = conn.getresponse()
+    return response.status, response.getheader('Content-Type'), response.read()
+
+def raw_request(server, data):
+    """Send raw bytes and return the status line, reading until the server closes the connection"""
+    with socket.create_connection(server.server_address, timeout=5) as sock:
+        sock.sendall(data)
+        reply = b''
+        while chunk := sock.recv(65536):
+            reply += chunk
+    return reply.split(b'\r\n', 1)[0]
+
+def test_health(conn):
+    status, _, body = request(conn, 'GET', '/health')
+    assert status == 200
+    assert json.loads(body) == {'status': 'ok', 'rules_version': SCORING_RULES_VERSION}
+
+def test_score_json_on_a_kept_alive_connection(conn):
+    confidence, metrics = analyze_content(ARTICLE)
+    for _ in range(2):
+        status, content_type, body = request(conn, 'POST', '/score', json.dumps({'content': ARTICLE}),
+                                             {'Content-Type': 'application/json'})
+        assert status == 200
+        assert content_type == 'application/json'
+        assert json.loads(body)['confidence'] == confidence
+
+def test_score_ndjson_splits_only_at_newlines(conn):
+    # U+2028 may appear unescaped in a JSON string, and must not end the line
+    lines = [json.dumps({'content': ARTICLE}), json.dumps({'content': 'line\u2028separator'}, ensure_ascii=False),
+             '', 'not json']
+    status, content_type, body = request(conn, 'POST', '/score', '\n'.join(lines).encode('utf-8'),
+                                         {'Content-Type': 'application/x-ndjson'})
+    assert status == 200
+    assert content_type == 'application/x-ndjson'
+    records = [json.loads(line) for line in body.decode('utf-8').splitlines()]
+    assert len(records) == 3
+    assert records[0]['confidence'] == analyze_content(ARTICLE)[0]
+    assert records[1]['confidence'] == analyze_content('line\u2028separator')[0]
+    assert records[2]['line'] == 4 and 'error' in records[2]
+
+def test_invalid_json_is_a_bad_request(conn):
+    status, _, body = request(conn, 'POST', '/score', b'{not json', {'Content-Type': 'application/json'})
+    assert status == 400
+    assert 'error' in json.loads(body)
+
+def test_unknown_paths(conn):
+    assert request(conn, 'GET', '/nothing')[0] == 404
+
+def test_missing_content_length(server):
+    assert raw_request(server, b'POST /score HTTP/1.1\r\nHost: x\r\n\r\n') == b'HTTP/1.1 411 Length Required'
+
+def test_negative_content_length(server):
+    reply = raw_request(server, b'POST /score HTTP/1.1\r\nHost: x\r\nContent-Length: -1\r\n\r\n{}')
+    assert reply == b'HTTP/1.1 400 Bad Request'
+
+def test_oversized_body(server):
+    headers = f'POST /score HTTP/1.1\r\nHost: x\r\nContent-Length: {MAX_BODY_BYTES + 1}\r\n\r\n'
+    assert raw_request(server, headers.encode('ascii')) == b'HTTP/1.1 413 Request Entity Too Large'
+
+def test_metrics_count_requests(conn):
+    request(conn, 'POST', '/score', json.dumps({'content': ARTICLE}), {'Content-Type': 'application/json'})
+    status, content_type, body = request(conn, 'GET', '/metrics')
+    assert status == 200
+    assert content_type.startswith('text/plain')
+    assert b'score' in body
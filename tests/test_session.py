@@ -0,0 +1,17 @@
+from truthguard.session import DocumentTables
+
+def test_document_tables_drop_the_least_recently_used():
+    tables = DocumentTables(max_entries=2)
+    first, second = tables.put('first'), tables.put('second')
+    assert first != second
+    assert tables.get(first) == ('first', {})
+    third = tables.put('third')
+    # The first table was read after the second was added, so the second goes
+    assert tables.get(second) is None
+    assert [tables.get(key)[0] for key in (first, third)] == ['first', 'third']
+
+def test_document_tables_keep_exports_with_the_table():
+    tables = DocumentTables()
+    key = tables.put('results')
+    tables.get(key)[1]['CSV'] = b'row'
+    assert tables.get(key) == ('results', {'CSV': b'row'})
@@ -0,0 +1,126 @@
+import os
+import random
+import sqlite3
+
+import pytest
+
+from tests.generators import edit, topic_article
+from truthguard.importer import SCHEMA
+from truthguard.shards import ShardedDatabase, default_db_paths
+
+def build_shard(path, true_news=(), false_news=(), domains=()):
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    conn.executemany('INSERT INTO known_true_news (title, content) VALUES (?, ?)', true_news)
+    conn.executemany('INSERT INTO known_false_news (title, content) VALUES (?, ?)', false_news)
+    conn.executemany('INSERT INTO credibility_sources (domain, credibility_score) VALUES (?, ?)', domains)
+    conn.commit()
+    conn.close()
+    return str(path)
+
+@pytest.fixture
+def texts():
+    rng = random.Random(4)
+    return [topic_article(rng) for _ in range(4)]
+
+@pytest.fixture
+def sharded():
+    databases = []
+    yield lambda paths, **kwargs: databases.append(ShardedDatabase(paths, **kwargs)) or databases[-1]
+    for database in databases:
+        database.close()
+
+def test_article_in_several_shards_is_reported_once(tmp_path, texts, sharded):
+    shared = ('Shared', texts[0])
+    first = build_shard(tmp_path / 'news_detector.db', true_news=[shared, ('Other', texts[1])])
+    second = build_shard(tmp_path / 'example_news.db', false_news=[shared], true_news=[('Third', texts[2])])
+    
+    matches = sharded([first, second], precedence=[]).match(texts[0])
+    assert [(match['title'], match['shard'], match['is_true']) for match in matches] == [
+        ('Shared', 'news_detector', 1)
+    ]
+    # With the precedence reversed the copy comes from the other shard
+    matches = sharded([first, second], precedence=['example_news']).match(texts[0])
+    assert [(match['title'], match['shard'], match['is_true']) for match in matches] == [
+        ('Shared', 'example_news', 0)
+    ]
+
+def test_matches_are_merged_by_similarity(tmp_path, texts, sharded):
+    rng = random.Random(5)
+    close, far = edit(rng, texts[0], 3), edit(rng, texts[0], 25)
+    first = build_shard(tmp_path / 'news_detector.db', true_news=[('Far', far), ('Unrelated', texts[1])])
+    second = build_shard(tmp_path / 'example_news.db', true_news=[('Close', close)])
+    third = build_shard(tmp_path / 'custom_news_detector.db', false_news=[('Exact', texts[0])])
+    
+    matches = sharded([first, second, third]).match(texts[0], limit=2)
+    assert [(match['title'], match['shard']) for match in matches] == [
+        ('Exact', 'custom_news_detector'), ('Close', 'example_news')
+    ]
+    similarities = [match['similarity'] for match in matches]
+    assert similarities == sorted(similarities, reverse=True)
+
+def test_credibility_takes_the_first_shard_listing_a_domain(tmp_path, sharded):
+    first = build_shard(tmp_path / 'news_detector.db', domains=[('example.org', 0.9)])
+    second = build_shard(tmp_path / 'example_news.db', domains=[('example.org', 0.1), ('www.other.net', 0.4)])
+    
+    database = sharded([first, second], precedence=[])
+    assert database.credibility_scores(['news.example.org', 'other.net']) == {'example.org': 0.9, 'other.net': 0.4}
+    database = sharded([first, second], precedence=['example_news'])
+    assert database.credibility_scores(['example.org'])['example.org'] == 0.1
+
+def test_failing_shard_is_counted_and_left_out(tmp_path, texts, sharded):
+    good = build_shard(tmp_path / 'news_detector.db', true_news=[('Kept', texts[0])], domains=[('example.org', 0.7)])
+    broken = tmp_path / 'broken.db'
+    broken.write_bytes(b'not a database' * 100)
+    
+    database = sharded([good, str(broken)])
+    assert [match['title'] for match in database.match(texts[0])] == ['Kept']
+    assert database.credibility_scores(['example.org']) == {'example.org': 0.7}
+    errors = {(row['shard'], row['lookup']): row['errors'] for row in database.stats()}
+    assert errors[('broken', 'known match')] == 1
+    assert errors[('news_detector', 'known match')] == 0
+
+@pytest.mark.parametrize('error', [OSError('disk'), ValueError('bad signature')])
+def test_shard_raising_other_errors_is_left_out(tmp_path, texts, sharded, monkeypatch, error):
+    first = build_shard(tmp_path / 'news_detector.db', true_news=[('Kept', texts[0])])
+    second = build_shard(tmp_path / 'example_news.db', true_news=[('Lost', texts[0])])
+    database = sharded([first, second])
+    
+    def failing_match(signature, limit):
+        raise error
+    monkeypatch.setattr(database.shards[1], 'match', failing_match)
+    assert [match['title'] for match in database.match(texts[0])] == ['Kept']
+    errors = {(row['shard'], row['lookup']): row['errors'] for row in database.stats()}
+    assert errors[('example_news', 'known match')] == 1
+
+def test_articles_sharing_a_title_are_told_apart_by_content(tmp_path, texts, sharded):
+    # The signature ignores case, so both are exact matches with the same title
+    first = build_shard(tmp_path / 'news_detector.db', true_news=[('Untitled', texts[0])])
+    second = build_shard(tmp_path / 'example_news.db', false_news=[('Untitled', texts[0].upper())])
+    
+    matches = sharded([first, second], precedence=[]).match(texts[0])
+    assert [(match['shard'], match['similarity']) for match in matches] == [
+        ('news_detector', 1.0), ('example_news', 1.0)
+    ]
+
+def test_credibility_is_reloaded_when_any_shard_changes(tmp_path, sharded):
+    first = build_shard(tmp_path / 'news_detector.db', domains=[('example.org', 0.9)])
+    second = build_shard(tmp_path / 'example_news.db')
+    database = sharded([first, second], refresh_seconds=0)
+    assert database.credibility_scores(['nasa.gov']) == {}
+    
+    conn = sqlite3.connect(second)
+    conn.execute("INSERT INTO credibility_sources (domain, credibility_score) VALUES ('nasa.gov', 0.95)")
+    conn.commit()
+    conn.close()
+    mtime = os.path.getmtime(second) + 10
+    os.utime(second, (mtime, mtime))
+    assert database.credibility_scores(['www.nasa.gov', 'example.org']) == {'nasa.gov': 0.95, 'example.org': 0.9}
+
+def test_default_db_paths(tmp_path):
+    for name in ('custom_news_detector.db', 'analysis_cache.db', 'news_detector.db', 'example_news.db'):
+        (tmp_path / name).touch()
+    assert [os.path.basename(path) for path in default_db_paths(str(tmp_path))] == [
+        'news_detector.db', 'custom_news_detector.db', 'example_news.db'
+    ]
+
@@ -0,0 +1,43 @@
+import io
+import random
+
+import pytest
+
+from tests.generators import article
+from truthguard.analysis import analyze_content, extract_features
+from truthguard.streaming import StreamingAnalyzer, analyze_file, iter_text_chunks
+
+TRICKY = (
+    'BREAKING!!!?? "A quote\r\nacross lines" and "another" according to the   officials, '
+    '(Reuters, March 2021) see https://example.org/a?b=1 — scientists hate this hoax. '
+    'İSTANBUL ſcam ıt "unclosed (Smith 20'
+)
+
+def streamed_features(text, size):
+    analyzer = StreamingAnalyzer()
+    for start in range(0, len(text), size):
+        analyzer.feed(text[start:start + size])
+    return analyzer.features()
+
+@pytest.mark.parametrize('size', [1, 2, 3, 5, 8, 13, 64])
+def test_chunked_features_equal_extract_features(size):
+    assert streamed_features(TRICKY, size) == extract_features(TRICKY)
+
+def test_generated_articles_at_random_chunk_sizes():
+    rng = random.Random(5)
+    for _ in range(30):
+        text = article(rng, rng.choice([200, 2000, 20000]))
+        assert streamed_features(text, rng.randint(1, 500)) == extract_features(text)
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 1 << 20])
+def test_analyze_file_equals_analyze_content(chunk_size):
+    data = TRICKY.encode('utf-8')
+    assert analyze_file(io.BytesIO(data), chunk_size=chunk_size) == analyze_content(TRICKY)
+
+def test_normalized_chunks_join_a_split_crlf():
+    chunks = list(iter_text_chunks(io.BytesIO(b'a\r\nb\rc'), chunk_size=2))
+    assert ''.join(chunks) == 'a\nb\nc'
+
+def test_raw_chunks_keep_line_endings():
+    chunks = list(iter_text_chunks(io.BytesIO('é\r\nb'.encode('utf-8')), chunk_size=1, normalize=False))
+    assert ''.join(chunks) == 'é\r\nb'
@@ -0,0 +1,10 @@
+"""TruthGuard fake news detection toolkit"""
+
+# The scoring functions are loaded on first use, so importing a submodule stays cheap
+SCORING_EXPORTS = ('analyze_content', 'analyze_sentiment', 'count_sources')
+
+def __getattr__(name):
+    if name in SCORING_EXPORTS:
+        from truthguard import analysis
+        return getattr(analysis, name)
+    raise AttributeError(f"module 'truthguard' has no attribute {name!r}")
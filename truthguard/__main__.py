@@ -0,0 +1,5 @@
+import sys
+
+from truthguard.cli import main
+
+sys.exit(main())
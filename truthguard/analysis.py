@@ -0,0 +1,414 @@
+"""Heuristic scoring core for TruthGuard, free of any Streamlit dependency"""
+import hashlib
+import json
+import re
+from collections.abc import Mapping
+
+# Indicator lexicons shared by every analysis call and every session, as tuples so none can change them
+FAKE_NEWS_INDICATORS = (
+    'conspiracy', 'hoax', 'fraud', 'scam', 'fake', 
+    'clickbait', 'shocking', 'you won\'t believe', 
+    'secret', 'they don\'t want you to know',
+    'miraculous', 'cure', 'exclusive', 'anonymous sources',
+    'hidden truth', 'cover-up', 'what they don\'t tell you',
+    'mainstream media won\'t report', 'doctors hate this',
+    'one weird trick', 'without a prescription', 'banned',
+    'censored', 'the truth about', 'they refused to publish',
+    'what the government doesn\'t want you to know',
+    'shocking revelation', 'suppressed', 'exposed',
+    'wake up', 'sheeple', 'mind control', 'plandemic'
+)
+
+TRUTH_INDICATORS = (
+    'research', 'study', 'evidence', 'according to experts',
+    'scientists', 'verified', 'official', 'fact check',
+    'investigation', 'confirmed', 'source', 'data',
+    'peer-reviewed', 'published in', 'journal', 'university',
+    'professor', 'expert', 'analyzed', 'statistics',
+    'survey', 'clinical trial', 'experiment', 'meta-analysis',
+    'research paper', 'findings suggest', 'evidence indicates',
+    'researchers found', 'according to the study',
+    'multiple sources confirmed', 'citation', 'reference',
+    'statistical significance', 'correlation', 'causation'
+)
+
+WEASEL_WORDS = ('may', 'might', 'could', 'possibly', 'allegedly', 'reportedly', 
+                'some say', 'they say', 'many people', 'sources say', 'rumored', 
+                'supposedly')
+
+FACTUAL_PHRASES = ('according to', 'stated that', 'reported by', 'confirms that', 'found that')
+
+POSITIVE_WORDS = ('good', 'great', 'excellent', 'positive', 'happy', 'wonderful', 'beneficial')
+NEGATIVE_WORDS = ('bad', 'terrible', 'awful', 'negative', 'sad', 'horrible', 'harmful')
+
+# Lowercased characters that re.IGNORECASE still treats as ASCII letters
+CASELESS_CHARS = str.maketrans({'\u0131': 'i', '\u017f': 's'})
+
+# Structural patterns, shared with the vectorized batch scorer
+URL_PATTERN = r'(https?://[^\s]+)'
+CITATION_PATTERN = r'\([^)]*\d{4}[^)]*\)'
+ACCORDING_TO_PATTERN = r'according to [^,.]+'
+WORD_PATTERN = r'\b\w+\b'
+UPPERCASE_PATTERN = r'[A-Z]'
+PUNCTUATION_RUN_PATTERN = r'[!?]{2,}'
+QUOTE_PATTERN = r'[""][^""]+[""]'
+
+def build_trie_pattern(phrases):
+    """Build a regex alternation shaped as a prefix trie, preferring the longest phrase"""
+    trie = {}
+    for phrase in phrases:
+        node = trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[''] = {}
+    
+    def render(node):
+        branches = [re.escape(char) + render(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return f'(?:{body})?' if '' in node else body
+    
+    return render(trie)
+
+class IndicatorMatcher:
+    """Count matches for several lexicons in a single scan of lowercased text.
+    
+    Each lexicon entry is counted exactly as its own
+    re.findall(r'\\b<phrase>\\b', text, re.IGNORECASE) would count it, or without
+    the word boundaries for lexicons that are not word-bounded.
+    """
+    
+    def __init__(self, lexicons):
+        self.names = list(lexicons)
+        self.entries = {}
+        entry_id = 0
+        for name, (phrases, word_bounded) in lexicons.items():
+            for phrase in phrases:
+                pattern = re.escape(phrase)
+                if word_bounded:
+                    pattern = r'\b' + pattern + r'\b'
+                self.entries.setdefault(phrase, []).append((entry_id, name, re.compile(pattern)))
+                entry_id += 1
+        
+        # Every phrase that matches where a longer one does is a prefix of it
+        self.prefix_chains = {
+            phrase: [other for other in self.entries if phrase.startswith(other)]
+            for phrase in self.entries
+        }
+        self.max_length = max(len(phrase) for phrase in self.entries)
+        self.scanner = re.compile('(?=(' + build_trie_pattern(self.entries) + '))')
+    
+    def count(self, lower_text):
+        """Return a dict of match counts per lexicon name"""
+        counts = dict.fromkeys(self.names, 0)
+        self.scan(lower_text.translate(CASELESS_CHARS), counts, {})
+        return counts
+    
+    def scan(self, text, counts, last_end, start=0, end=None, offset=0):
+        """Add the matches starting in text[start:end] to counts.
+        
+        text must already be lowercased and translated with CASELESS_CHARS.
+        last_end maps each entry to the end of its last counted match, shifted
+        by offset, so a long stream can be scanned one window at a time.
+        """
+        for match in self.scanner.finditer(text, start):
+            position = match.start()
+            if end is not None and position >= end:
+                break
+            for phrase in self.prefix_chains[match.group(1)]:
+                for entry_id, name, pattern in self.entries[phrase]:
+                    # findall never reports overlapping matches of the same entry
+                    if offset + position < last_end.get(entry_id, 0):
+                        continue
+                    entry_match = pattern.match(text, position)
+                    if entry_match:
+                        counts[name] += 1
+                        last_end[entry_id] = offset + entry_match.end()
+
+INDICATOR_MATCHER = IndicatorMatcher({
+    'fake': (FAKE_NEWS_INDICATORS, True),
+    'truth': (TRUTH_INDICATORS, True),
+    'weasel': (WEASEL_WORDS, True),
+    'factual': (FACTUAL_PHRASES, False),
+    'positive': (POSITIVE_WORDS, True),
+    'negative': (NEGATIVE_WORDS, True),
+})
+
+# Bump whenever the confidence ladder in analyze_content or the stored form of its metrics changes
+SCORING_REVISION = 2
+
+# Stamp identifying the scoring rules, so stored results can be invalidated
+SCORING_RULES_VERSION = f"{SCORING_REVISION}-" + hashlib.sha1(json.dumps([
+    FAKE_NEWS_INDICATORS, TRUTH_INDICATORS, WEASEL_WORDS,
+    FACTUAL_PHRASES, POSITIVE_WORDS, NEGATIVE_WORDS
+]).encode('utf-8')).hexdigest()[:12]
+
+def sentiment_label(positive_count, negative_count):
+    """Map positive/negative word counts to a sentiment label"""
+    if positive_count > negative_count:
+        return 'Positive'
+    elif negative_count > positive_count:
+        return 'Negative'
+    else:
+        return 'Neutral'
+
+def credibility_label(mean_score, known_count):
+    """Describe the mean credibility score of the known domains an article cites"""
+    return f"{mean_score:.2f} across {known_count} known domain{'s' if known_count != 1 else ''}"
+
+def known_match_label(similarity, is_true, title):
+    """Describe the closest known article to an analyzed one"""
+    return f"{similarity * 100:.0f}% similar to known {'true' if is_true else 'false'} news \"{title}\""
+
+# Display value of each metric, computed from the raw values when it is read
+METRIC_FORMATS = {
+    'content_length': lambda metrics: f"{metrics.word_count} words",
+    'fake_indicators': lambda metrics: metrics.fake,
+    'truth_indicators': lambda metrics: metrics.truth,
+    'sentiment': lambda metrics: sentiment_label(metrics.positive, metrics.negative),
+    'sources_count': lambda metrics: metrics.sources,
+    'weasel_words': lambda metrics: metrics.weasel,
+    'factual_phrases': lambda metrics: metrics.factual,
+    'all_caps': lambda metrics: f"{metrics.upper_case_ratio * 100:.1f}%",
+}
+
+# Metrics added after scoring, also kept raw; None means nothing was found
+EXTRA_FORMATS = {
+    'engine': lambda value: value,
+    'source_credibility': lambda value: credibility_label(*value) if value else "No known sources",
+    'known_match': lambda value: known_match_label(*value) if value else "None",
+    'pages': lambda value: value,
+}
+
+# Raw values of a Metrics record, in the order its constructor takes them
+CORE_FIELDS = ('word_count', 'fake', 'truth', 'positive', 'negative', 'sources', 'weasel', 'factual',
+               'upper_case_ratio')
+
+class Metrics(Mapping):
+    """The metrics of one analysis, kept as raw counts and formatted when read.
+    
+    It reads as the dict of display values analyze_content has always
+    returned, but holds a few numbers instead of a dict of strings, so the
+    results kept by the caches and by every session stay small. Metrics
+    added after scoring, such as source credibility, have a slot each that
+    stays unset until with_values returns a copy that sets it.
+    """
+    
+    __slots__ = CORE_FIELDS + tuple(EXTRA_FORMATS)
+    
+    def __init__(self, word_count, fake, truth, positive, negative, sources, weasel, factual,
+                 upper_case_ratio):
+        self.word_count = word_count
+        self.fake = fake
+        self.truth = truth
+        self.positive = positive
+        self.negative = negative
+        self.sources = sources
+        self.weasel = weasel
+        self.factual = factual
+        self.upper_case_ratio = upper_case_ratio
+    
+    def __getitem__(self, name):
+        if name in METRIC_FORMATS:
+            return METRIC_FORMATS[name](self)
+        if name in EXTRA_FORMATS and hasattr(self, name):
+            return EXTRA_FORMATS[name](getattr(self, name))
+        raise KeyError(name)
+    
+    def __iter__(self):
+        yield from METRIC_FORMATS
+        yield from self.extra()
+    
+    def __len__(self):
+        return len(METRIC_FORMATS) + len(self.extra())
+    
+    def __repr__(self):
+        return f"Metrics({dict(self)!r})"
+    
+    def extra(self):
+        """Raw values of the metrics added after scoring"""
+        return {name: getattr(self, name) for name in EXTRA_FORMATS if hasattr(self, name)}
+    
+    def with_values(self, **values):
+        """A copy with the given raw extra metrics set"""
+        unknown = set(values) - set(EXTRA_FORMATS)
+        if unknown:
+            raise KeyError(f"Unknown metrics: {', '.join(sorted(unknown))}")
+        metrics = Metrics(*(getattr(self, name) for name in CORE_FIELDS))
+        for name, value in dict(self.extra(), **values).items():
+            setattr(metrics, name, value)
+        return metrics
+    
+    def raw(self):
+        """The raw values as a JSON-serializable list, for Metrics.from_raw"""
+        return [getattr(self, name) for name in CORE_FIELDS] + [self.extra()]
+    
+    @classmethod
+    def from_raw(cls, raw):
+        """Rebuild Metrics from the list raw returned, after a round trip through JSON"""
+        *counts, extra = raw
+        return cls(*counts).with_values(**{
+            name: tuple(value) if isinstance(value, list) else value for name, value in extra.items()
+        })
+
+def analyze_sentiment(text):
+    """Simple sentiment analysis function"""
+    counts = INDICATOR_MATCHER.count(text.lower())
+    return sentiment_label(counts['positive'], counts['negative'])
+
+def count_sources(text):
+    """Count potential sources in the text"""
+    source_count = 0
+    
+    # Count URLs
+    urls = re.findall(URL_PATTERN, text)
+    source_count += len(urls)
+    
+    # Count citation patterns like (Author, 2020)
+    citations = re.findall(CITATION_PATTERN, text)
+    source_count += len(citations)
+    
+    # Count "according to" phrases
+    according_to = re.findall(ACCORDING_TO_PATTERN, text, re.IGNORECASE)
+    source_count += len(according_to)
+    
+    return source_count
+
+def normalize_content(content):
+    """Unify line endings so pasted and uploaded copies of an article match"""
+    return content.replace('\r\n', '\n').replace('\r', '\n')
+
+def structure_features(content):
+    """Length, word, capital letter, punctuation run and quotation counts"""
+    return {
+        'length': len(content),
+        'word_count': len(re.findall(WORD_PATTERN, content)),
+        'upper_case_count': len(re.findall(UPPERCASE_PATTERN, content)),
+        'excessive_punctuation': len(re.findall(PUNCTUATION_RUN_PATTERN, content)),
+        'quote_count': len(re.findall(QUOTE_PATTERN, content)),
+    }
+
+def extract_features(content):
+    """Count the raw signals that score_features turns into a verdict"""
+    # Convert content to lowercase for case-insensitive matching
+    lower_content = content.lower()
+    
+    # Count every lexicon in a single pass over the text
+    features = INDICATOR_MATCHER.count(lower_content)
+    
+    # Content structure checks
+    features.update(structure_features(content))
+    features['source_count'] = count_sources(content)
+    
+    return features
+
+def score_features(features):
+    """Turn extracted feature counts into a confidence score and metrics"""
+    # Starting with a baseline confidence of 65%
+    true_confidence = 65
+    
+    # Fake news indicators, and truth indicators with 3x weight
+    fake_score = features['fake']
+    truth_score = features['truth'] * 3
+    
+    # Calculate indicator-based adjustment
+    total_indicators = fake_score + (truth_score / 3)  # Use original count for total
+    
+    if total_indicators > 0:
+        # Calculate percentage of truth indicators
+        truth_percentage = (truth_score / 3) / total_indicators
+        
+        # Adjust confidence based on indicators ratio
+        if truth_percentage >= 0.7:
+            # Strong truth indicators
+            true_confidence += 20
+        elif truth_percentage >= 0.5:
+            # Moderate truth indicators
+            true_confidence += 10
+        elif truth_percentage <= 0.3:
+            # Strong fake indicators
+            true_confidence -= 35
+        elif truth_percentage <= 0.5:
+            # Moderate fake indicators
+            true_confidence -= 20
+    
+    # Adjust for content length
+    word_count = features['word_count']
+    
+    if word_count < 20:
+        true_confidence -= 15  # Very short content is suspicious
+    elif word_count > 100:
+        true_confidence += 10  # Longer, more detailed content is more likely true
+    
+    # Check for excessive use of capital letters (shouting)
+    length = features['length']
+    upper_case_ratio = features['upper_case_count'] / length if length > 0 else 0
+    
+    if upper_case_ratio > 0.3 and length > 50:
+        true_confidence -= 25  # Heavily reduce confidence if excessive caps
+    elif upper_case_ratio > 0.2 and length > 50:
+        true_confidence -= 15  # Moderate reduction for somewhat high caps
+    
+    # Check for excessive punctuation (!!!???)
+    excessive_punctuation = features['excessive_punctuation']
+    
+    if excessive_punctuation > 3:
+        true_confidence -= 25  # Heavy penalty for very excessive punctuation
+    elif excessive_punctuation > 1:
+        true_confidence -= 15  # Moderate penalty for some excessive punctuation
+    
+    # Check for weasel words (may, might, could, possibly, allegedly)
+    weasel_count = features['weasel']
+    
+    # Adjust for weasel words
+    if weasel_count > 4:
+        true_confidence -= 20  # Heavy reduction for many weasel words
+    elif weasel_count > 2:
+        true_confidence -= 10  # Moderate reduction for some weasel words
+    elif weasel_count == 0 and word_count > 50:
+        true_confidence += 10  # Boost for clear, direct statements with no weasel words
+    
+    # Check for source citations
+    source_count = features['source_count']
+    
+    if source_count >= 3:
+        true_confidence += 20  # Strong boost for multiple sources
+    elif source_count >= 1:
+        true_confidence += 15  # Moderate boost for at least one source
+    
+    # Additional checks for factual language patterns
+    factual_count = features['factual']
+    
+    if factual_count >= 2:
+        true_confidence += 15  # Boost for multiple factual phrases
+    elif factual_count >= 1:
+        true_confidence += 10  # Smaller boost for at least one factual phrase
+    
+    # Check for quotations (often a sign of legitimate reporting)
+    quote_count = features['quote_count']
+    
+    if quote_count >= 2:
+        true_confidence += 10  # Boost for multiple quotations
+    elif quote_count >= 1:
+        true_confidence += 5  # Smaller boost for at least one quotation
+    
+    # Round to 2 decimal places
+    true_confidence = round(true_confidence * 100) / 100
+    
+    # Ensure confidence is within bounds
+    true_confidence = max(0, min(100, true_confidence))
+    
+    # Raw metric values, formatted only when they are displayed
+    metrics = Metrics(
+        word_count, fake_score,
+        round(truth_score / 3),  # Display the original count
+        features['positive'], features['negative'], source_count, weasel_count, factual_count,
+        upper_case_ratio
+    )
+    
+    return true_confidence, metrics
+
+def analyze_content(content):
+    """Main analysis function to determine truthfulness of content"""
+    return score_features(extract_features(content))
@@ -0,0 +1,305 @@
+"""Vectorized scoring of whole article corpora with pandas and NumPy.
+
+A batch of texts is joined into one string with a separator character
+after each text, and every feature is counted over the whole string at
+once. Word, capital letter and punctuation run counts come from NumPy
+masks over the string's code points. The other structural patterns run
+once over the joined string, each match replaced with a marker character
+that NumPy then counts. Lexicon phrases are found in one regex pass over
+the lowercased string, and the phrases they contain are checked for word
+boundaries and overlaps as arrays. Counts are split between texts at the
+separators, and every count equals what analyze_content finds in each
+text on its own.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+from truthguard.analysis import (
+    ACCORDING_TO_PATTERN,
+    CASELESS_CHARS,
+    CITATION_PATTERN,
+    INDICATOR_MATCHER,
+    QUOTE_PATTERN,
+    URL_PATTERN,
+    build_trie_pattern,
+)
+
+SEPARATOR = '\x00'
+MARKER = '\x01'
+
+# Separator and marker characters inside a text become another control character,
+# which every pattern treats the same way
+CONTROL_CHARS = str.maketrans({SEPARATOR: '\x02', MARKER: '\x02'})
+
+# Texts are joined into strings of about this many characters
+BATCH_CHARS = 1 << 20
+
+# Which ASCII code points re counts as \w
+ASCII_WORD_CHARS = np.array([bool(re.match(r'\w', chr(code))) for code in range(128)])
+
+def bounded(pattern, flags=0):
+    """Compile a structural pattern so that no match runs across a separator"""
+    return re.compile(pattern.replace('[^', '[^\\x00'), flags)
+
+# Patterns counted with markers, all adding to the feature named first
+MARKED_PATTERNS = [
+    ('quote_count', bounded(QUOTE_PATTERN)),
+    ('source_count', bounded(URL_PATTERN)),
+    ('source_count', bounded(CITATION_PATTERN)),
+    ('source_count', bounded(ACCORDING_TO_PATTERN, re.IGNORECASE)),
+]
+
+def code_points(text):
+    return np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+
+def word_chars(codes):
+    """Mask of the code points matched by \\w"""
+    mask = ASCII_WORD_CHARS[np.minimum(codes, 127)]
+    other = codes >= 128
+    if other.any():
+        unique, inverse = np.unique(codes[other], return_inverse=True)
+        words = np.array([bool(re.match(r'\w', chr(code))) for code in unique])
+        mask[other] = words[inverse]
+    return mask
+
+def run_bounds(mask):
+    """Start and end indexes of each run of True values in mask"""
+    edges = np.diff(mask.astype(np.int8), prepend=0, append=0)
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+def counts_per_text(positions, separators):
+    """How many of the sorted positions fall in each text"""
+    return np.diff(np.searchsorted(positions, separators), prepend=0)
+
+class LexiconScanner:
+    """Find the lexicon entries of IndicatorMatcher in a joined string of texts.
+    
+    The longest phrase at each position is found with one consuming regex
+    pass; where another phrase could start inside a match, that position is
+    checked separately. Each found phrase stands for every entry it starts
+    with, whose word boundaries and overlaps are then checked as arrays.
+    """
+    
+    def __init__(self, matcher):
+        self.names = matcher.names
+        self.phrases = list(matcher.entries)
+        self.pattern = re.compile(build_trie_pattern(self.phrases))
+        self.at_position = matcher.scanner
+        self.phrase_ids = {phrase: number for number, phrase in enumerate(self.phrases)}
+        
+        # Offsets inside each phrase where another phrase could match
+        self.inner_offsets = {
+            phrase: [offset for offset in range(1, len(phrase))
+                     if any(other.startswith(phrase[offset:]) or phrase[offset:].startswith(other)
+                            for other in self.phrases)]
+            for phrase in self.phrases
+        }
+        
+        # Entries of each phrase's prefix chain, as slices of flat entry arrays
+        entries, first, sizes = [], [], []
+        for phrase in self.phrases:
+            first.append(len(entries))
+            for prefix in matcher.prefix_chains[phrase]:
+                for entry_id, name, pattern in matcher.entries[prefix]:
+                    entries.append((entry_id, self.names.index(name), len(prefix), pattern.pattern.startswith(r'\b')))
+            sizes.append(len(entries) - first[-1])
+        self.chain_first = np.array(first)
+        self.chain_sizes = np.array(sizes)
+        self.entry_ids, self.lexicons, self.lengths, self.word_bounded = (np.array(column) for column in zip(*entries))
+    
+    def phrase_starts(self, text):
+        """Position and phrase id of the longest phrase starting at each position that has one"""
+        found = {}
+        for match in self.pattern.finditer(text):
+            pending = [(match.start(), match.group())]
+            while pending:
+                start, phrase = pending.pop()
+                if start in found:
+                    continue
+                found[start] = self.phrase_ids[phrase]
+                for offset in self.inner_offsets[phrase]:
+                    inner = self.at_position.match(text, start + offset)
+                    if inner:
+                        pending.append((start + offset, inner.group(1)))
+        positions = np.fromiter(found, dtype=np.int64, count=len(found))
+        phrase_ids = np.fromiter(found.values(), dtype=np.int64, count=len(found))
+        order = np.argsort(positions, kind='stable')
+        return positions[order], phrase_ids[order]
+    
+    def matches(self, text, words):
+        """Position and lexicon number of every entry match, as IndicatorMatcher.scan counts them"""
+        positions, phrase_ids = self.phrase_starts(text)
+        sizes = self.chain_sizes[phrase_ids]
+        starts = np.repeat(positions, sizes)
+        within_chain = np.arange(sizes.sum()) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+        entries = np.repeat(self.chain_first[phrase_ids], sizes) + within_chain
+        ends = starts + self.lengths[entries]
+        
+        # \b holds where the characters either side differ in being word characters
+        padded = np.concatenate(([False], words, [False]))
+        boundary = lambda index: padded[index] != padded[index + 1]
+        valid = ~self.word_bounded[entries] | (boundary(starts) & boundary(ends))
+        starts, entries, ends = starts[valid], entries[valid], ends[valid]
+        
+        # An entry's match overlapping its previous one isn't counted; that needs a phrase
+        # that starts as it ends, so such entries are settled one match at a time
+        order = np.lexsort((starts, self.entry_ids[entries]))
+        starts, entries, ends = starts[order], entries[order], ends[order]
+        same_entry = np.concatenate(([False], self.entry_ids[entries[1:]] == self.entry_ids[entries[:-1]]))
+        overlapping = same_entry & (starts < np.concatenate(([0], ends[:-1])))
+        keep = np.ones(len(starts), dtype=bool)
+        for entry_id in np.unique(self.entry_ids[entries[overlapping]]):
+            last_end = 0
+            for index in np.flatnonzero(self.entry_ids[entries] == entry_id):
+                keep[index] = starts[index] >= last_end
+                if keep[index]:
+                    last_end = ends[index]
+        
+        starts, entries = starts[keep], entries[keep]
+        order = np.argsort(starts, kind='stable')
+        return starts[order], self.lexicons[entries[order]]
+
+LEXICON_SCANNER = LexiconScanner(INDICATOR_MATCHER)
+
+def joined_features(texts):
+    """Feature columns for a list of texts, counted over one joined string"""
+    joined = SEPARATOR.join(texts) + SEPARATOR
+    if MARKER in joined or joined.count(SEPARATOR) != len(texts):
+        joined = SEPARATOR.join(text.translate(CONTROL_CHARS) for text in texts) + SEPARATOR
+    
+    codes = code_points(joined)
+    separators = np.flatnonzero(codes == 0)
+    word_starts, _ = run_bounds(word_chars(codes))
+    punctuation_starts, punctuation_ends = run_bounds((codes == ord('!')) | (codes == ord('?')))
+    features = {
+        'length': np.diff(separators, prepend=-1) - 1,
+        'word_count': counts_per_text(word_starts, separators),
+        'upper_case_count': counts_per_text(np.flatnonzero((codes >= ord('A')) & (codes <= ord('Z'))), separators),
+        'excessive_punctuation': counts_per_text(punctuation_starts[punctuation_ends - punctuation_starts >= 2],
+                                                 separators),
+    }
+    for name, pattern in MARKED_PATTERNS:
+        marked = code_points(pattern.sub(MARKER, joined))
+        counts = counts_per_text(np.flatnonzero(marked == 1), np.flatnonzero(marked == 0))
+        features[name] = features[name] + counts if name in features else counts
+    
+    # Lowercasing can change the length of a text, so its separators are found again
+    lower = joined.lower().translate(CASELESS_CHARS)
+    lower_codes = code_points(lower)
+    lower_separators = separators if len(lower) == len(joined) else np.flatnonzero(lower_codes == 0)
+    positions, lexicons = LEXICON_SCANNER.matches(lower, word_chars(lower_codes))
+    text_index = np.searchsorted(lower_separators, positions)
+    for number, name in enumerate(LEXICON_SCANNER.names):
+        features[name] = np.bincount(text_index[lexicons == number], minlength=len(texts))
+    return features
+
+def extract_features(texts):
+    """Count the raw analysis features for every text in a Series"""
+    columns = []
+    batch, batch_chars = [], 0
+    for text in texts:
+        batch.append(text)
+        batch_chars += len(text) + 1
+        if batch_chars >= BATCH_CHARS:
+            columns.append(joined_features(batch))
+            batch, batch_chars = [], 0
+    if batch:
+        columns.append(joined_features(batch))
+    
+    names = ['length', 'word_count', 'upper_case_count', 'excessive_punctuation', 'source_count',
+             'quote_count'] + INDICATOR_MATCHER.names
+    return pd.DataFrame({
+        name: np.concatenate([part[name] for part in columns]) if columns else np.zeros(0, dtype=np.int64)
+        for name in names
+    }, index=texts.index)
+
+def score_features(features):
+    """Apply the analyze_content confidence ladder to feature columns"""
+    fake = features['fake'].to_numpy()
+    truth = features['truth'].to_numpy()
+    word_count = features['word_count'].to_numpy()
+    length = features['length'].to_numpy()
+    weasel = features['weasel'].to_numpy()
+    sources = features['source_count'].to_numpy()
+    factual = features['factual'].to_numpy()
+    quotes = features['quote_count'].to_numpy()
+    punctuation = features['excessive_punctuation'].to_numpy()
+    
+    confidence = np.full(len(features), 65, dtype=np.int64)
+    
+    # Indicator ratio
+    total_indicators = fake + truth
+    with np.errstate(divide='ignore', invalid='ignore'):
+        truth_percentage = np.where(total_indicators > 0, truth / total_indicators, np.nan)
+    confidence += np.select(
+        [truth_percentage >= 0.7, truth_percentage >= 0.5,
+         truth_percentage <= 0.3, truth_percentage <= 0.5],
+        [20, 10, -35, -20],
+        default=0
+    )
+    
+    # Content length
+    confidence += np.select([word_count < 20, word_count > 100], [-15, 10], default=0)
+    
+    # Excessive capitals
+    with np.errstate(divide='ignore', invalid='ignore'):
+        upper_case_ratio = np.where(length > 0, features['upper_case_count'].to_numpy() / length, 0.0)
+    confidence += np.select(
+        [(upper_case_ratio > 0.3) & (length > 50), (upper_case_ratio > 0.2) & (length > 50)],
+        [-25, -15],
+        default=0
+    )
+    
+    # Excessive punctuation
+    confidence += np.select([punctuation > 3, punctuation > 1], [-25, -15], default=0)
+    
+    # Weasel words
+    confidence += np.select(
+        [weasel > 4, weasel > 2, (weasel == 0) & (word_count > 50)],
+        [-20, -10, 10],
+        default=0
+    )
+    
+    # Source citations, factual phrases and quotations
+    confidence += np.select([sources >= 3, sources >= 1], [20, 15], default=0)
+    confidence += np.select([factual >= 2, factual >= 1], [15, 10], default=0)
+    confidence += np.select([quotes >= 2, quotes >= 1], [10, 5], default=0)
+    
+    confidence = np.clip(np.round(confidence * 100) / 100, 0, 100)
+    
+    return pd.Series(confidence, index=features.index, name='confidence'), upper_case_ratio
+
+def analyze_batch(texts):
+    """Score many texts at once, returning one row per text.
+    
+    The result has a confidence column plus one column per metric, with the
+    same values analyze_content returns for each text. Missing texts are
+    scored as empty strings, and any other value that is not a string as
+    its str().
+    """
+    texts = pd.Series(texts, dtype=object).fillna('')
+    texts = texts.map(lambda text: text if isinstance(text, str) else str(text))
+    features = extract_features(texts)
+    confidence, upper_case_ratio = score_features(features)
+    
+    sentiment = np.select(
+        [features['positive'] > features['negative'], features['negative'] > features['positive']],
+        ['Positive', 'Negative'],
+        default='Neutral'
+    )
+    
+    results = pd.DataFrame({
+        'confidence': confidence,
+        'content_length': features['word_count'].astype(str) + ' words',
+        'fake_indicators': features['fake'],
+        'truth_indicators': features['truth'],
+        'sentiment': sentiment,
+        'sources_count': features['source_count'],
+        'weasel_words': features['weasel'],
+        'factual_phrases': features['factual'],
+        'all_caps': pd.Series(upper_case_ratio * 100, index=texts.index).map('{:.1f}%'.format),
+    }, index=texts.index)
+    
+    return results
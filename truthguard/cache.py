@@ -0,0 +1,222 @@
+"""Content-hash result cache for analyze_content"""
+import hashlib
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+
+from truthguard.analysis import (
+    INDICATOR_MATCHER,
+    SCORING_RULES_VERSION,
+    Metrics,
+    count_sources,
+    normalize_content,
+    score_features,
+    structure_features,
+)
+from truthguard.document_text import check_size, iter_document_chunks
+from truthguard.streaming import DEFAULT_CHUNK_SIZE, StreamingAnalyzer, iter_text_chunks
+from truthguard.timing import StageTimer
+
+def content_hash(content):
+    """SHA-256 hex digest of the normalized content"""
+    return hashlib.sha256(normalize_content(content).encode('utf-8')).hexdigest()
+
+class AnalysisCache:
+    """Bounded LRU of analysis results, optionally backed by a SQLite file.
+    
+    Entries are keyed by content hash and stamped with the scoring rules
+    version, so results computed under older indicator lists are never served.
+    Metrics records are never changed once scored, so a hit returns the cached record itself.
+    With a ParagraphCache, a miss only scans the paragraphs not seen before.
+    """
+    
+    def __init__(self, max_entries=1024, db_path=None, rules_version=SCORING_RULES_VERSION, paragraphs=None):
+        self.max_entries = max_entries
+        self.rules_version = rules_version
+        self.paragraphs = paragraphs
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        
+        self.db = None
+        if db_path:
+            self.db = sqlite3.connect(db_path, check_same_thread=False)
+            self.db.execute('''
+                CREATE TABLE IF NOT EXISTS analysis_cache (
+                    content_hash TEXT PRIMARY KEY,
+                    rules_version TEXT,
+                    confidence REAL,
+                    result TEXT,
+                    date_added TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            # Drop results scored under other indicator lists
+            self.db.execute('DELETE FROM analysis_cache WHERE rules_version != ?', (rules_version,))
+            self.db.commit()
+    
+    def get(self, key):
+        """Return a cached (confidence, metrics) pair, or None"""
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+            
+            if self.db is not None:
+                row = self.db.execute(
+                    'SELECT result FROM analysis_cache WHERE content_hash = ? AND rules_version = ?',
+                    (key, self.rules_version)
+                ).fetchone()
+                if row:
+                    self.disk_hits += 1
+                    confidence, raw = json.loads(row[0])
+                    result = confidence, Metrics.from_raw(raw)
+                    self._remember(key, result)
+                    return result
+            
+            self.misses += 1
+            return None
+    
+    def put(self, key, result):
+        """Store a (confidence, metrics) pair under a content hash"""
+        confidence, metrics = result
+        with self.lock:
+            self._remember(key, (confidence, metrics))
+            if self.db is not None:
+                self.db.execute(
+                    'INSERT OR REPLACE INTO analysis_cache (content_hash, rules_version, confidence, result) VALUES (?, ?, ?, ?)',
+                    (key, self.rules_version, confidence, json.dumps([confidence, metrics.raw()]))
+                )
+                self.db.commit()
+    
+    def _remember(self, key, result):
+        self.entries[key] = result
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+    
+    def analyze(self, content, timer=None):
+        """analyze_content with results served from the cache when possible.
+        
+        A miss scores the text as given, so its result equals
+        analyze_content(content). The key is a hash of the text with line
+        endings normalized, so copies that differ only in CRLF and LF line
+        endings share the result of whichever copy was scored first; their
+        length and capital letter ratio count the CR characters of that copy.
+        """
+        timer = timer or StageTimer()
+        
+        with timer.stage('parse'):
+            key = content_hash(content)
+        
+        with timer.stage('lookup'):
+            result = self.get(key)
+        
+        if result is None:
+            if self.paragraphs is not None:
+                features = self.paragraphs.features(content, timer)
+            else:
+                # extract_features, with each kind of signal timed as its own stage
+                with timer.stage('lexicon scan'):
+                    features = INDICATOR_MATCHER.count(content.lower())
+                with timer.stage('structure'):
+                    features.update(structure_features(content))
+                with timer.stage('sources'):
+                    features['source_count'] = count_sources(content)
+            with timer.stage('scoring'):
+                result = score_features(features)
+            self.put(key, result)
+        return result
+    
+    def analyze_file(self, fileobj, timer=None, chunk_size=DEFAULT_CHUNK_SIZE, encoding='utf-8'):
+        """Cached analysis of a seekable binary file, read chunk by chunk.
+        
+        The file is hashed in a first pass so repeated uploads skip analysis,
+        and only a chunk at a time is ever decoded into memory.
+        """
+        timer = timer or StageTimer()
+        
+        with timer.stage('parse'):
+            fileobj.seek(0)
+            digest = hashlib.sha256()
+            for chunk in iter_text_chunks(fileobj, chunk_size, encoding):
+                digest.update(chunk.encode('utf-8'))
+            key = digest.hexdigest()
+        
+        with timer.stage('lookup'):
+            result = self.get(key)
+        
+        if result is None:
+            with timer.stage('feature extraction'):
+                fileobj.seek(0)
+                analyzer = StreamingAnalyzer()
+                for chunk in iter_text_chunks(fileobj, chunk_size, encoding, normalize=False):
+                    analyzer.feed(chunk)
+                features = analyzer.features()
+            with timer.stage('scoring'):
+                result = score_features(features)
+            self.put(key, result)
+        return result
+    
+    def analyze_document(self, fileobj, kind, timer=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        """Cached analysis of a PDF or DOCX file, extracted and scanned a page at a time.
+        
+        Results are keyed by a hash of the file itself, so a document
+        submitted again skips extraction altogether.
+        """
+        timer = timer or StageTimer()
+        
+        with timer.stage('parse'):
+            check_size(fileobj)
+            digest = hashlib.sha256(kind.encode('utf-8') + b'\0')
+            for data in iter(lambda: fileobj.read(chunk_size), b''):
+                digest.update(data)
+            key = digest.hexdigest()
+        
+        with timer.stage('lookup'):
+            result = self.get(key)
+        
+        if result is None:
+            fileobj.seek(0)
+            analyzer = StreamingAnalyzer()
+            pages = iter_document_chunks(fileobj, kind)
+            page_count = 0
+            while True:
+                with timer.stage('extraction'):
+                    page = next(pages, None)
+                if page is None:
+                    break
+                page_count += 1
+                with timer.stage('feature extraction'):
+                    analyzer.feed(page)
+            with timer.stage('scoring'):
+                confidence, metrics = score_features(analyzer.features())
+                result = confidence, metrics.with_values(pages=page_count)
+            self.put(key, result)
+        return result
+    
+    def stats(self):
+        """Counters describing cache effectiveness"""
+        with self.lock:
+            return {
+                'entries': len(self.entries),
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'rules_version': self.rules_version,
+            }
+    
+    def clear(self):
+        """Drop every cached result, in memory and on disk"""
+        with self.lock:
+            self.entries.clear()
+            if self.db is not None:
+                self.db.execute('DELETE FROM analysis_cache')
+                self.db.commit()
@@ -0,0 +1,97 @@
+"""Command line scoring without the Streamlit app.
+
+    python -m truthguard score FILE|-          score a text file or stdin
+    python -m truthguard score --ndjson FILE|- score one JSON document per line
+    python -m truthguard serve [--port N]      run the local HTTP endpoint
+
+Results are written as NDJSON, one object per scored text. Only the
+scoring core is imported, so start-up costs a few milliseconds over the
+interpreter itself.
+"""
+import argparse
+import json
+import sys
+
+from truthguard.analysis import analyze_content
+
+NDJSON_EXTENSIONS = ('.jsonl', '.ndjson')
+
+def result_record(confidence, metrics, **extra):
+    """One output object: any passthrough fields, then the verdict and metrics"""
+    return dict(extra, verdict='True' if confidence >= 50 else 'False', confidence=confidence, metrics=dict(metrics))
+
+def score_document(document, field='content'):
+    """Score one parsed NDJSON value: an object holding field, or a bare string"""
+    if isinstance(document, str):
+        return result_record(*analyze_content(document))
+    if not isinstance(document, dict) or not isinstance(document.get(field), str):
+        raise ValueError(f"Each document needs a '{field}' string")
+    extra = {'id': document['id']} if 'id' in document else {}
+    return result_record(*analyze_content(document[field]), **extra)
+
+def score_lines(lines, field='content'):
+    """Yield one result or error object per non-blank NDJSON line"""
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            yield score_document(json.loads(line), field)
+        except ValueError as e:
+            yield {'line': number, 'error': str(e)}
+
+def score_command(args):
+    ndjson = args.ndjson or args.path.lower().endswith(NDJSON_EXTENSIONS)
+    stdin = args.path == '-'
+    write = sys.stdout.write
+    errors = 0
+    
+    if ndjson:
+        lines = sys.stdin if stdin else open(args.path, encoding='utf-8')
+        with lines:
+            for record in score_lines(lines, args.field):
+                errors += 'error' in record
+                write(json.dumps(record) + '\n')
+    else:
+        # Plain text is analyzed a chunk at a time, however large it is
+        from truthguard.streaming import analyze_file
+        if stdin:
+            confidence, metrics = analyze_file(sys.stdin.buffer)
+        else:
+            with open(args.path, 'rb') as f:
+                confidence, metrics = analyze_file(f)
+        write(json.dumps(result_record(confidence, metrics, source=args.path)) + '\n')
+    
+    sys.stdout.flush()
+    return 1 if errors else 0
+
+def serve_command(args):
+    from truthguard.service import serve
+    serve(args.host, args.port, verbose=args.verbose)
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='truthguard', description="Score news articles for signs of fake news")
+    commands = parser.add_subparsers(dest='command', required=True)
+    
+    score = commands.add_parser('score', help="score a file or stdin, writing NDJSON")
+    score.add_argument('path', help="file to score, or - for stdin")
+    score.add_argument('--ndjson', action='store_true',
+                       help="read one JSON document per line (implied for .jsonl/.ndjson files)")
+    score.add_argument('--field', default='content', help="document field holding the text (default: content)")
+    score.set_defaults(run=score_command)
+    
+    serve = commands.add_parser('serve', help="run the local HTTP scoring endpoint")
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8765)
+    serve.add_argument('--verbose', action='store_true', help="log every request")
+    serve.set_defaults(run=serve_command)
+    
+    args = parser.parse_args(argv)
+    try:
+        return args.run(args)
+    except OSError as e:
+        parser.exit(2, f"truthguard: {e}\n")
+    except UnicodeDecodeError as e:
+        parser.exit(2, f"truthguard: {args.path} is not UTF-8 text ({e.reason})\n")
+    except KeyboardInterrupt:
+        return 130
@@ -0,0 +1,237 @@
+"""Asynchronous breadth-first site crawler that scores pages as they arrive"""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from urllib.parse import urldefrag, urljoin, urlsplit
+
+import aiohttp
+
+from truthguard.analysis import extract_features, normalize_content, score_features
+from truthguard.html_text import extract_page
+
+USER_AGENT = 'TruthGuard/1.0 (fake news detector)'
+MAX_PAGE_BYTES = 2 * 1024 * 1024
+READ_CHUNK_BYTES = 64 * 1024
+
+# Columns of the table of crawled pages
+PAGE_COLUMNS = ('url', 'depth', 'status', 'title', 'confidence', 'content_length', 'error')
+
+def normalize_url(url, base=None):
+    """Absolute http(s) URL without its fragment, or None for any other link"""
+    if base:
+        url = urljoin(base, url)
+    url = urldefrag(url)[0]
+    parts = urlsplit(url)
+    if parts.scheme.lower() not in ('http', 'https') or not parts.netloc:
+        return None
+    return parts._replace(
+        scheme=parts.scheme.lower(), netloc=parts.netloc.lower(), path=parts.path or '/'
+    ).geturl()
+
+class PageResult:
+    """Outcome of fetching and scoring one crawled page"""
+    
+    def __init__(self, url, depth, status=None, title='', features=None, confidence=None,
+                 metrics=None, error=None, seconds=0.0):
+        self.url = url
+        self.depth = depth
+        self.status = status
+        self.title = title
+        self.features = features
+        self.confidence = confidence
+        self.metrics = metrics
+        self.error = error
+        self.seconds = seconds
+    
+    def as_values(self):
+        """The page's row of the crawl table, in PAGE_COLUMNS order"""
+        content_length = self.metrics['content_length'] if self.metrics else None
+        return (self.url, self.depth, self.status, self.title, self.confidence, content_length, self.error)
+    
+    def as_row(self):
+        return dict(zip(PAGE_COLUMNS, self.as_values()))
+
+class CrawlReport:
+    """Pages scored during one crawl, with a site-level aggregate verdict"""
+    
+    def __init__(self, pages):
+        self.pages = pages
+        self.scored = [page for page in pages if page.confidence is not None]
+    
+    def summary(self):
+        """Return (confidence, metrics) for the whole site, or None if nothing was scored.
+        
+        The confidence is the mean page confidence; the metrics come from the
+        feature counts summed across every scored page.
+        """
+        if not self.scored:
+            return None
+        confidence = round(sum(page.confidence for page in self.scored) / len(self.scored) * 100) / 100
+        totals = {}
+        for page in self.scored:
+            for name, value in page.features.items():
+                totals[name] = totals.get(name, 0) + value
+        return confidence, score_features(totals)[1]
+
+class HostLimiter:
+    """Per-host politeness: a cap on concurrent requests and a minimum spacing"""
+    
+    def __init__(self, per_host=2, delay=0.0):
+        self.per_host = per_host
+        self.delay = delay
+        self.semaphores = {}
+        self.next_request = {}
+    
+    @asynccontextmanager
+    async def slot(self, host):
+        semaphore = self.semaphores.setdefault(host, asyncio.Semaphore(self.per_host))
+        async with semaphore:
+            if self.delay:
+                now = asyncio.get_running_loop().time()
+                start_at = max(now, self.next_request.get(host, now))
+                self.next_request[host] = start_at + self.delay
+                if start_at > now:
+                    await asyncio.sleep(start_at - now)
+            yield
+
+class Crawler:
+    """Breadth-first crawler over one site, bounded by depth and page count.
+    
+    The start page is depth 0 and links are followed up to max_depth. Pages
+    are fetched concurrently over a shared keep-alive connection pool and
+    scored as soon as each one arrives.
+    """
+    
+    def __init__(self, max_depth=1, max_pages=5, concurrency=8, per_host=2, delay=0.0,
+                 timeout=10.0, same_host=True, max_bytes=MAX_PAGE_BYTES):
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.concurrency = concurrency
+        self.limiter = HostLimiter(per_host, delay)
+        self.per_host = per_host
+        self.timeout = timeout
+        self.same_host = same_host
+        self.max_bytes = max_bytes
+    
+    async def crawl(self, start_url):
+        """Yield a PageResult for every crawled page, in the order they finish"""
+        start_url = normalize_url(start_url)
+        if start_url is None:
+            raise ValueError("The crawl must start from an http(s) URL")
+        
+        self.start_host = urlsplit(start_url).netloc
+        self.seen = {start_url}
+        self.queued = 1
+        pending = asyncio.Queue()
+        finished = asyncio.Queue()
+        pending.put_nowait((start_url, 0))
+        
+        connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.per_host)
+        session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            headers={'User-Agent': USER_AGENT}
+        )
+        async with session:
+            workers = [
+                asyncio.create_task(self._worker(session, pending, finished))
+                for _ in range(self.concurrency)
+            ]
+            
+            async def close_when_done():
+                await pending.join()
+                finished.put_nowait(None)
+            
+            monitor = asyncio.create_task(close_when_done())
+            try:
+                while True:
+                    page = await finished.get()
+                    if page is None:
+                        break
+                    yield page
+            finally:
+                for task in workers + [monitor]:
+                    task.cancel()
+                await asyncio.gather(*workers, monitor, return_exceptions=True)
+    
+    async def _worker(self, session, pending, finished):
+        while True:
+            url, depth = await pending.get()
+            try:
+                page, links = await self._visit(session, url, depth)
+                if depth < self.max_depth:
+                    self._enqueue(links, page.url, depth + 1, pending)
+                finished.put_nowait(page)
+            finally:
+                pending.task_done()
+    
+    def _enqueue(self, links, base, depth, pending):
+        for link in links:
+            url = normalize_url(link, base)
+            if url is None or url in self.seen:
+                continue
+            if self.same_host and urlsplit(url).netloc != self.start_host:
+                continue
+            if self.queued >= self.max_pages:
+                return
+            self.seen.add(url)
+            self.queued += 1
+            pending.put_nowait((url, depth))
+    
+    async def _visit(self, session, url, depth):
+        start = time.perf_counter()
+        try:
+            async with self.limiter.slot(urlsplit(url).netloc):
+                async with session.get(url, max_redirects=5) as response:
+                    final_url = normalize_url(str(response.url)) or url
+                    if final_url != url:
+                        if self.same_host and urlsplit(final_url).netloc != self.start_host:
+                            return PageResult(url, depth, response.status, error=f"Skipped redirect to {final_url}",
+                                              seconds=time.perf_counter() - start), []
+                        if final_url in self.seen:
+                            return PageResult(url, depth, response.status,
+                                              error=f"Skipped redirect to {final_url}, already in the crawl",
+                                              seconds=time.perf_counter() - start), []
+                        # Redirect targets count as visited so they are not queued again
+                        self.seen.add(final_url)
+                    if response.status >= 400:
+                        return PageResult(url, depth, response.status, error=f"HTTP {response.status}",
+                                          seconds=time.perf_counter() - start), []
+                    if response.content_type not in ('text/html', 'text/plain'):
+                        return PageResult(url, depth, response.status, error=f"Skipped {response.content_type}",
+                                          seconds=time.perf_counter() - start), []
+                    
+                    body = bytearray()
+                    async for chunk in response.content.iter_chunked(READ_CHUNK_BYTES):
+                        body.extend(chunk)
+                        if len(body) >= self.max_bytes:
+                            break
+                    document = bytes(body[:self.max_bytes]).decode(response.charset or 'utf-8', errors='replace')
+                    status, content_type = response.status, response.content_type
+        except (aiohttp.ClientError, asyncio.TimeoutError, LookupError) as e:
+            return PageResult(url, depth, error=str(e) or type(e).__name__,
+                              seconds=time.perf_counter() - start), []
+        
+        if content_type == 'text/html':
+            text, links, title = extract_page(document)
+        else:
+            text, links, title = document, [], ''
+        
+        # Score the page now rather than after the crawl
+        features = extract_features(normalize_content(text))
+        confidence, metrics = score_features(features)
+        page = PageResult(final_url, depth, status, title, features, confidence, metrics,
+                          seconds=time.perf_counter() - start)
+        return page, links
+
+def crawl_site(start_url, on_page=None, **options):
+    """Crawl a site synchronously, calling on_page with each page as it is scored"""
+    async def run():
+        pages = []
+        async for page in Crawler(**options).crawl(start_url):
+            pages.append(page)
+            if on_page:
+                on_page(page)
+        return pages
+    
+    return CrawlReport(asyncio.run(run()))
@@ -0,0 +1,163 @@
+"""Domain credibility lookups backed by the credibility_sources table"""
+import os
+import re
+import sqlite3
+import threading
+import time
+from urllib.parse import urlsplit
+
+from truthguard.analysis import URL_PATTERN
+
+# Points added at a mean credibility of 1.0, or taken away at 0.0
+CREDIBILITY_WEIGHT = 30
+DEFAULT_REFRESH_SECONDS = 300
+
+url_regex = re.compile(URL_PATTERN)
+
+def normalize_domain(domain):
+    """Lowercase a host or domain and drop any port, trailing dot and www. prefix"""
+    domain = domain.strip().lower()
+    if '://' in domain:
+        domain = urlsplit(domain).netloc
+    domain = domain.rsplit('@', 1)[-1].split(':', 1)[0].strip('.')
+    if domain.startswith('www.'):
+        domain = domain[4:]
+    return domain
+
+def cited_hosts(content):
+    """Host names of every URL cited in the content"""
+    hosts = []
+    for url in url_regex.findall(content):
+        # Text such as "(see https://nasa.gov)." leaves punctuation on the host
+        host = url.split('://', 1)[1].split('/', 1)[0].split('?', 1)[0].split('#', 1)[0]
+        host = host.rstrip('.,;:!?)]}\'"')
+        if host:
+            hosts.append(host)
+    return hosts
+
+class CredibilityIndex:
+    """In-memory map of domain to credibility score with suffix matching.
+    
+    A host matches its own entry or that of any parent domain, so
+    www.nasa.gov and science.nasa.gov both resolve to nasa.gov. Each lookup
+    costs one dict probe per label of the host, however many domains are loaded.
+    """
+    
+    def __init__(self, scores=None):
+        self.scores = {}
+        for domain, score in (scores or {}).items():
+            domain = normalize_domain(domain)
+            if domain and score is not None:
+                self.scores[domain] = float(score)
+    
+    @classmethod
+    def from_db(cls, db_path):
+        """Load every row of credibility_sources, or an empty index if there is none"""
+        if not os.path.exists(db_path):
+            return cls()
+        try:
+            conn = sqlite3.connect(db_path)
+        except sqlite3.Error:
+            return cls()
+        try:
+            rows = conn.execute('SELECT domain, credibility_score FROM credibility_sources').fetchall()
+        except sqlite3.DatabaseError:
+            # No such table, or a file that isn't a database
+            rows = []
+        finally:
+            conn.close()
+        return cls(dict(rows))
+    
+    @classmethod
+    def from_dbs(cls, db_paths):
+        """One index over several databases; a domain takes its score from the first one listing it"""
+        index = cls()
+        for db_path in db_paths:
+            for domain, score in cls.from_db(db_path).scores.items():
+                index.scores.setdefault(domain, score)
+        return index
+    
+    def __len__(self):
+        return len(self.scores)
+    
+    def lookup(self, host):
+        """Return (domain, score) for the closest listed domain, or None"""
+        host = normalize_domain(host)
+        while host:
+            score = self.scores.get(host)
+            if score is not None:
+                return host, score
+            host = host.partition('.')[2]
+        return None
+    
+    def known_sources(self, hosts):
+        """Map each listed domain among hosts to its score"""
+        known = {}
+        for host in hosts:
+            match = self.lookup(host)
+            if match:
+                known[match[0]] = match[1]
+        return known
+    
+    def adjust(self, confidence, metrics, content='', hosts=()):
+        """Fold the credibility of cited and given hosts into a scored result.
+        
+        The confidence moves by up to CREDIBILITY_WEIGHT / 2 points in either
+        direction, according to the mean score of the distinct known domains.
+        """
+        known = self.known_sources(list(hosts) + cited_hosts(content))
+        if not known:
+            return confidence, metrics.with_values(source_credibility=None)
+        
+        mean_score = sum(known.values()) / len(known)
+        confidence += (mean_score - 0.5) * CREDIBILITY_WEIGHT
+        confidence = max(0, min(100, round(confidence * 100) / 100))
+        return confidence, metrics.with_values(source_credibility=(mean_score, len(known)))
+
+class CredibilitySource:
+    """Load a CredibilityIndex once and reload it when a database changes.
+    
+    db_paths is one database or a list of them in precedence order, merged
+    as from_dbs merges them. The files are checked at most every
+    refresh_seconds; readers always get a complete index, since a reload
+    swaps in a new one.
+    """
+    
+    def __init__(self, db_paths, refresh_seconds=DEFAULT_REFRESH_SECONDS):
+        self.db_paths = [db_paths] if isinstance(db_paths, str) else list(db_paths)
+        self.refresh_seconds = refresh_seconds
+        self.lock = threading.Lock()
+        self.current = CredibilityIndex.from_dbs(self.db_paths)
+        self.loaded_mtimes = self._mtimes()
+        self.checked_at = time.monotonic()
+    
+    def _mtimes(self):
+        # Writes in WAL mode reach the database file only at a checkpoint. Taken after a load,
+        # since opening a WAL database can create its -wal file and the last close removes it
+        mtimes = []
+        for db_path in self.db_paths:
+            for path in (db_path, db_path + '-wal'):
+                try:
+                    mtimes.append(os.path.getmtime(path))
+                except OSError:
+                    mtimes.append(None)
+        return mtimes
+    
+    def index(self):
+        """The current index, refreshed first if it is due and a file has changed"""
+        if time.monotonic() - self.checked_at >= self.refresh_seconds:
+            with self.lock:
+                if time.monotonic() - self.checked_at >= self.refresh_seconds:
+                    self.checked_at = time.monotonic()
+                    if self._mtimes() != self.loaded_mtimes:
+                        self.current = CredibilityIndex.from_dbs(self.db_paths)
+                        self.loaded_mtimes = self._mtimes()
+        return self.current
+    
+    def refresh(self):
+        """Reload the index now"""
+        with self.lock:
+            self.current = CredibilityIndex.from_dbs(self.db_paths)
+            self.loaded_mtimes = self._mtimes()
+            self.checked_at = time.monotonic()
+        return self.current
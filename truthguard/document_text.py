@@ -0,0 +1,165 @@
+"""Page-by-page text extraction from PDF and DOCX uploads.
+
+Pages are yielded one at a time, so a long document is never held in
+memory as text. PDFs are read with pypdf and DOCX files with the standard
+library's zipfile and an incremental XML parser, so neither needs a
+network connection or a compiled dependency. DOCX pages end at explicit
+page breaks and at the page breaks Word recorded when it last laid out
+the document.
+"""
+import zipfile
+import zlib
+from xml.etree import ElementTree
+
+from truthguard.analysis import normalize_content
+
+MAX_DOCUMENT_BYTES = 50 * 1024 * 1024
+MAX_PAGES = 500
+
+# document.xml is usually many times larger than the compressed file; refuse zip bombs
+MAX_DOCX_XML_BYTES = 20 * MAX_DOCUMENT_BYTES
+
+# Pages are fed to the analysis joined by a blank line
+PAGE_SEPARATOR = '\n\n'
+
+# Text from the start of an upload for the checks that read it whole: the scoring model, cited domains
+# and known-article matches. Known articles are news stories, far shorter than this
+OPENING_CHARS = 64 * 1024
+
+PDF_TYPES = ('application/pdf',)
+DOCX_TYPES = ('application/vnd.openxmlformats-officedocument.wordprocessingml.document',)
+
+WORD_NAMESPACE = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+TEXT_TAG = WORD_NAMESPACE + 't'
+TAB_TAG = WORD_NAMESPACE + 'tab'
+BREAK_TAG = WORD_NAMESPACE + 'br'
+PARAGRAPH_TAG = WORD_NAMESPACE + 'p'
+RENDERED_BREAK_TAG = WORD_NAMESPACE + 'lastRenderedPageBreak'
+BREAK_TYPE = WORD_NAMESPACE + 'type'
+
+def document_kind(filename, mime_type=None):
+    """Return 'pdf' or 'docx' for the document formats extracted here, None otherwise"""
+    name = filename.lower()
+    if name.endswith('.pdf') or mime_type in PDF_TYPES:
+        return 'pdf'
+    if name.endswith('.docx') or mime_type in DOCX_TYPES:
+        return 'docx'
+    return None
+
+def check_size(fileobj, max_bytes=MAX_DOCUMENT_BYTES):
+    """Raise ValueError if a seekable file is larger than max_bytes"""
+    size = fileobj.seek(0, 2)
+    fileobj.seek(0)
+    if size > max_bytes:
+        raise ValueError(f"Documents are limited to {max_bytes // (1024 * 1024)} MB; this one is {size / (1024 * 1024):.1f} MB")
+
+def iter_pdf_pages(fileobj, max_pages=MAX_PAGES):
+    """Yield the text of each PDF page in turn"""
+    from pypdf import PdfReader
+    
+    # Malformed files fail in pypdf with all kinds of errors (KeyError, AssertionError, DependencyError
+    # for some encryption, ...), and callers only expect a ValueError for a file they can't use
+    try:
+        reader = PdfReader(fileobj)
+        encrypted = reader.is_encrypted
+        page_count = 0 if encrypted else len(reader.pages)
+    except Exception as e:
+        raise ValueError(f"Could not read the PDF: {e}") from e
+    if encrypted:
+        raise ValueError("Encrypted PDFs can't be analyzed")
+    if page_count > max_pages:
+        raise ValueError(f"Documents are limited to {max_pages} pages; this one has {page_count}")
+    
+    for number in range(page_count):
+        try:
+            text = reader.pages[number].extract_text()
+        except Exception as e:
+            raise ValueError(f"Could not read page {number + 1} of the PDF: {e}") from e
+        yield text
+        # Drop the objects pypdf parsed for this page, so memory doesn't grow with the page count
+        reader.resolved_objects.clear()
+
+def iter_docx_pages(fileobj, max_pages=MAX_PAGES):
+    """Yield the text of each DOCX page in turn, one line per paragraph"""
+    try:
+        archive = zipfile.ZipFile(fileobj)
+        info = archive.getinfo('word/document.xml')
+    except (zipfile.BadZipFile, KeyError, EOFError) as e:
+        raise ValueError("Not a valid DOCX file") from e
+    if info.file_size > MAX_DOCX_XML_BYTES:
+        raise ValueError("The DOCX text is too large to analyze")
+    
+    pages = 0
+    parts = []
+    has_text = False
+    depth = 0
+    body = None
+    with archive, archive.open(info) as xml:
+        try:
+            for event, element in ElementTree.iterparse(xml, events=('start', 'end')):
+                tag = element.tag
+                page_break = False
+                if event == 'start':
+                    depth += 1
+                    if depth == 2:
+                        body = element
+                    page_break = tag == RENDERED_BREAK_TAG
+                else:
+                    depth -= 1
+                    if tag == TEXT_TAG and element.text:
+                        parts.append(element.text)
+                        has_text = has_text or not element.text.isspace()
+                    elif tag == TAB_TAG:
+                        parts.append('\t')
+                    elif tag == BREAK_TAG:
+                        page_break = element.get(BREAK_TYPE) == 'page'
+                        if not page_break:
+                            parts.append('\n')
+                    elif tag == PARAGRAPH_TAG:
+                        parts.append('\n')
+                    if depth == 2:
+                        # A paragraph or table of the body has been read; free its elements
+                        body.clear()
+                
+                # Word records a rendered break next to an explicit one, so empty pages are skipped
+                if page_break and has_text:
+                    pages += 1
+                    if pages > max_pages:
+                        raise ValueError(f"Documents are limited to {max_pages} pages")
+                    yield ''.join(parts)
+                    parts = []
+                    has_text = False
+        except (ElementTree.ParseError, zipfile.BadZipFile, zlib.error, EOFError, NotImplementedError,
+                RuntimeError) as e:
+            # A corrupt, encrypted or unsupported compressed stream fails while it is read
+            raise ValueError(f"Could not read the DOCX text: {e}") from e
+    
+    if has_text or not pages:
+        if pages == max_pages:
+            raise ValueError(f"Documents are limited to {max_pages} pages")
+        yield ''.join(parts)
+
+def iter_document_pages(fileobj, kind, max_pages=MAX_PAGES):
+    """Yield the text of each page of a PDF or DOCX file, with line endings normalized"""
+    pages = {'pdf': iter_pdf_pages, 'docx': iter_docx_pages}
+    if kind not in pages:
+        raise ValueError(f"Unsupported document format: {kind}")
+    check_size(fileobj)
+    for page in pages[kind](fileobj, max_pages):
+        yield normalize_content(page)
+
+def iter_document_chunks(fileobj, kind, max_pages=MAX_PAGES):
+    """The pages as text chunks for StreamingAnalyzer, separated by a blank line"""
+    for number, page in enumerate(iter_document_pages(fileobj, kind, max_pages)):
+        yield PAGE_SEPARATOR + page if number else page
+
+def opening_text(chunks, max_chars=OPENING_CHARS):
+    """The first max_chars of the text in chunks, reading no further than that"""
+    parts = []
+    remaining = max_chars
+    for chunk in chunks:
+        parts.append(chunk[:remaining])
+        remaining -= len(parts[-1])
+        if remaining <= 0:
+            break
+    return ''.join(parts)
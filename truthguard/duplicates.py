@@ -0,0 +1,384 @@
+"""Near-duplicate matching against the known true and false news tables.
+
+Articles are reduced to MinHash signatures over word shingles and indexed
+with LSH banding: each band of a signature is hashed to one key, and the
+keys of every band are kept in a sorted array. A query only compares its
+signature with items sharing at least one band key, found by binary search,
+so its cost grows with the number of near matches rather than the corpus size.
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+
+import numpy as np
+
+from truthguard.analysis import normalize_content
+
+NUM_PERM = 64
+BANDS = 16
+SHINGLE_SIZE = 3
+BLOCK_SHINGLES = 4096
+SEED = 20250418
+
+# Similarity at which a known article is reported, and the verdict starts to follow it
+MATCH_THRESHOLD = 0.5
+DEFAULT_REFRESH_SECONDS = 60
+
+# Table holding each indexed article, and whether that table is true news
+KNOWN_TABLES = ('known_true_news', 'known_false_news')
+TABLE_IS_TRUE = (True, False)
+
+word_regex = re.compile(r'\w+')
+
+rng = np.random.default_rng(SEED)
+PERM_A = rng.integers(1, 2**63, size=NUM_PERM, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+PERM_B = rng.integers(0, 2**63, size=NUM_PERM, dtype=np.uint64)
+SHINGLE_MULTIPLIERS = rng.integers(1, 2**63, size=SHINGLE_SIZE, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+BAND_MULTIPLIERS = rng.integers(1, 2**63, size=NUM_PERM // BANDS, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+del rng
+
+def shingle_hashes(content):
+    """64-bit hashes of the overlapping word shingles of a text"""
+    words = word_regex.findall(normalize_content(content).lower())
+    if not words:
+        return None
+    word_hashes = np.fromiter(
+        (zlib.crc32(word.encode('utf-8')) for word in words), dtype=np.uint64, count=len(words)
+    )
+    # Texts shorter than one shingle are hashed as a single shingle
+    size = min(SHINGLE_SIZE, len(words))
+    count = len(words) - size + 1
+    hashes = np.zeros(count, dtype=np.uint64)
+    for offset in range(size):
+        hashes += word_hashes[offset:offset + count] * SHINGLE_MULTIPLIERS[offset]
+    return hashes
+
+def minhash(content):
+    """MinHash signature of a text, or None if it has no words"""
+    hashes = shingle_hashes(content)
+    if hashes is None:
+        return None
+    # Multiply-shift hashing, a block of shingles at a time to bound memory
+    signature = np.full(NUM_PERM, np.iinfo(np.uint32).max, dtype=np.uint32)
+    for start in range(0, len(hashes), BLOCK_SHINGLES):
+        block = hashes[start:start + BLOCK_SHINGLES]
+        permuted = (PERM_A[:, None] * block[None, :] + PERM_B[:, None]) >> np.uint64(32)
+        np.minimum(signature, permuted.min(axis=1).astype(np.uint32), out=signature)
+    return signature
+
+def band_keys(signatures):
+    """Hash each band of an (n, NUM_PERM) signature array to a (BANDS, n) key array"""
+    bands = signatures.reshape(len(signatures), BANDS, NUM_PERM // BANDS).astype(np.uint64)
+    return (bands * BAND_MULTIPLIERS).sum(axis=2).T
+
+class NearDuplicateIndex:
+    """MinHash LSH index over known articles, saved as .npy files in a directory.
+    
+    Each table's highest indexed row id is recorded so later syncs read just
+    the rows added since, along with its row count, so a sync notices rows
+    deleted since and drops them from the index.
+    """
+    
+    def __init__(self):
+        self.clear()
+    
+    def clear(self):
+        self.signatures = np.zeros((0, NUM_PERM), dtype=np.uint32)
+        self.tables = np.zeros(0, dtype=np.uint8)
+        self.row_ids = np.zeros(0, dtype=np.int64)
+        self.band_keys = np.zeros((BANDS, 0), dtype=np.uint64)
+        self.band_items = np.zeros((BANDS, 0), dtype=np.uint32)
+        self.high_water = dict.fromkeys(KNOWN_TABLES, 0)
+        self.row_counts = {}
+    
+    def __len__(self):
+        return len(self.row_ids)
+    
+    def add(self, signatures, tables, row_ids):
+        """Append items and merge their band keys into the sorted band arrays"""
+        if not len(signatures):
+            return
+        first = len(self)
+        items = np.arange(first, first + len(signatures), dtype=np.uint32)
+        new_keys = band_keys(signatures)
+        
+        merged_keys = np.empty((BANDS, first + len(items)), dtype=np.uint64)
+        merged_items = np.empty((BANDS, first + len(items)), dtype=np.uint32)
+        for band in range(BANDS):
+            order = np.argsort(new_keys[band], kind='stable')
+            keys = new_keys[band][order]
+            positions = np.searchsorted(self.band_keys[band], keys, side='right')
+            merged_keys[band] = np.insert(self.band_keys[band], positions, keys)
+            merged_items[band] = np.insert(self.band_items[band], positions, items[order])
+        
+        self.signatures = np.concatenate([self.signatures, signatures])
+        self.tables = np.concatenate([self.tables, np.asarray(tables, dtype=np.uint8)])
+        self.row_ids = np.concatenate([self.row_ids, np.asarray(row_ids, dtype=np.int64)])
+        self.band_keys = merged_keys
+        self.band_items = merged_items
+    
+    def keep(self, mask):
+        """Drop the items not selected by a boolean mask, rebuilding the band arrays"""
+        signatures, tables, row_ids = self.signatures[mask], self.tables[mask], self.row_ids[mask]
+        high_water, row_counts = self.high_water, self.row_counts
+        self.clear()
+        self.add(signatures, tables, row_ids)
+        self.high_water, self.row_counts = high_water, row_counts
+    
+    def query(self, signature, limit=3, threshold=MATCH_THRESHOLD):
+        """Return up to limit (similarity, table, row_id) matches, most similar first"""
+        if signature is None or not len(self):
+            return []
+        
+        keys = band_keys(signature[None, :])[:, 0]
+        candidates = []
+        for band in range(BANDS):
+            band_keys_sorted = self.band_keys[band]
+            start = np.searchsorted(band_keys_sorted, keys[band], side='left')
+            end = np.searchsorted(band_keys_sorted, keys[band], side='right')
+            if end > start:
+                candidates.append(self.band_items[band][start:end])
+        if not candidates:
+            return []
+        
+        candidates = np.unique(np.concatenate(candidates))
+        similarity = (self.signatures[candidates] == signature).mean(axis=1)
+        keep = similarity >= threshold
+        candidates, similarity = candidates[keep], similarity[keep]
+        best = np.argsort(-similarity, kind='stable')[:limit]
+        return [
+            (float(similarity[i]), KNOWN_TABLES[self.tables[candidates[i]]], int(self.row_ids[candidates[i]]))
+            for i in best
+        ]
+    
+    def sync(self, conn, batch_rows=1000):
+        """Index rows added to the known news tables since the last sync, and drop deleted ones.
+        
+        Returns the number of rows added and removed. If a table now ends
+        below the recorded high-water mark it was rebuilt, so the index
+        starts over.
+        """
+        max_ids, counts = {}, {}
+        for table in KNOWN_TABLES:
+            try:
+                max_ids[table], counts[table] = conn.execute(
+                    f'SELECT COALESCE(MAX(id), 0), COUNT(*) FROM {table}'
+                ).fetchone()
+            except sqlite3.OperationalError:
+                max_ids[table], counts[table] = 0, 0
+        if any(max_ids[table] < self.high_water[table] for table in KNOWN_TABLES):
+            self.clear()
+        
+        removed = 0
+        for table_index, table in enumerate(KNOWN_TABLES):
+            if not self.high_water[table]:
+                continue
+            # Deleted rows leave fewer rows at or below the high-water mark than were counted
+            below = conn.execute(f'SELECT COUNT(*) FROM {table} WHERE id <= ?', (self.high_water[table],)).fetchone()[0]
+            if below == self.row_counts.get(table):
+                continue
+            present = np.array([row_id for row_id, in conn.execute(f'SELECT id FROM {table}')], dtype=np.int64)
+            deleted = (self.tables == table_index) & ~np.isin(self.row_ids, present)
+            if deleted.any():
+                self.keep(~deleted)
+                removed += int(deleted.sum())
+        
+        added = 0
+        for table_index, table in enumerate(KNOWN_TABLES):
+            if max_ids[table] <= self.high_water[table]:
+                continue
+            cursor = conn.execute(
+                f'SELECT id, title, content FROM {table} WHERE id > ? ORDER BY id', (self.high_water[table],)
+            )
+            # Merge all new rows at once, since each merge rewrites the band arrays
+            signatures, row_ids = [], []
+            for rows in iter(lambda: cursor.fetchmany(batch_rows), []):
+                for row_id, title, content in rows:
+                    signature = minhash(content or title or '')
+                    if signature is not None:
+                        signatures.append(signature)
+                        row_ids.append(row_id)
+            if signatures:
+                self.add(np.stack(signatures), [table_index] * len(row_ids), row_ids)
+                added += len(row_ids)
+            self.high_water[table] = max_ids[table]
+        self.row_counts.update(counts)
+        return added + removed
+    
+    def save(self, directory):
+        """Write the index to directory, replacing each file in one step"""
+        os.makedirs(directory, exist_ok=True)
+        arrays = {
+            'signatures': self.signatures,
+            'tables': self.tables,
+            'row_ids': self.row_ids,
+            'band_keys': self.band_keys,
+            'band_items': self.band_items,
+        }
+        for name, array in arrays.items():
+            temp_path = os.path.join(directory, f'{name}.tmp.npy')
+            np.save(temp_path, array)
+            os.replace(temp_path, os.path.join(directory, f'{name}.npy'))
+        
+        meta = {
+            'num_perm': NUM_PERM,
+            'bands': BANDS,
+            'shingle_size': SHINGLE_SIZE,
+            'seed': SEED,
+            'items': len(self),
+            'high_water': self.high_water,
+            'row_counts': self.row_counts,
+        }
+        temp_path = os.path.join(directory, 'meta.tmp.json')
+        with open(temp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(temp_path, os.path.join(directory, 'meta.json'))
+    
+    @classmethod
+    def load(cls, directory):
+        """Memory-map a saved index, or return an empty one if it is missing or stale"""
+        index = cls()
+        try:
+            with open(os.path.join(directory, 'meta.json')) as f:
+                meta = json.load(f)
+            params = (meta['num_perm'], meta['bands'], meta['shingle_size'], meta['seed'])
+            if params != (NUM_PERM, BANDS, SHINGLE_SIZE, SEED):
+                return index
+            
+            arrays = {
+                name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r')
+                for name in ('signatures', 'tables', 'row_ids', 'band_keys', 'band_items')
+            }
+        except (OSError, ValueError, KeyError):
+            return index
+        
+        # A save interrupted part way leaves files of different lengths
+        items = meta['items']
+        if any(arrays[name].shape[-1 if name.startswith('band') else 0] != items for name in arrays):
+            return index
+        
+        index.signatures = arrays['signatures']
+        index.tables = arrays['tables']
+        index.row_ids = arrays['row_ids']
+        index.band_keys = arrays['band_keys']
+        index.band_items = arrays['band_items']
+        index.high_water.update(meta['high_water'])
+        index.row_counts.update(meta.get('row_counts', {}))
+        return index
+
+def index_directory(db_path):
+    """Where the index for a database file is kept: alongside it, as <name>.minhash/"""
+    return os.path.splitext(db_path)[0] + '.minhash'
+
+class KnownArticles:
+    """Near-duplicate lookups against the known news tables of one database.
+    
+    The saved index is loaded on creation and synced with the tables then and
+    at most every refresh_seconds afterwards; new rows are saved back to disk.
+    With a ConnectionPool, the tables are read through its connections.
+    """
+    
+    def __init__(self, db_path, refresh_seconds=DEFAULT_REFRESH_SECONDS, pool=None):
+        self.db_path = db_path
+        self.pool = pool
+        self.directory = index_directory(db_path)
+        self.refresh_seconds = refresh_seconds
+        self.lock = threading.Lock()
+        self.index = NearDuplicateIndex.load(self.directory)
+        self.checked_at = None
+    
+    @contextmanager
+    def connection(self):
+        if self.pool is not None:
+            with self.pool.connection() as conn:
+                yield conn
+            return
+        conn = sqlite3.connect(self.db_path)
+        try:
+            yield conn
+        finally:
+            conn.close()
+    
+    def sync(self):
+        """Index rows added and drop rows deleted since the last sync, returning how many there were"""
+        with self.lock:
+            self.checked_at = time.monotonic()
+            if not os.path.exists(self.db_path):
+                return 0
+            with self.connection() as conn:
+                changed = self.index.sync(conn)
+            if changed or not os.path.exists(os.path.join(self.directory, 'meta.json')):
+                self.index.save(self.directory)
+            return changed
+    
+    def match(self, content, limit=3):
+        """Return the known articles most similar to content.
+        
+        Each match is a dict with similarity, table, is_true, id, title and
+        content_hash, the SHA-256 of the article's normalized content.
+        """
+        return self.match_signature(minhash(content), limit)
+    
+    def match_signature(self, signature, limit=3):
+        """match() for content already reduced to its MinHash signature"""
+        if self.checked_at is None or time.monotonic() - self.checked_at >= self.refresh_seconds:
+            self.sync()
+        
+        with self.lock:
+            matches = self.index.query(signature, limit)
+        if not matches:
+            return []
+        
+        results = []
+        with self.connection() as conn:
+            for similarity, table, row_id in matches:
+                row = conn.execute(f'SELECT title, content FROM {table} WHERE id = ?', (row_id,)).fetchone()
+                # Deleted since the last sync
+                if row is None:
+                    continue
+                results.append({
+                    'similarity': similarity,
+                    'table': table,
+                    'is_true': TABLE_IS_TRUE[KNOWN_TABLES.index(table)],
+                    'id': row_id,
+                    'title': row[0],
+                    'content_hash': content_hash(row[1] or ''),
+                })
+        return results
+
+def content_hash(content):
+    """Hash of an article's text, the same for copies that differ only in line endings"""
+    return hashlib.sha256(normalize_content(content).encode('utf-8')).hexdigest()
+
+def weigh_match(confidence, metrics, matches):
+    """Pull a scored result toward the verdict of its closest known article.
+    
+    The confidence moves toward 100 (true) or 0 (false) in proportion to the
+    similarity, so an exact copy of a known article takes that article's verdict.
+    """
+    if not matches:
+        return confidence, metrics.with_values(known_match=None)
+    
+    best = matches[0]
+    target = 100 if best['is_true'] else 0
+    similarity = best['similarity']
+    confidence = confidence + (target - confidence) * similarity
+    confidence = max(0, min(100, round(confidence * 100) / 100))
+    return confidence, metrics.with_values(known_match=(similarity, bool(best['is_true']), best['title']))
+
+def decide_verdict(confidence, metrics):
+    """'True' or 'False' for a scored result.
+    
+    A known article matched at MATCH_THRESHOLD or above decides the verdict,
+    even where weigh_match left the confidence on the other side of 50.
+    """
+    match = metrics.extra().get('known_match')
+    if match and match[0] >= MATCH_THRESHOLD:
+        return 'True' if match[1] else 'False'
+    return 'True' if confidence >= 50 else 'False'
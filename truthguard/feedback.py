@@ -0,0 +1,215 @@
+"""Background recording of user feedback into the user_feedback table.
+
+Feedback is queued by the UI and written by one thread in batches, each in a
+single transaction on a WAL-mode connection, so a click never waits on disk
+and never blocks the app's readers. The same thread periodically folds
+feedback into the known news tables.
+"""
+import atexit
+import hashlib
+import logging
+import queue
+import sqlite3
+import threading
+import time
+
+DEFAULT_FLUSH_SECONDS = 1.0
+DEFAULT_FOLD_SECONDS = 60.0
+MAX_BATCH = 500
+
+# Votes one verdict needs over the other before an article is added to the known news tables
+MIN_FOLD_VOTES = 2
+
+logger = logging.getLogger(__name__)
+
+def feedback_hash(content):
+    """Key feedback the same way server.js does: MD5 of the first 1000 characters"""
+    return hashlib.md5(content[:1000].encode('utf-8')).hexdigest()
+
+def corrected_is_true(user_verdict, system_verdict):
+    """Whether the article is true news, given the user's view of the system verdict"""
+    return (system_verdict == 'True') == (user_verdict == 'correct')
+
+class FeedbackWriter:
+    """Queue feedback and training examples for a background writer thread.
+    
+    record() and add_training() return immediately. Votes for the same
+    content_hash are merged into one user_feedback row whose feedback_count
+    goes up, as server.js does, and are also counted per verdict in
+    feedback_votes, which decides whether and how an article is folded.
+    """
+    
+    def __init__(self, db_path, flush_seconds=DEFAULT_FLUSH_SECONDS, fold_seconds=DEFAULT_FOLD_SECONDS,
+                 min_fold_votes=MIN_FOLD_VOTES):
+        self.db_path = db_path
+        self.flush_seconds = flush_seconds
+        self.fold_seconds = fold_seconds
+        self.min_fold_votes = min_fold_votes
+        self.queue = queue.Queue()
+        self.written = 0
+        self.folded = 0
+        self.errors = 0
+        self.thread = None
+        self.lock = threading.Lock()
+        atexit.register(self.close)
+    
+    def record(self, content, user_verdict, system_verdict, confidence, store_content=True):
+        """Queue a vote on a verdict; user_verdict is 'correct' or 'incorrect'.
+        
+        With store_content, the article text is kept so the vote can later be
+        folded into the known news tables.
+        """
+        self._start()
+        self.queue.put(('feedback', feedback_hash(content), user_verdict, system_verdict, confidence,
+                        content if store_content else None))
+    
+    def add_training(self, content, is_true, title='Untitled', source='User feedback'):
+        """Queue an article to be added to the known true or false news table"""
+        self._start()
+        self.queue.put(('training', content, is_true, title, source))
+    
+    def _start(self):
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name='feedback-writer', daemon=True)
+                self.thread.start()
+    
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS user_feedback (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                content_hash TEXT UNIQUE,
+                user_verdict TEXT,
+                system_verdict TEXT,
+                confidence REAL,
+                feedback_count INTEGER DEFAULT 1,
+                date_added TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        # Article text for feedback given in the app, and whether it has been folded yet
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS feedback_content (
+                content_hash TEXT PRIMARY KEY,
+                content TEXT,
+                folded INTEGER DEFAULT 0,
+                date_added TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_feedback_content_unfolded ON feedback_content (folded) WHERE folded = 0')
+        # Votes for each article, one row for each verdict they give it
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS feedback_votes (
+                content_hash TEXT,
+                is_true INTEGER,
+                votes INTEGER DEFAULT 1,
+                PRIMARY KEY (content_hash, is_true)
+            )
+        ''')
+        conn.commit()
+        return conn
+    
+    def _run(self):
+        conn = None
+        next_fold = time.monotonic() + self.fold_seconds
+        stopping = False
+        while not stopping:
+            # Block for the first item, then gather whatever arrives within the flush window
+            batch = []
+            try:
+                item = self.queue.get(timeout=max(0.0, next_fold - time.monotonic()))
+                batch.append(item)
+                deadline = time.monotonic() + self.flush_seconds
+                while len(batch) < MAX_BATCH:
+                    batch.append(self.queue.get(timeout=max(0.0, deadline - time.monotonic())))
+            except queue.Empty:
+                pass
+            
+            # None is the stop signal queued by close()
+            stopping = None in batch
+            items = [item for item in batch if item is not None]
+            try:
+                if conn is None:
+                    conn = self._connect()
+                if items:
+                    self._write(conn, items)
+                if stopping or time.monotonic() >= next_fold:
+                    self.fold(conn)
+                    next_fold = time.monotonic() + self.fold_seconds
+            except Exception:
+                # The thread keeps running, so later feedback is still written
+                self.errors += 1
+                logger.exception("Could not write %d feedback items", len(items))
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+        if conn is not None:
+            conn.close()
+    
+    def _write(self, conn, batch):
+        votes = [item[1:5] for item in batch if item[0] == 'feedback']
+        verdicts = [(content_hash, int(corrected_is_true(user_verdict, system_verdict)))
+                    for content_hash, user_verdict, system_verdict, _ in votes]
+        contents = [(item[1], item[5]) for item in batch if item[0] == 'feedback' and item[5] is not None]
+        training = [item[1:] for item in batch if item[0] == 'training']
+        with conn:
+            conn.executemany('''
+                INSERT INTO user_feedback (content_hash, user_verdict, system_verdict, confidence)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (content_hash) DO UPDATE SET feedback_count = feedback_count + 1
+            ''', votes)
+            conn.executemany('''
+                INSERT INTO feedback_votes (content_hash, is_true) VALUES (?, ?)
+                ON CONFLICT (content_hash, is_true) DO UPDATE SET votes = votes + 1
+            ''', verdicts)
+            conn.executemany('INSERT OR IGNORE INTO feedback_content (content_hash, content) VALUES (?, ?)', contents)
+            for content, is_true, title, source in training:
+                self._insert_known(conn, content, is_true, title, source)
+        self.written += len(batch)
+    
+    def _insert_known(self, conn, content, is_true, title, source):
+        table = 'known_true_news' if is_true else 'known_false_news'
+        conn.execute(f'INSERT INTO {table} (title, content, source) VALUES (?, ?, ?)', (title, content, source))
+    
+    def fold(self, conn):
+        """Add articles whose votes clearly favour one verdict to the known news tables, once each.
+        
+        An article is folded into the table of the verdict with more votes
+        once that verdict leads the other by at least min_fold_votes. Only
+        feedback not folded before is read, through a partial index, so each
+        run costs in proportion to the new feedback.
+        """
+        rows = conn.execute('''
+            SELECT c.content_hash, c.content, SUM(v.votes * v.is_true), SUM(v.votes * (1 - v.is_true))
+            FROM feedback_content c JOIN feedback_votes v ON v.content_hash = c.content_hash
+            WHERE c.folded = 0
+            GROUP BY c.content_hash
+            HAVING ABS(SUM(v.votes * v.is_true) - SUM(v.votes * (1 - v.is_true))) >= ?
+        ''', (self.min_fold_votes,)).fetchall()
+        if not rows:
+            return 0
+        with conn:
+            for content_hash, content, true_votes, false_votes in rows:
+                self._insert_known(conn, content, true_votes > false_votes, 'Untitled', 'User feedback')
+            conn.executemany('UPDATE feedback_content SET folded = 1 WHERE content_hash = ?',
+                             [(row[0],) for row in rows])
+        self.folded += len(rows)
+        return len(rows)
+    
+    def flush(self):
+        """Wait until everything queued so far has been written"""
+        if self.thread is not None:
+            self.queue.join()
+    
+    def close(self):
+        """Write what is queued, run a final fold and stop the writer thread"""
+        with self.lock:
+            thread, self.thread = self.thread, None
+        if thread is not None:
+            self.queue.put(None)
+            thread.join()
+    
+    def stats(self):
+        return {'written': self.written, 'folded': self.folded, 'errors': self.errors, 'queued': self.queue.qsize()}
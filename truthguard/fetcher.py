@@ -0,0 +1,170 @@
+"""Article fetching over a shared connection pool with a revalidating cache"""
+import threading
+from collections import OrderedDict
+
+import urllib3
+
+from truthguard.html_text import extract_page
+
+USER_AGENT = 'TruthGuard/1.0 (fake news detector)'
+MAX_ARTICLE_BYTES = 5 * 1024 * 1024
+READ_CHUNK_BYTES = 64 * 1024
+TEXT_CONTENT_TYPES = ('text/html', 'application/xhtml+xml', 'text/plain')
+
+def parse_content_type(header):
+    """Split a Content-Type header into (media type, charset or None)"""
+    media_type, _, params = (header or '').partition(';')
+    charset = None
+    for param in params.split(';'):
+        name, _, value = param.partition('=')
+        if name.strip().lower() == 'charset':
+            charset = value.strip().strip('"\'') or None
+    return media_type.strip().lower(), charset
+
+class FetchedPage:
+    """One downloaded article, with its text extracted on first use"""
+    
+    def __init__(self, url, status, content_type, charset, body, etag=None, last_modified=None, truncated=False):
+        self.url = url
+        self.status = status
+        self.content_type = content_type
+        self.charset = charset
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.truncated = truncated
+        self.revalidated = False
+        self._extracted = None
+    
+    def extract(self):
+        """Return (text, title), stripping markup and page boilerplate"""
+        if self._extracted is None:
+            try:
+                document = self.body.decode(self.charset or 'utf-8', errors='replace')
+            except LookupError:
+                document = self.body.decode('utf-8', errors='replace')
+            if self.content_type == 'text/plain':
+                self._extracted = (document, '')
+            else:
+                text, _, title = extract_page(document)
+                self._extracted = (text, title)
+        return self._extracted
+
+class PageFetcher:
+    """Fetch article pages over keep-alive connections shared by every caller.
+    
+    Pages served with an ETag or Last-Modified header are kept in a bounded
+    LRU; fetching one again sends a conditional request, and a 304 reply
+    reuses the stored page, including its already-extracted text.
+    """
+    
+    def __init__(self, max_entries=256, timeout=10.0, max_bytes=MAX_ARTICLE_BYTES, retries=2, pool_size=4):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.pool = urllib3.PoolManager(
+            num_pools=32,
+            maxsize=pool_size,
+            headers={'User-Agent': USER_AGENT},
+            timeout=urllib3.Timeout(connect=min(timeout, 5.0), read=timeout),
+            retries=urllib3.Retry(total=retries, redirect=5, backoff_factor=0.2)
+        )
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        
+        self.fetches = 0
+        self.revalidations = 0
+    
+    def fetch(self, url):
+        """Download url, revalidating a cached copy when there is one"""
+        with self.lock:
+            cached = self.entries.get(url)
+        
+        headers = {}
+        if cached is not None:
+            if cached.etag:
+                headers['If-None-Match'] = cached.etag
+            if cached.last_modified:
+                headers['If-Modified-Since'] = cached.last_modified
+        
+        response = self._request(url, headers)
+        if response.status == 304 and cached is None:
+            # There is no stored copy to reuse, so ask again for the whole page
+            response.drain_conn()
+            response.release_conn()
+            response = self._request(url, {'Cache-Control': 'no-cache'})
+        
+        # A connection goes back to the pool only once its response is fully read
+        reusable = False
+        try:
+            if response.status == 304 and cached is not None:
+                reusable = True
+                with self.lock:
+                    self.revalidations += 1
+                    if url in self.entries:
+                        self.entries.move_to_end(url)
+                cached.revalidated = True
+                return cached
+            if response.status == 304 or response.status >= 400:
+                raise ValueError(f"Could not fetch {url}: HTTP {response.status}")
+            
+            content_type, charset = parse_content_type(response.headers.get('Content-Type'))
+            if content_type and content_type not in TEXT_CONTENT_TYPES:
+                raise ValueError(f"{url} is not an article page ({content_type})")
+            
+            body, truncated = self._read(response)
+            reusable = not truncated
+        except urllib3.exceptions.HTTPError as e:
+            raise ValueError(f"Could not fetch {url}: {e}")
+        finally:
+            if not reusable:
+                response.close()
+            response.release_conn()
+        
+        page = FetchedPage(
+            response.geturl() or url, response.status, content_type or 'text/html', charset, body,
+            etag=response.headers.get('ETag'),
+            last_modified=response.headers.get('Last-Modified'),
+            truncated=truncated
+        )
+        
+        with self.lock:
+            self.fetches += 1
+            cache_control = response.headers.get('Cache-Control', '').lower()
+            if (page.etag or page.last_modified) and 'no-store' not in cache_control:
+                self.entries[url] = page
+                self.entries.move_to_end(url)
+                while len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+            else:
+                self.entries.pop(url, None)
+        return page
+    
+    def _request(self, url, headers):
+        try:
+            return self.pool.request('GET', url, headers=headers, preload_content=False)
+        except urllib3.exceptions.HTTPError as e:
+            raise ValueError(f"Could not fetch {url}: {e}")
+    
+    def _read(self, response):
+        # Stop reading at the size cap rather than buffering the whole response
+        body = bytearray()
+        for chunk in response.stream(READ_CHUNK_BYTES):
+            body.extend(chunk)
+            if len(body) > self.max_bytes:
+                return bytes(body[:self.max_bytes]), True
+        return bytes(body), False
+    
+    def stats(self):
+        with self.lock:
+            return {
+                'entries': len(self.entries),
+                'fetches': self.fetches,
+                'revalidations': self.revalidations,
+            }
+    
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+    
+    def close(self):
+        self.pool.clear()
@@ -0,0 +1,102 @@
+"""Readable text and links from HTML pages"""
+import re
+from html.parser import HTMLParser
+
+# Elements whose text is never part of the article itself
+SKIPPED_TAGS = {
+    'script', 'style', 'noscript', 'template', 'svg', 'head',
+    'nav', 'header', 'footer', 'aside', 'form', 'iframe', 'button'
+}
+
+# Elements that start a new line of text
+BLOCK_TAGS = {
+    'p', 'div', 'br', 'li', 'ul', 'ol', 'tr', 'td', 'th', 'table', 'article', 'main',
+    'section', 'blockquote', 'pre', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'hr'
+}
+
+# Elements that hold the article body; when present, text outside them is dropped
+CONTENT_TAGS = {'article', 'main'}
+
+# Link text, as PageParser marks it
+LINK_TEXT = re.compile('\x00[^\x01]*\x01')
+WORD = re.compile(r'\w')
+
+class PageParser(HTMLParser):
+    """Collect visible text, link targets and the title of an HTML page"""
+    
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.content_parts = []
+        self.links = []
+        self.title_parts = []
+        self.skip_depth = 0
+        self.content_depth = 0
+        self.link_depth = 0
+        self.in_title = False
+    
+    def handle_starttag(self, tag, attrs):
+        if tag == 'a':
+            href = dict(attrs).get('href')
+            if href:
+                self.links.append(href)
+            self.link_depth += 1
+        if tag == 'title':
+            self.in_title = True
+        if tag in CONTENT_TAGS:
+            self.content_depth += 1
+        if tag in SKIPPED_TAGS:
+            self.skip_depth += 1
+        elif tag in BLOCK_TAGS:
+            self.add('\n')
+    
+    def handle_endtag(self, tag):
+        if tag == 'a':
+            self.link_depth = max(0, self.link_depth - 1)
+        if tag == 'title':
+            self.in_title = False
+        if tag in SKIPPED_TAGS:
+            self.skip_depth = max(0, self.skip_depth - 1)
+        elif tag in BLOCK_TAGS:
+            self.add('\n')
+        if tag in CONTENT_TAGS:
+            self.content_depth = max(0, self.content_depth - 1)
+    
+    def handle_data(self, data):
+        if self.in_title:
+            self.title_parts.append(data)
+        elif not self.skip_depth:
+            # Link text is marked so link-only lines can be dropped later
+            data = data.replace('\x00', '').replace('\x01', '')
+            self.add('\x00' + data + '\x01' if self.link_depth else data)
+    
+    def add(self, part):
+        self.parts.append(part)
+        if self.content_depth:
+            self.content_parts.append(part)
+    
+    def text(self):
+        content = ''.join(self.content_parts)
+        if not content.strip('\n\x00\x01 \t'):
+            content = ''.join(self.parts)
+        
+        lines = []
+        for line in content.splitlines():
+            words = line.split()
+            if not words:
+                continue
+            # Lines with no words outside links are menus, share bars and the like
+            if not WORD.search(LINK_TEXT.sub('', line)):
+                continue
+            lines.append(' '.join(words).replace('\x00', '').replace('\x01', ''))
+        return '\n'.join(lines)
+    
+    def title(self):
+        return ' '.join(''.join(self.title_parts).split())
+
+def extract_page(html):
+    """Return (text, links, title) for an HTML document"""
+    parser = PageParser()
+    parser.feed(html)
+    parser.close()
+    return parser.text(), parser.links, parser.title()
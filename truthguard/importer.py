@@ -0,0 +1,340 @@
+"""Bulk import of news and source CSVs into a TruthGuard database.
+
+    python -m truthguard.importer [CSV ...] [--db PATH] [--chunk-rows N]
+
+With no CSV arguments the files in example-csv/ are loaded into
+database/news_detector.db. true_news.csv and false_news.csv go into the
+known news tables and sources.csv into credibility_sources; any other file
+needs --table. Each CSV is read chunk by chunk with pandas, and every chunk
+is written with one executemany in its own transaction, together with the
+number of rows done so far and a digest of the file. An interrupted import
+started again carries on after the last committed chunk, and a file already
+imported is skipped until it changes. Rows appended to an imported file are
+loaded on the next run; a file edited in any other way is refused, since its
+earlier rows are already in the table.
+
+Secondary indexes are dropped for the load and built again afterwards, and
+the title and content of the known news tables are indexed in an FTS5
+table (external content, so the text is stored once). Rows added by other
+tools are indexed on the next import, or all at once with --rebuild-fts.
+"""
+import argparse
+import hashlib
+import os
+import sqlite3
+import sys
+import time
+
+import pandas as pd
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_DB_PATH = os.path.join(ROOT_DIR, 'database', 'news_detector.db')
+DEFAULT_CSV_DIR = os.path.join(ROOT_DIR, 'example-csv')
+DEFAULT_CHUNK_ROWS = 50_000
+
+KNOWN_TABLES = ('known_true_news', 'known_false_news')
+TABLE_FOR_FILE = {
+    'true_news.csv': 'known_true_news',
+    'false_news.csv': 'known_false_news',
+    'sources.csv': 'credibility_sources',
+}
+
+# The same tables setup-db.js and the import-*.js scripts create
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS known_true_news (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT,
+    content TEXT,
+    source TEXT,
+    date_added TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS known_false_news (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT,
+    content TEXT,
+    source TEXT,
+    date_added TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS credibility_sources (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    domain TEXT UNIQUE,
+    credibility_score REAL,
+    date_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS import_progress (
+    path TEXT PRIMARY KEY,
+    size INTEGER,
+    mtime REAL,
+    rows_done INTEGER,
+    completed INTEGER DEFAULT 0,
+    digest TEXT
+);
+CREATE TABLE IF NOT EXISTS import_fts_progress (
+    table_name TEXT PRIMARY KEY,
+    indexed_id INTEGER
+);
+'''
+
+# Indexes the importer owns, dropped during a load and built after it
+SECONDARY_INDEXES = {
+    table: {
+        f'idx_{table}_source': 'source',
+        f'idx_{table}_date_added': 'date_added',
+    }
+    for table in KNOWN_TABLES
+}
+
+# In WAL mode NORMAL only syncs at checkpoints, and a crash still leaves every committed chunk intact.
+# The database stays in WAL mode afterwards, as the feedback writer also leaves it
+LOAD_PRAGMAS = (
+    'PRAGMA journal_mode = WAL',
+    'PRAGMA synchronous = NORMAL',
+    'PRAGMA cache_size = -262144',
+    'PRAGMA temp_store = MEMORY',
+)
+
+def fts_table(table):
+    return f'{table}_fts'
+
+def fts_phrase(text):
+    """text as a quoted FTS5 phrase, so punctuation and keywords in it are taken literally"""
+    return '"' + text.replace('"', '""') + '"'
+
+def connect(db_path):
+    """Open db_path for a bulk load, creating the tables it needs"""
+    directory = os.path.dirname(db_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # Transactions are managed here, one per chunk
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    for pragma in LOAD_PRAGMAS:
+        conn.execute(pragma)
+    conn.executescript(SCHEMA)
+    return conn
+
+def table_columns(conn, table):
+    return [row[1] for row in conn.execute(f'PRAGMA table_info({table})')]
+
+def insert_statement(table, columns):
+    """The INSERT for one row of columns; credibility sources replace an existing domain"""
+    names = ', '.join(columns)
+    placeholders = ', '.join('?' for _ in columns)
+    if table == 'credibility_sources':
+        # A file with only a domain column still marks the domain as updated
+        updates = [f'{column} = excluded.{column}' for column in columns if column != 'domain']
+        updates.append('date_updated = CURRENT_TIMESTAMP')
+        return (f'INSERT INTO {table} ({names}) VALUES ({placeholders}) '
+                f'ON CONFLICT(domain) DO UPDATE SET {", ".join(updates)}')
+    return f'INSERT INTO {table} ({names}) VALUES ({placeholders})'
+
+def drop_secondary_indexes(conn, table):
+    for index in SECONDARY_INDEXES.get(table, {}):
+        conn.execute(f'DROP INDEX IF EXISTS {index}')
+
+def build_secondary_indexes(conn, table):
+    for index, column in SECONDARY_INDEXES.get(table, {}).items():
+        conn.execute(f'CREATE INDEX IF NOT EXISTS {index} ON {table}({column})')
+
+def update_fts(conn, table, rebuild=False):
+    """Index the rows added to table since the last update; returns the number indexed"""
+    fts = fts_table(table)
+    created = conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (fts,)).fetchone() is None
+    conn.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(title, content, content='{table}', content_rowid='id')"
+    )
+    row = conn.execute('SELECT indexed_id FROM import_fts_progress WHERE table_name = ?', (table,)).fetchone()
+    indexed_id = row[0] if row and not created else 0
+    max_id = conn.execute(f'SELECT COALESCE(MAX(id), 0) FROM {table}').fetchone()[0]
+    
+    conn.execute('BEGIN')
+    if rebuild or created or max_id < indexed_id:
+        # A rebuild reads every row again; a table below the mark was emptied and refilled
+        conn.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+        added = conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+    else:
+        added = conn.execute(
+            f'INSERT INTO {fts}(rowid, title, content) SELECT id, title, content FROM {table} WHERE id > ?',
+            (indexed_id,)
+        ).rowcount
+    conn.execute(
+        'INSERT OR REPLACE INTO import_fts_progress (table_name, indexed_id) VALUES (?, ?)', (table, max_id)
+    )
+    conn.execute('COMMIT')
+    return added
+
+class ImportResult:
+    """Rows written from one CSV and how long it took"""
+    
+    def __init__(self, path, table, rows, seconds, skipped=False, resumed_at=0):
+        self.path = path
+        self.table = table
+        self.rows = rows
+        self.seconds = seconds
+        self.skipped = skipped
+        self.resumed_at = resumed_at
+    
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+def file_digest(path, size):
+    """SHA-256 of the first size bytes of path"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while size > 0:
+            block = f.read(min(size, 1 << 20))
+            if not block:
+                break
+            digest.update(block)
+            size -= len(block)
+    return digest.hexdigest()
+
+def ends_with_newline(path, size):
+    with open(path, 'rb') as f:
+        f.seek(size - 1)
+        return f.read(1) == b'\n'
+
+def import_state(conn, path):
+    """(file stat, recorded progress row or None, whether the file still starts with the bytes recorded)"""
+    stat = os.stat(path)
+    progress = conn.execute(
+        'SELECT size, mtime, rows_done, completed, digest FROM import_progress WHERE path = ?', (path,)
+    ).fetchone()
+    if progress is None:
+        return stat, None, False
+    if (progress[0], progress[1]) == (stat.st_size, stat.st_mtime):
+        return stat, progress, True
+    # Appended rows leave the recorded bytes in place; they must end a line, or the last row would have changed
+    kept = (stat.st_size == progress[0] or stat.st_size > progress[0] and ends_with_newline(path, progress[0]))
+    return stat, progress, kept and file_digest(path, progress[0]) == progress[4]
+
+def is_imported(conn, path):
+    stat, progress, kept = import_state(conn, os.path.abspath(path))
+    return kept and bool(progress[3]) and stat.st_size == progress[0]
+
+def import_csv(conn, path, table, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Load one CSV into table, carrying on from where an interrupted import stopped or the file grew"""
+    path = os.path.abspath(path)
+    stat, progress, kept = import_state(conn, path)
+    if kept and progress[3] and stat.st_size == progress[0]:
+        return ImportResult(path, table, 0, 0.0, skipped=True)
+    if progress is not None and not kept:
+        raise ValueError(f"{path} changed after {progress[2]:,} of its rows were imported, not only by "
+                         f"appending rows; remove them from {table} and run again with --restart")
+    rows_done = progress[2] if kept else 0
+    digest = progress[4] if kept and stat.st_size == progress[0] else file_digest(path, stat.st_size)
+    
+    header = list(pd.read_csv(path, nrows=0).columns)
+    columns = [column for column in header if column in table_columns(conn, table) and column != 'id']
+    if not columns:
+        raise ValueError(f"{path} has no columns of {table}; found {', '.join(header) or 'none'}")
+    if table == 'credibility_sources' and 'domain' not in columns:
+        raise ValueError(f"{path} needs a domain column")
+    statement = insert_statement(table, columns)
+    
+    # Empty fields stay empty strings, as the import-*.js scripts store them
+    chunks = pd.read_csv(
+        path, header=None, names=header, usecols=columns, skiprows=rows_done + 1,
+        dtype=str, keep_default_na=False, chunksize=chunk_rows,
+    )
+    start = time.perf_counter()
+    written = 0
+    for chunk in chunks:
+        rows = chunk[columns].itertuples(index=False, name=None)
+        if 'credibility_score' in columns:
+            position = columns.index('credibility_score')
+            rows = ((*row[:position], float(row[position]) if row[position] else None, *row[position + 1:])
+                    for row in rows)
+        conn.execute('BEGIN')
+        try:
+            conn.executemany(statement, rows)
+            written += len(chunk)
+            conn.execute(
+                'INSERT OR REPLACE INTO import_progress (path, size, mtime, rows_done, completed, digest) '
+                'VALUES (?, ?, ?, ?, 0, ?)',
+                (path, stat.st_size, stat.st_mtime, rows_done + written, digest)
+            )
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+    conn.execute(
+        'INSERT OR REPLACE INTO import_progress (path, size, mtime, rows_done, completed, digest) '
+        'VALUES (?, ?, ?, ?, 1, ?)',
+        (path, stat.st_size, stat.st_mtime, rows_done + written, digest)
+    )
+    return ImportResult(path, table, written, time.perf_counter() - start, resumed_at=rows_done)
+
+def import_files(db_path, files, chunk_rows=DEFAULT_CHUNK_ROWS, restart=False, rebuild_fts=False, report=print):
+    """Import (path, table) pairs, then rebuild indexes and bring the FTS index up to date"""
+    conn = connect(db_path)
+    try:
+        if restart:
+            conn.executemany(
+                'DELETE FROM import_progress WHERE path = ?', [(os.path.abspath(path),) for path, _ in files]
+            )
+        tables = sorted({table for _, table in files} | ({*KNOWN_TABLES} if rebuild_fts else set()))
+        
+        results = []
+        loading = set()
+        for path, table in files:
+            if table not in loading and not is_imported(conn, path):
+                # Filling a table with its indexes in place costs more than building them afterwards
+                drop_secondary_indexes(conn, table)
+                loading.add(table)
+            result = import_csv(conn, path, table, chunk_rows)
+            results.append(result)
+            if result.skipped:
+                report(f"{os.path.basename(path)}: already imported, skipped")
+            else:
+                resumed = f", resumed after row {result.resumed_at:,}" if result.resumed_at else ''
+                report(f"{os.path.basename(path)} -> {table}: {result.rows:,} rows in {result.seconds:.2f} s "
+                       f"({result.rows_per_second:,.0f} rows/s{resumed})")
+        
+        for table in tables:
+            start = time.perf_counter()
+            build_secondary_indexes(conn, table)
+            if table in KNOWN_TABLES:
+                indexed = update_fts(conn, table, rebuild_fts)
+                report(f"{table}: indexes and full-text index updated ({indexed:,} rows) "
+                       f"in {time.perf_counter() - start:.2f} s")
+        conn.execute('PRAGMA optimize')
+        return results
+    finally:
+        conn.close()
+
+def csv_files(paths, table=None):
+    """(path, table) for each CSV, taking the table from the file name unless one is given"""
+    files = []
+    for path in paths:
+        name = table or TABLE_FOR_FILE.get(os.path.basename(path))
+        if name is None:
+            raise ValueError(f"No table for {path}; pass --table")
+        files.append((path, name))
+    return files
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import news and source CSVs into a TruthGuard database")
+    parser.add_argument('csv', nargs='*', help="CSV files to import (default: the files in example-csv/)")
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help="database to import into")
+    parser.add_argument('--table', help="table for CSVs whose file name doesn't say")
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS,
+                        help=f"rows read and committed at a time (default: {DEFAULT_CHUNK_ROWS:,})")
+    parser.add_argument('--restart', action='store_true', help="import the files again from the first row")
+    parser.add_argument('--rebuild-fts', action='store_true', help="rebuild the full-text indexes from scratch")
+    args = parser.parse_args(argv)
+    
+    paths = args.csv or [os.path.join(DEFAULT_CSV_DIR, name) for name in TABLE_FOR_FILE]
+    try:
+        files = csv_files(paths, args.table)
+        start = time.perf_counter()
+        results = import_files(args.db, files, args.chunk_rows, args.restart, args.rebuild_fts)
+    except (OSError, ValueError, sqlite3.Error) as e:
+        parser.exit(1, f"Import failed: {e}\n")
+    rows = sum(result.rows for result in results)
+    seconds = time.perf_counter() - start
+    print(f"Imported {rows:,} rows into {args.db} in {seconds:.2f} s ({rows / seconds:,.0f} rows/s overall)")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,148 @@
+"""Paragraph-level feature cache for re-analysing edited text.
+
+A document is split at blank lines and the feature counts of each paragraph
+are cached under its hash, so analysing an edited draft only scans the
+paragraphs that changed. Counts are summed back into the same dict
+extract_features returns for the whole text.
+
+Citations, quotations and "according to" phrases can run across a paragraph
+break. Each paragraph records whether it ends with one of them still open;
+those counts are then retaken over the run of paragraphs until the match
+closes, or over the whole text if the run is long.
+"""
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+
+from truthguard.analysis import (
+    ACCORDING_TO_PATTERN,
+    INDICATOR_MATCHER,
+    QUOTE_PATTERN,
+    count_sources,
+    structure_features,
+)
+from truthguard.timing import StageTimer
+
+DEFAULT_MAX_PARAGRAPHS = 4096
+
+# Paragraphs an open match may join before its counts are retaken over the whole text
+MAX_OPEN_RUN = 8
+
+# A paragraph ends after a line break, any blank lines and the next line break
+PARAGRAPH_BREAK = re.compile(r'\n\s*\n')
+QUOTE_REGEX = re.compile(QUOTE_PATTERN)
+ACCORDING_TO_REGEX = re.compile(ACCORDING_TO_PATTERN, re.IGNORECASE)
+
+# Every count in the extract_features dict, each the sum of its paragraph counts
+FEATURE_NAMES = tuple(INDICATOR_MATCHER.names) + (
+    'length', 'word_count', 'upper_case_count', 'excessive_punctuation', 'quote_count', 'source_count'
+)
+
+def split_paragraphs(content):
+    """Paragraphs of content, each keeping the break that follows it, so they join back exactly"""
+    paragraphs, start = [], 0
+    for match in PARAGRAPH_BREAK.finditer(content):
+        paragraphs.append(content[start:match.end()])
+        start = match.end()
+    if start < len(content) or not paragraphs:
+        paragraphs.append(content[start:])
+    return paragraphs
+
+def paragraph_key(paragraph):
+    return hashlib.blake2b(paragraph.encode('utf-8'), digest_size=16).digest()
+
+def ends_open(paragraph):
+    """Whether a citation, quotation or "according to" match could continue past the paragraph"""
+    if paragraph.rfind('(') > paragraph.rfind(')'):
+        return True
+    last_quote = None
+    for last_quote in QUOTE_REGEX.finditer(paragraph):
+        pass
+    if '"' in paragraph[last_quote.end() if last_quote else 0:]:
+        return True
+    last_according = None
+    for last_according in ACCORDING_TO_REGEX.finditer(paragraph):
+        pass
+    return last_according is not None and last_according.end() == len(paragraph)
+
+class ParagraphCache:
+    """Bounded LRU of per-paragraph feature counts, shared by every session"""
+    
+    def __init__(self, max_paragraphs=DEFAULT_MAX_PARAGRAPHS):
+        self.max_paragraphs = max_paragraphs
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.reused = 0
+        self.scanned = 0
+    
+    def features(self, content, timer=None):
+        """extract_features(content), scanning only paragraphs not seen before"""
+        timer = timer or StageTimer()
+        
+        with timer.stage('split'):
+            paragraphs = split_paragraphs(content)
+            keys = [paragraph_key(paragraph) for paragraph in paragraphs]
+            with self.lock:
+                cached = {key: self.entries[key] for key in keys if key in self.entries}
+                for key in cached:
+                    self.entries.move_to_end(key)
+            # A paragraph repeated within the document is scanned once
+            changed = {key: paragraph for key, paragraph in zip(keys, paragraphs) if key not in cached}
+        
+        new = {key: {} for key in changed}
+        with timer.stage('lexicon scan'):
+            for key, paragraph in changed.items():
+                new[key].update(INDICATOR_MATCHER.count(paragraph.lower()))
+        with timer.stage('structure'):
+            for key, paragraph in changed.items():
+                new[key].update(structure_features(paragraph))
+        with timer.stage('sources'):
+            for key, paragraph in changed.items():
+                new[key]['source_count'] = count_sources(paragraph)
+                new[key]['open'] = ends_open(paragraph)
+        
+        with self.lock:
+            self.entries.update(new)
+            while len(self.entries) > self.max_paragraphs:
+                self.entries.popitem(last=False)
+            self.reused += len(keys) - len(changed)
+            self.scanned += len(changed)
+        
+        cached.update(new)
+        counts = [cached[key] for key in keys]
+        features = {name: sum(paragraph[name] for paragraph in counts) for name in FEATURE_NAMES}
+        if any(paragraph['open'] for paragraph in counts[:-1]):
+            with timer.stage('sources'):
+                self._recount_open_runs(content, paragraphs, counts, features)
+        return features
+    
+    def _recount_open_runs(self, content, paragraphs, counts, features):
+        """Correct the counts of matches that straddle paragraph breaks"""
+        index = 0
+        while index < len(paragraphs) - 1:
+            if not counts[index]['open']:
+                index += 1
+                continue
+            # Join paragraphs until the open match has closed
+            end = index + 1
+            text = paragraphs[index] + paragraphs[end]
+            while end < len(paragraphs) - 1 and end - index < MAX_OPEN_RUN and ends_open(text):
+                end += 1
+                text += paragraphs[end]
+            if end - index >= MAX_OPEN_RUN and end < len(paragraphs) - 1:
+                features['source_count'] = count_sources(content)
+                features['quote_count'] = len(QUOTE_REGEX.findall(content))
+                return
+            run = counts[index:end + 1]
+            features['source_count'] += count_sources(text) - sum(paragraph['source_count'] for paragraph in run)
+            features['quote_count'] += len(QUOTE_REGEX.findall(text)) - sum(paragraph['quote_count'] for paragraph in run)
+            index = end + 1
+    
+    def stats(self):
+        with self.lock:
+            return {'paragraphs': len(self.entries), 'reused': self.reused, 'scanned': self.scanned}
+    
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
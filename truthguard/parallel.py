@@ -0,0 +1,87 @@
+"""Multi-core scoring of document batches with a reusable process pool"""
+import itertools
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from truthguard.analysis import INDICATOR_MATCHER, analyze_content
+
+DEFAULT_CHUNK_SIZE = 64
+DEFAULT_MIN_PARALLEL = 256
+
+def init_worker():
+    """Prepare a worker process once, before it scores any documents"""
+    # Importing truthguard.analysis compiled the lexicons; warm the scanner too
+    INDICATOR_MATCHER.count('')
+
+def score_texts(texts):
+    """Score one chunk of documents inside a worker"""
+    return [analyze_content(text) for text in texts]
+
+def iter_chunks(texts, chunk_size):
+    iterator = iter(texts)
+    while True:
+        chunk = list(itertools.islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+class ParallelScorer:
+    """Score documents across worker processes, preserving input order.
+    
+    Workers are started on first use and reused for later batches. Batches
+    smaller than min_parallel are scored in-process, where starting and
+    feeding the pool would cost more than it saves.
+    """
+    
+    def __init__(self, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, min_parallel=DEFAULT_MIN_PARALLEL,
+                 start_method='spawn'):
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.min_parallel = min_parallel
+        # Forking a multi-threaded host such as the Streamlit server is unsafe
+        self.context = multiprocessing.get_context(start_method)
+        self.executor = None
+    
+    def _pool(self):
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=self.context, initializer=init_worker
+            )
+        return self.executor
+    
+    def imap(self, texts):
+        """Yield (confidence, metrics) for each text, in input order"""
+        iterator = iter(texts)
+        head = list(itertools.islice(iterator, self.min_parallel))
+        
+        if self.workers == 1 or len(head) < self.min_parallel:
+            for text in itertools.chain(head, iterator):
+                yield analyze_content(text)
+            return
+        
+        # Keep a bounded number of chunks in flight so huge inputs stream through
+        pool = self._pool()
+        pending = deque()
+        for chunk in iter_chunks(itertools.chain(head, iterator), self.chunk_size):
+            pending.append(pool.submit(score_texts, chunk))
+            if len(pending) >= self.workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+    
+    def score(self, texts):
+        """Score a batch of texts, returning a list of (confidence, metrics)"""
+        return list(self.imap(texts))
+    
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,189 @@
+"""Per-process performance counters and optional profiling of analysis requests.
+
+PerformanceStats keeps request counters, latency histograms for every
+pipeline stage and a rolling window of recent timings, and exports them as
+Prometheus text or JSON. Profile wraps a request in cProfile and tracemalloc
+when profiling is switched on with TRUTHGUARD_PROFILE=1 (or the app's
+?profile=1 query parameter); otherwise it costs nothing.
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from collections import deque
+
+PROFILE_ENV = 'TRUTHGUARD_PROFILE'
+METRICS_FILE_ENV = 'TRUTHGUARD_METRICS_FILE'
+
+# Upper bounds in seconds of the latency histogram buckets, as Prometheus expects
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Timings kept per stage for the rolling percentiles
+RECENT_TIMINGS = 512
+
+def profiling_enabled(query_value=None):
+    """Whether profiling is switched on by the environment or a query parameter value"""
+    value = query_value if query_value is not None else os.environ.get(PROFILE_ENV, '')
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'on')
+
+def label_value(value):
+    """A label value escaped for the Prometheus text format"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def percentile(samples, fraction):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))] if samples else 0.0
+
+class LatencyHistogram:
+    """Cumulative bucket counts plus the most recent observations"""
+    
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.recent = deque(maxlen=RECENT_TIMINGS)
+    
+    def observe(self, seconds):
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.sum += seconds
+        self.recent.append(seconds)
+    
+    def cumulative(self):
+        """(upper bound, observations at or below it) for every bucket"""
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            yield bound, total
+    
+    def summary(self):
+        return {
+            'count': self.count,
+            'sum_seconds': self.sum,
+            'mean_ms': self.sum / self.count * 1000 if self.count else 0.0,
+            'p50_ms': percentile(self.recent, 0.5) * 1000,
+            'p95_ms': percentile(self.recent, 0.95) * 1000,
+            'p99_ms': percentile(self.recent, 0.99) * 1000,
+        }
+
+class PerformanceStats:
+    """Request counts and stage latencies for one process, shared across threads"""
+    
+    def __init__(self, metrics_file=None):
+        self.metrics_file = metrics_file if metrics_file is not None else os.environ.get(METRICS_FILE_ENV)
+        self.started = time.time()
+        self.lock = threading.Lock()
+        self.requests = {}
+        self.errors = {}
+        self.request_latency = {}
+        self.stage_latency = {}
+    
+    def observe(self, kind, timings):
+        """Count one request of this kind and record its stage timings in seconds"""
+        with self.lock:
+            self.requests[kind] = self.requests.get(kind, 0) + 1
+            self.request_latency.setdefault(kind, LatencyHistogram()).observe(sum(timings.values()))
+            for stage, seconds in timings.items():
+                self.stage_latency.setdefault(stage, LatencyHistogram()).observe(seconds)
+        if self.metrics_file:
+            self.write_json(self.metrics_file)
+    
+    def error(self, kind):
+        with self.lock:
+            self.errors[kind] = self.errors.get(kind, 0) + 1
+    
+    def snapshot(self):
+        """Counters and latency summaries as plain data"""
+        with self.lock:
+            return {
+                'uptime_seconds': time.time() - self.started,
+                'requests': dict(self.requests),
+                'errors': dict(self.errors),
+                'request_latency': {kind: h.summary() for kind, h in self.request_latency.items()},
+                'stage_latency': {stage: h.summary() for stage, h in self.stage_latency.items()},
+            }
+    
+    def write_json(self, path):
+        """Write the snapshot to path, replacing the previous file in one step"""
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(self.snapshot(), f, indent=2)
+        os.replace(temp_path, path)
+    
+    def prometheus(self):
+        """The counters and histograms in the Prometheus text exposition format"""
+        lines = []
+        with self.lock:
+            lines.append('# HELP truthguard_requests_total Analysis requests handled, by kind.')
+            lines.append('# TYPE truthguard_requests_total counter')
+            for kind, count in sorted(self.requests.items()):
+                lines.append(f'truthguard_requests_total{{kind="{label_value(kind)}"}} {count}')
+            lines.append('# HELP truthguard_errors_total Analysis requests that failed, by kind.')
+            lines.append('# TYPE truthguard_errors_total counter')
+            for kind, count in sorted(self.errors.items()):
+                lines.append(f'truthguard_errors_total{{kind="{label_value(kind)}"}} {count}')
+            for name, label, histograms in (
+                ('truthguard_request_seconds', 'kind', self.request_latency),
+                ('truthguard_stage_seconds', 'stage', self.stage_latency),
+            ):
+                lines.append(f'# TYPE {name} histogram')
+                for key, histogram in sorted(histograms.items()):
+                    key = label_value(key)
+                    for bound, count in histogram.cumulative():
+                        lines.append(f'{name}_bucket{{{label}="{key}",le="{bound}"}} {count}')
+                    lines.append(f'{name}_bucket{{{label}="{key}",le="+Inf"}} {histogram.count}')
+                    lines.append(f'{name}_sum{{{label}="{key}"}} {histogram.sum}')
+                    lines.append(f'{name}_count{{{label}="{key}"}} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+class Profile:
+    """Capture a cProfile and tracemalloc report of the wrapped block when enabled"""
+    
+    def __init__(self, enabled=True, top=20):
+        self.enabled = enabled
+        self.top = top
+        self.profiler = None
+        self.stats = None
+        self.peak_memory = 0
+        self.allocations = []
+        self.started_tracing = False
+    
+    def __enter__(self):
+        if self.enabled:
+            self.started_tracing = not tracemalloc.is_tracing()
+            if self.started_tracing:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        return self
+    
+    def __exit__(self, *exc_info):
+        if self.profiler is None:
+            return
+        self.profiler.disable()
+        self.peak_memory = tracemalloc.get_traced_memory()[1]
+        self.allocations = tracemalloc.take_snapshot().statistics('lineno')[:10]
+        if self.started_tracing:
+            tracemalloc.stop()
+        self.stats = pstats.Stats(self.profiler)
+    
+    def report(self):
+        """Top functions by cumulative time and the largest allocations, as text"""
+        if self.stats is None:
+            return ''
+        out = io.StringIO()
+        self.stats.stream = out
+        self.stats.sort_stats('cumulative').print_stats(self.top)
+        out.write(f"Peak traced memory: {self.peak_memory / 1024:.1f} KiB\n")
+        for statistic in self.allocations:
+            out.write(f"{statistic}\n")
+        return out.getvalue()
@@ -0,0 +1,104 @@
+"""Local HTTP scoring endpoint, started with `python -m truthguard serve`.
+
+    GET  /health   {"status": "ok", "rules_version": ...}
+    GET  /metrics  request counters and stage latencies, as Prometheus text
+    POST /score    a JSON document, or NDJSON with one document per line
+
+A JSON body gets one JSON result back; an NDJSON body (Content-Type
+application/x-ndjson) gets one result line per document. Documents take
+the same shape as for the score command. Connections are kept alive, so
+a client sending many requests pays for the TCP handshake once.
+"""
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from truthguard.analysis import SCORING_RULES_VERSION
+from truthguard.cli import score_document, score_lines
+from truthguard.profiling import PerformanceStats
+from truthguard.timing import StageTimer
+
+MAX_BODY_BYTES = 10 * 1024 * 1024
+NDJSON_TYPES = ('application/x-ndjson', 'application/jsonl', 'application/ndjson')
+
+class ScoringHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'TruthGuard'
+    # Headers and body go out in separate writes; don't let Nagle hold the body back
+    disable_nagle_algorithm = True
+    verbose = False
+    
+    def do_GET(self):
+        if self.path == '/health':
+            self._send(200, {'status': 'ok', 'rules_version': SCORING_RULES_VERSION})
+        elif self.path == '/metrics':
+            self._send_bytes(200, self.server.stats.prometheus().encode('utf-8'), 'text/plain; version=0.0.4')
+        else:
+            self._send(404, {'error': 'Not found'})
+    
+    def do_POST(self):
+        if self.path != '/score':
+            # The body is left unread, so the connection can't be reused
+            self.close_connection = True
+            return self._send(404, {'error': 'Not found'})
+        try:
+            length = int(self.headers.get('Content-Length', ''))
+        except ValueError:
+            self.close_connection = True
+            return self._send(411, {'error': 'Content-Length required'})
+        if length < 0:
+            self.close_connection = True
+            return self._send(400, {'error': 'Content-Length must not be negative'})
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True
+            return self._send(413, {'error': f'Body larger than {MAX_BODY_BYTES} bytes'})
+        
+        timer = StageTimer()
+        with timer.stage('read'):
+            body = self.rfile.read(length).decode('utf-8', errors='replace')
+        content_type = self.headers.get('Content-Type', '').split(';')[0].strip().lower()
+        if content_type in NDJSON_TYPES:
+            # Only \n ends a line; splitlines() would also split at characters such as U+2028,
+            # which JSON strings may hold unescaped
+            with timer.stage('scoring'):
+                lines = ''.join(json.dumps(record) + '\n' for record in score_lines(body.split('\n')))
+            self.server.stats.observe('score', timer.timings)
+            return self._send_bytes(200, lines.encode('utf-8'), 'application/x-ndjson')
+        try:
+            with timer.stage('scoring'):
+                result = score_document(json.loads(body))
+        except ValueError as e:
+            self.server.stats.error('score')
+            return self._send(400, {'error': str(e)})
+        self.server.stats.observe('score', timer.timings)
+        self._send(200, result)
+    
+    def _send(self, status, payload):
+        self._send_bytes(status, json.dumps(payload).encode('utf-8'), 'application/json')
+    
+    def _send_bytes(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        if self.verbose:
+            super().log_message(format, *args)
+
+def make_server(host='127.0.0.1', port=8765, verbose=False):
+    """A threaded server bound to host:port; port 0 picks a free one"""
+    handler = type('Handler', (ScoringHandler,), {'verbose': verbose})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.stats = PerformanceStats()
+    return server
+
+def serve(host='127.0.0.1', port=8765, verbose=False):
+    """Serve until interrupted"""
+    with make_server(host, port, verbose) as server:
+        print(f"TruthGuard scoring on http://{server.server_address[0]}:{server.server_address[1]}/score", flush=True)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
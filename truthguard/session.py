@@ -0,0 +1,95 @@
+"""Per-session state the Streamlit app keeps between reruns.
+
+A process can hold hundreds of sessions at once, so each finished analysis
+is a slotted record: its Metrics stay as raw counts, its stage timings are
+an array of seconds beside a tuple of stage names, its crawled pages are
+tuples, and display strings are built only when the result is drawn. A
+multi-document upload keeps only a key to its results table, which is held
+in a bounded store shared by every session, with each export format built
+only when it is first downloaded.
+"""
+import threading
+import uuid
+from array import array
+from collections import OrderedDict
+
+# Multi-document result tables held at once across every session
+DEFAULT_DOCUMENT_TABLES = 8
+
+class AnalysisResult:
+    """The last analysis of one tab, redrawn on reruns without analyzing again"""
+    
+    __slots__ = ('verdict', 'confidence', 'metrics', 'stages', 'seconds', 'content', 'store_content',
+                 'observed', 'pages', 'caption')
+    
+    def __init__(self, verdict, confidence, metrics, timings=None, content='', store_content=True,
+                 pages=(), caption=''):
+        self.verdict = verdict
+        self.confidence = confidence
+        self.metrics = metrics
+        # Stage names in the order the stages ran, and the seconds each took
+        timings = timings or {}
+        self.stages = tuple(timings)
+        self.seconds = array('d', timings.values())
+        self.content = content
+        self.store_content = store_content
+        self.observed = False
+        # Crawled pages as tuples in PAGE_COLUMNS order
+        self.pages = tuple(pages)
+        self.caption = caption
+    
+    def observe(self, render_timings):
+        """Add the first render's timings; returns True only the first time, when they should be counted"""
+        if self.observed:
+            return False
+        self.stages += tuple(render_timings)
+        self.seconds.extend(render_timings.values())
+        self.observed = True
+        return True
+    
+    def timings(self):
+        """Seconds per stage, as StageTimer records them"""
+        return dict(zip(self.stages, self.seconds))
+
+class DocumentResults:
+    """The last CSV/JSONL upload of a session, redrawn on reruns such as a download"""
+    
+    __slots__ = ('upload', 'table', 'caption')
+    
+    def __init__(self, upload, table, caption=''):
+        # (file name, size) of the upload the results were scored from
+        self.upload = upload
+        # Key of the scored rows in DocumentTables
+        self.table = table
+        self.caption = caption
+
+class DocumentTables:
+    """Scored tables of recent multi-document uploads, least recently used dropped first.
+    
+    Tables are keyed by a random token rather than the upload's name and
+    size, since two sessions may upload different files with the same ones.
+    Each entry also keeps the exported bytes by format, filled in as each
+    format is chosen.
+    """
+    
+    def __init__(self, max_entries=DEFAULT_DOCUMENT_TABLES):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+    
+    def put(self, results):
+        """Hold a table; returns its key"""
+        key = uuid.uuid4().hex
+        with self.lock:
+            self.entries[key] = (results, {})
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return key
+    
+    def get(self, key):
+        """(results, exports) for a key, or None once the table has been dropped"""
+        with self.lock:
+            if key not in self.entries:
+                return None
+            self.entries.move_to_end(key)
+            return self.entries[key]
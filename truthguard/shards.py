@@ -0,0 +1,197 @@
+"""Read-only lookups fanned out across every database under database/.
+
+news_detector.db, example_news.db and custom_news_detector.db share one
+schema and hold separate corpora. ShardedDatabase keeps a small pool of
+read-only connections per file and runs each lookup on all of them at once
+in a thread pool; SQLite releases the GIL while it reads, so the shards are
+queried in parallel. Every connection caches its prepared statements, and
+the SQL of each lookup is a fixed string so repeated lookups reuse them.
+
+Results are merged by shard precedence, first listed first: a domain scored
+in several shards takes the score of the earliest one, and known-article
+matches are ranked by similarity with precedence breaking ties. Credibility
+scores are merged once into an in-memory CredibilityIndex, reloaded when any
+shard changes, rather than queried per lookup. The
+TRUTHGUARD_SHARD_PRECEDENCE environment variable lists shard names (file
+names without .db) to put first.
+"""
+import glob
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from truthguard.credibility import DEFAULT_REFRESH_SECONDS, CredibilitySource, cited_hosts
+from truthguard.duplicates import KnownArticles, minhash
+from truthguard.profiling import LatencyHistogram
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_DB_DIR = os.path.join(ROOT_DIR, 'database')
+PRECEDENCE_ENV = 'TRUTHGUARD_SHARD_PRECEDENCE'
+
+# Databases in the directory that aren't news corpora
+EXCLUDED_FILES = ('analysis_cache.db',)
+
+POOL_SIZE = 4
+STATEMENT_CACHE_SIZE = 64
+
+def shard_name(db_path):
+    return os.path.splitext(os.path.basename(db_path))[0]
+
+def default_db_paths(db_dir=DEFAULT_DB_DIR):
+    """Every news database in db_dir, news_detector.db first and the rest by name"""
+    paths = [path for path in sorted(glob.glob(os.path.join(db_dir, '*.db')))
+             if os.path.basename(path) not in EXCLUDED_FILES]
+    return sorted(paths, key=lambda path: shard_name(path) != 'news_detector')
+
+def ordered_by_precedence(db_paths, precedence=None):
+    """db_paths with the named shards first, in the order named, and the rest as given"""
+    if precedence is None:
+        precedence = [name.strip() for name in os.environ.get(PRECEDENCE_ENV, '').split(',') if name.strip()]
+    rank = {name: i for i, name in enumerate(precedence)}
+    return sorted(db_paths, key=lambda path: rank.get(shard_name(path), len(rank)))
+
+class ConnectionPool:
+    """Read-only connections to one database file, opened as they are first needed"""
+    
+    def __init__(self, db_path, size=POOL_SIZE, cached_statements=STATEMENT_CACHE_SIZE):
+        self.db_path = db_path
+        self.size = size
+        self.cached_statements = cached_statements
+        self.idle = queue.LifoQueue()
+        self.lock = threading.Lock()
+        self.opened = 0
+    
+    def _open(self):
+        uri = 'file:' + os.path.abspath(self.db_path) + '?mode=ro'
+        return sqlite3.connect(uri, uri=True, check_same_thread=False, cached_statements=self.cached_statements)
+    
+    @contextmanager
+    def connection(self):
+        """Borrow a connection, waiting for one to come back if all are in use"""
+        try:
+            conn = self.idle.get_nowait()
+        except queue.Empty:
+            with self.lock:
+                can_open = self.opened < self.size
+                if can_open:
+                    self.opened += 1
+            if can_open:
+                try:
+                    conn = self._open()
+                except sqlite3.Error:
+                    with self.lock:
+                        self.opened -= 1
+                    raise
+            else:
+                conn = self.idle.get()
+        try:
+            yield conn
+        finally:
+            self.idle.put(conn)
+    
+    def close(self):
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+class Shard:
+    """One database file: its connection pool and its near-duplicate index"""
+    
+    def __init__(self, db_path, pool_size=POOL_SIZE):
+        self.db_path = db_path
+        self.name = shard_name(db_path)
+        self.pool = ConnectionPool(db_path, pool_size)
+        self.known_articles = KnownArticles(db_path, pool=self.pool)
+    
+    def match(self, signature, limit):
+        return [dict(match, shard=self.name) for match in self.known_articles.match_signature(signature, limit)]
+
+class ShardedDatabase:
+    """Concurrent lookups across several databases with the same schema.
+    
+    Shards are listed in precedence order. Each lookup's latency is recorded
+    per shard, and a shard that fails is counted and left out of the result.
+    """
+    
+    def __init__(self, db_paths=None, precedence=None, pool_size=POOL_SIZE,
+                 refresh_seconds=DEFAULT_REFRESH_SECONDS):
+        db_paths = default_db_paths() if db_paths is None else db_paths
+        self.shards = [Shard(path, pool_size) for path in ordered_by_precedence(db_paths, precedence)]
+        # Every shard's credibility_sources in one index, the first shard listing a domain winning
+        self.credibility = CredibilitySource([shard.db_path for shard in self.shards], refresh_seconds)
+        self.executor = ThreadPoolExecutor(max_workers=max(1, len(self.shards)), thread_name_prefix='shard')
+        self.lock = threading.Lock()
+        self.latency = {}
+        self.errors = {}
+    
+    def fan_out(self, lookup, call):
+        """Run call(shard) on every shard at once; returns the results in precedence order"""
+        def timed(shard):
+            start = time.perf_counter()
+            try:
+                return call(shard)
+            except (sqlite3.Error, OSError, ValueError):
+                with self.lock:
+                    self.errors[shard.name, lookup] = self.errors.get((shard.name, lookup), 0) + 1
+                return None
+            finally:
+                seconds = time.perf_counter() - start
+                with self.lock:
+                    self.latency.setdefault((shard.name, lookup), LatencyHistogram()).observe(seconds)
+        
+        # The first shard runs in the calling thread, which would otherwise only wait
+        others = [self.executor.submit(timed, shard) for shard in self.shards[1:]]
+        first = [timed(shard) for shard in self.shards[:1]]
+        return first + [future.result() for future in others]
+    
+    def credibility_scores(self, hosts):
+        """Scores of the listed domains among hosts, from the first shard listing each"""
+        return self.credibility.index().known_sources([host for host in hosts if host])
+    
+    def adjust_credibility(self, confidence, metrics, content='', hosts=()):
+        """CredibilityIndex.adjust with the scores of every shard"""
+        hosts = [host for host in hosts if host]
+        return self.credibility.index().adjust(confidence, metrics, content, hosts)
+    
+    def match(self, content, limit=3):
+        """The known articles of every shard most similar to content, each with its shard name.
+        
+        The same article found in several shards is reported once, from the
+        shard with the highest precedence; copies are recognized by their
+        content hash, since titles such as 'Untitled' are shared.
+        """
+        # Every shard is queried with the same signature, computed once
+        signature = minhash(content)
+        ranked = []
+        for rank, matches in enumerate(self.fan_out('known match', lambda shard: shard.match(signature, limit))):
+            ranked.extend((-match['similarity'], rank, i, match) for i, match in enumerate(matches or []))
+        ranked.sort(key=lambda item: item[:3])
+        
+        results, seen = [], set()
+        for _, _, _, match in ranked:
+            if match['content_hash'] not in seen:
+                seen.add(match['content_hash'])
+                results.append(match)
+        return results[:limit]
+    
+    def stats(self):
+        """Latency summary of each shard and lookup, in precedence order"""
+        rows = []
+        with self.lock:
+            for shard in self.shards:
+                for (name, lookup), histogram in self.latency.items():
+                    if name == shard.name:
+                        rows.append(dict(shard=name, lookup=lookup, errors=self.errors.get((name, lookup), 0),
+                                         **histogram.summary()))
+        return rows
+    
+    def close(self):
+        self.executor.shutdown(wait=True)
+        for shard in self.shards:
+            shard.pool.close()
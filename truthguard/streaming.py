@@ -0,0 +1,261 @@
+"""Chunked analysis of large texts with bounded memory.
+
+Every feature analyze_content extracts is kept as a running counter with a
+small amount of carried state, so matches that straddle chunk edges are
+counted exactly as the in-memory regexes would count them.
+"""
+import codecs
+import re
+
+from truthguard.analysis import (
+    ACCORDING_TO_PATTERN,
+    CASELESS_CHARS,
+    INDICATOR_MATCHER,
+    UPPERCASE_PATTERN,
+    URL_PATTERN,
+    normalize_content,
+    score_features,
+)
+
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+def iter_text_chunks(fileobj, chunk_size=DEFAULT_CHUNK_SIZE, encoding='utf-8', normalize=True):
+    """Decode a binary file object chunk by chunk, with line endings normalized unless normalize is False"""
+    decoder = codecs.getincrementaldecoder(encoding)()
+    pending_cr = ''
+    
+    while True:
+        data = fileobj.read(chunk_size)
+        final = not data
+        text = pending_cr + decoder.decode(data, final=final)
+        
+        # A trailing CR may be the first half of a CRLF pair
+        pending_cr = ''
+        if normalize and not final and text.endswith('\r'):
+            text, pending_cr = text[:-1], '\r'
+        
+        if text:
+            yield normalize_content(text) if normalize else text
+        if final:
+            break
+
+class RunCounter:
+    """Count maximal runs of a character class that reach a minimum length"""
+    
+    def __init__(self, char_class, min_length=1):
+        self.run = re.compile(char_class + '+')
+        self.long_runs = re.compile(char_class + '{%d,}' % min_length)
+        self.min_length = min_length
+        self.count = 0
+        self.open_run = 0
+    
+    def feed(self, chunk):
+        if not chunk:
+            return
+        
+        leading = self.run.match(chunk)
+        leading_length = leading.end() if leading else 0
+        if leading_length == len(chunk):
+            # The whole chunk extends the open run
+            self.open_run += leading_length
+            return
+        
+        count = len(self.long_runs.findall(chunk))
+        
+        # The leading run continues the one left open by the previous chunk
+        if leading_length >= self.min_length:
+            count -= 1
+        if self.open_run + leading_length >= self.min_length:
+            count += 1
+        
+        # The trailing run may continue into the next chunk
+        trailing = self.run.match(chunk[::-1])
+        self.open_run = trailing.end() if trailing else 0
+        if self.open_run >= self.min_length:
+            count -= 1
+        
+        self.count += count
+    
+    def finish(self):
+        if self.open_run >= self.min_length:
+            self.count += 1
+        self.open_run = 0
+        return self.count
+
+class SegmentCounter:
+    """Count matches of a pattern that always runs on to the next delimiter.
+    
+    Once patterns such as https?://[^\\s]+ start, they consume the rest of
+    their segment, so a chunk edge can only cut a match short at its end or
+    split the short prefix that starts it.
+    """
+    
+    def __init__(self, pattern, delimiter, max_prefix, flags=0):
+        self.pattern = re.compile(pattern, flags)
+        self.delimiter = re.compile(delimiter)
+        self.keep = max_prefix
+        self.count = 0
+        self.open_match = False
+        self.tail = ''
+    
+    def feed(self, chunk):
+        if self.open_match:
+            # Skip the rest of the segment the open match runs on to
+            delimiter = self.delimiter.search(chunk)
+            if delimiter is None:
+                return
+            self.count += 1
+            self.open_match = False
+            text, start = chunk, delimiter.start()
+        else:
+            text, start = self.tail + chunk, 0
+        
+        for match in self.pattern.finditer(text, start):
+            if match.end() == len(text):
+                self.open_match = True
+            else:
+                self.count += 1
+        
+        # Keep any unfinished match prefix at the end of the last segment
+        self.tail = '' if self.open_match else self.delimiter.split(text[-self.keep:])[-1]
+    
+    def finish(self):
+        self.count += self.open_match
+        self.open_match = False
+        return self.count
+
+class CitationCounter:
+    """Streaming equivalent of counting \\([^)]*\\d{4}[^)]*\\) matches"""
+    
+    digits = re.compile(r'\d{4}')
+    
+    def __init__(self):
+        self.count = 0
+        self.opened = False
+        self.found = False
+        self.tail = ''
+    
+    def feed(self, chunk):
+        parts = chunk.split(')')
+        for index, part in enumerate(parts):
+            if not self.opened:
+                open_at = part.find('(')
+                if open_at >= 0:
+                    self.opened = True
+                    part = part[open_at + 1:]
+            
+            if self.opened and not self.found:
+                text = self.tail + part
+                self.found = bool(self.digits.search(text))
+                self.tail = text[-3:]
+            
+            if index < len(parts) - 1:
+                # A closing parenthesis ends the candidate citation
+                self.count += self.found
+                self.opened = self.found = False
+                self.tail = ''
+    
+    def finish(self):
+        return self.count
+
+class QuoteCounter:
+    """Streaming equivalent of counting "[^"]+" matches"""
+    
+    def __init__(self):
+        self.count = 0
+        self.opened = False
+        self.has_content = False
+    
+    def feed(self, chunk):
+        parts = chunk.split('"')
+        for index, part in enumerate(parts):
+            if part and self.opened:
+                self.has_content = True
+            
+            if index < len(parts) - 1:
+                if self.opened and self.has_content:
+                    self.count += 1
+                    self.opened = False
+                else:
+                    # An empty pair restarts the quotation at this mark
+                    self.opened = True
+                    self.has_content = False
+    
+    def finish(self):
+        return self.count
+
+class StreamingAnalyzer:
+    """Accumulate analyze_content features over text fed in chunks.
+    
+    Chunks are counted as given, so their features equal extract_features
+    over the joined text. Memory use depends only on the chunk size.
+    """
+    
+    uppercase = re.compile(UPPERCASE_PATTERN)
+    
+    def __init__(self, matcher=INDICATOR_MATCHER):
+        self.matcher = matcher
+        self.length = 0
+        self.upper_case_count = 0
+        self.words = RunCounter(r'\w')
+        self.punctuation = RunCounter(r'[!?]', min_length=2)
+        self.urls = SegmentCounter(URL_PATTERN, r'\s', len('https://'))
+        self.according_to = SegmentCounter(ACCORDING_TO_PATTERN, r'[,.]', len('according to '), re.IGNORECASE)
+        self.citations = CitationCounter()
+        self.quotes = QuoteCounter()
+        
+        # Lexicon scanning state, with positions relative to the whole stream
+        self.indicator_counts = dict.fromkeys(matcher.names, 0)
+        self.last_end = {}
+        self.window = ''
+        self.window_offset = 0
+        self.scan_from = 0
+    
+    def feed(self, chunk):
+        self.length += len(chunk)
+        self.upper_case_count += len(self.uppercase.findall(chunk))
+        for counter in (self.words, self.punctuation, self.urls, self.according_to, self.citations, self.quotes):
+            counter.feed(chunk)
+        
+        self.window += chunk.lower().translate(CASELESS_CHARS)
+        
+        # Only phrases starting here are certain to be followed by enough text
+        limit = len(self.window) - self.matcher.max_length
+        if limit > self.scan_from:
+            self.matcher.scan(
+                self.window, self.indicator_counts, self.last_end,
+                start=self.scan_from, end=limit, offset=self.window_offset
+            )
+            # Keep one character before the next scan for the word boundary check
+            keep_from = limit - 1
+            self.window = self.window[keep_from:]
+            self.window_offset += keep_from
+            self.scan_from = limit - keep_from
+    
+    def features(self):
+        """Finish the stream and return the same dict as extract_features"""
+        self.matcher.scan(
+            self.window, self.indicator_counts, self.last_end,
+            start=self.scan_from, offset=self.window_offset
+        )
+        self.window = ''
+        
+        features = dict(self.indicator_counts)
+        features['length'] = self.length
+        features['word_count'] = self.words.finish()
+        features['upper_case_count'] = self.upper_case_count
+        features['excessive_punctuation'] = self.punctuation.finish()
+        features['source_count'] = self.urls.finish() + self.citations.finish() + self.according_to.finish()
+        features['quote_count'] = self.quotes.finish()
+        return features
+
+def analyze_stream(chunks):
+    """analyze_content over an iterable of text chunks"""
+    analyzer = StreamingAnalyzer()
+    for chunk in chunks:
+        analyzer.feed(chunk)
+    return score_features(analyzer.features())
+
+def analyze_file(fileobj, chunk_size=DEFAULT_CHUNK_SIZE, encoding='utf-8'):
+    """analyze_content over a binary file object, read chunk by chunk"""
+    return analyze_stream(iter_text_chunks(fileobj, chunk_size, encoding, normalize=False))
@@ -0,0 +1,28 @@
+"""Wall-clock timing of the analysis pipeline stages"""
+import time
+from contextlib import contextmanager
+
+class StageTimer:
+    """Record how long each named analysis stage takes.
+    
+    An optional on_stage callback is called with the stage name as each stage
+    starts, which the app uses to drive its progress bar.
+    """
+    
+    def __init__(self, on_stage=None):
+        self.on_stage = on_stage
+        self.timings = {}
+    
+    @contextmanager
+    def stage(self, name):
+        if self.on_stage:
+            self.on_stage(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0) + time.perf_counter() - start
+    
+    def total(self):
+        """Seconds spent across all recorded stages"""
+        return sum(self.timings.values())